@@ -28,6 +28,8 @@ from agents import Agent, DeepQNetwork, Policy
 from environment.base_env import BaseEnv
 from environment.human_control_env import HumanControlEnv
 from environment.human_rendering_env import HumanRenderingEnv
+from environment.multi_plane_env import MultiPlaneEnv
+from environment.vector_env import VectorEnv
 
 __all__ = [
     "Agent",
@@ -35,17 +37,31 @@ __all__ = [
     "DeepQNetwork",
     "HumanControlEnv",
     "HumanRenderingEnv",
+    "MultiPlaneEnv",
     "Policy",
+    "VectorEnv",
     "make",
 ]
 
 
 def make(
     render_mode: str|None = None,
-    plane_config: str = "config/i-16_falangist.yaml",
+    plane_config: str|list[str] = "config/i-16_falangist.yaml",
     env_config: str = "config/default_env.yaml",
     target_config: str = "config/default_target.yaml",
     seed: int|None = None,
+    *,
+    num_envs: int|None = None,
+    n_planes: int|None = None,
+    dtype: str = "float64",
+    physics_backend: str = "numpy",
+    frame_skip: int = 1,
+    dt: float = 1 / 60,
+    integrator: str = "euler",
+    collision_mode: str = "pairwise",
+    history_level: str = "full",
+    history_keep_last: int|None = None,
+    history_every: int = 1,
 ) -> BaseEnv:
     """
     Make function for Target_Terminator.
@@ -55,40 +71,145 @@ def make(
         - Environment with gui.
         - Environment with gui, where the agent can be controlled by
         the user, using their keyboard.
+        - Vectorized environment without gui, which steps multiple
+        worlds at once.
+        - Vectorized environment without gui, with multiple planes
+        in every world.
     
     @params:
         - render_mode (str): Render mode, to make gui, keyboard gui, or
         neither.
-        - plane_config (str): Path to yaml file with plane
+        - plane_config (str|list[str]): Path to yaml file with plane
         configuration. See config/i-16_falangist.yaml for more info.
+        A list with one path per plane makes a multi-plane
+        environment.
         - env_config (str): Path to yaml file with environment
         configuration. See config/default_env.yaml for more info.
         - target_config (str): Path to yaml file with target
         configuration. See config/default_target.yaml for more
         info.
         - seed (int): Seed for randomizer. If None, no seed is used.
+        - num_envs (int): Number of worlds to step at once. If not
+        None, a vectorized environment is made, which has no gui.
+        - n_planes (int): Number of planes per world. If not None, a
+        multi-plane environment is made, which has no gui.
+        - dtype (str): Precision of the simulation, "float64" or
+        "float32". float32 halves the memory used by the simulation
+        and matches the precision of the DQN.
+        - physics_backend (str): "numpy" or "numba". The numba backend
+        runs the physics as compiled loops, which is faster for a
+        single environment. Falls back to "numpy" if numba is not
+        installed.
+        - frame_skip (int): Number of ticks every action is applied
+        for. The action is chosen, and the observation and reward are
+        calculated, once every frame_skip ticks. A bullet is shot at
+        most once per action.
+        - dt (float): Simulated seconds per tick.
+        - integrator (str): Integrator of the airplane physics, "euler",
+        "midpoint" or "rk4". The higher order integrators stay accurate
+        for a larger dt, see benchmarks/integrators.py.
+        - collision_mode (str): "pairwise" or "event". The event mode
+        predicts when bullets hit targets as they are shot, instead of
+        testing every pair of entities every tick, see
+        benchmarks/collision_mode.py.
+        - history_level (str): "off", "episode_summary" or "full", how
+        much of every episode is recorded for the output of close().
+        Long runs that do not use the observation history can record
+        only the summaries of the episodes, or nothing at all. The
+        environments with a gui always record everything.
+        - history_keep_last (int): Only keep the observations of the
+        last K episodes. If None, all are kept.
+        - history_every (int): Only keep the observations of every Nth
+        episode, see benchmarks/history_levels.py.
 
     @returns:
         Environment corresponding to the provided parameters.
     """
+    if n_planes is not None or not isinstance(plane_config, str):
+        if render_mode is not None:
+            raise ValueError("Multi-plane environments have no gui.")
+        return MultiPlaneEnv(
+            plane_config=plane_config,
+            env_config=env_config,
+            target_config=target_config,
+            seed=seed,
+            num_envs=1 if num_envs is None else num_envs,
+            n_planes=n_planes,
+            dtype=dtype,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            dt=dt,
+            integrator=integrator,
+            collision_mode=collision_mode,
+            history_level=history_level,
+            history_keep_last=history_keep_last,
+            history_every=history_every,
+        )
+
+    if num_envs is not None:
+        if render_mode is not None:
+            raise ValueError("Vectorized environments have no gui.")
+        return VectorEnv(
+            plane_config=plane_config,
+            env_config=env_config,
+            target_config=target_config,
+            seed=seed,
+            num_envs=num_envs,
+            dtype=dtype,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            dt=dt,
+            integrator=integrator,
+            collision_mode=collision_mode,
+            history_level=history_level,
+            history_keep_last=history_keep_last,
+            history_every=history_every,
+        )
+
     env = None
     match render_mode:
         case "human":
             env = HumanRenderingEnv(
-                plane_config,
-                env_config,
-                target_config,
-                seed,
+                plane_config=plane_config,
+                env_config=env_config,
+                target_config=target_config,
+                seed=seed,
+                dtype=dtype,
+                physics_backend=physics_backend,
+                frame_skip=frame_skip,
+                dt=dt,
+                integrator=integrator,
+                collision_mode=collision_mode,
             )
         case "keyboard":
             env = HumanControlEnv(
-                plane_config,
-                env_config,
-                target_config,
-                seed,
+                plane_config=plane_config,
+                env_config=env_config,
+                target_config=target_config,
+                seed=seed,
+                dtype=dtype,
+                physics_backend=physics_backend,
+                frame_skip=frame_skip,
+                dt=dt,
+                integrator=integrator,
+                collision_mode=collision_mode,
             )
         # anything that is not "human" or "keyboard" gets interpreted
         # as no gui.
         case _:
-            env = BaseEnv(plane_config, env_config, target_config, seed)
+            env = BaseEnv(
+                plane_config=plane_config,
+                env_config=env_config,
+                target_config=target_config,
+                seed=seed,
+                dtype=dtype,
+                physics_backend=physics_backend,
+                frame_skip=frame_skip,
+                dt=dt,
+                integrator=integrator,
+                collision_mode=collision_mode,
+                history_level=history_level,
+                history_keep_last=history_keep_last,
+                history_every=history_every,
+            )
     return env
@@ -87,12 +87,23 @@ class Agent:
 
         self.policy.train(batch)
 
-    def play(self, steps: int = 40_000) -> None:
+    def play(
+        self,
+        steps: int = 40_000,
+        save_json: bool = True,
+        save_figs: bool = True,
+        save_heatmaps: bool = False,
+    ) -> None:
         """
         Play the environment for a specified number of steps.
         
         @params:
             - steps (int): Number of steps to play
+            - save_json (bool): Save the history when done, see
+            BaseEnv.close()
+            - save_figs (bool): Save the path plots when done
+            - save_heatmaps (bool): Save the heatmaps when done, a fixed
+            number of images for runs with too many episodes to plot
         """
         try:
             self.state, _ = self.env.reset()
@@ -100,9 +111,17 @@ class Agent:
             for _ in range(steps):
                 self.act()
             
-            self.env.close(save_json=True, save_figs=True)
+            self.env.close(
+                save_json=save_json,
+                save_figs=save_figs,
+                save_heatmaps=save_heatmaps,
+            )
             self.policy.dqn.save()
         except (KeyboardInterrupt, pygame.error):
             print("Training interrupted by user.") # noqa: T201
-            self.env.close(save_json=True, save_figs=True)
+            self.env.close(
+                save_json=save_json,
+                save_figs=save_figs,
+                save_heatmaps=save_heatmaps,
+            )
             self.policy.dqn.save()
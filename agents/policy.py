@@ -53,7 +53,8 @@ class Policy:
         @returns:
             - int: Selected action
         """
-        q_values = self.dqn(torch.tensor(state, dtype=torch.float32))
+        # float32 states are used without a copy
+        q_values = self.dqn(torch.as_tensor(state, dtype=torch.float32))
 
         # Decay epsilon after each action selection
         self.decay_epsilon()
@@ -74,10 +75,16 @@ class Policy:
         @params:
             - batch (list[Transition]): Batch of transitions for training
         """
-        states = torch.stack([torch.tensor(t.state, dtype=torch.float32) for t in batch])
+        states = torch.as_tensor(
+            np.stack([t.state for t in batch]),
+            dtype=torch.float32,
+        )
         actions = torch.tensor([t.action for t in batch], dtype=torch.long)
         rewards = torch.tensor([t.reward for t in batch], dtype=torch.float32)
-        next_states = torch.stack([torch.tensor(t.next_state, dtype=torch.float32) for t in batch])
+        next_states = torch.as_tensor(
+            np.stack([t.next_state for t in batch]),
+            dtype=torch.float32,
+        )
         terminated = torch.tensor([bool(t.terminated) for t in batch], dtype=torch.bool)
 
         q_values = self.dqn(states)
@@ -0,0 +1,9 @@
+"""
+Initializer file for benchmarks/ folder.
+
+Each benchmark is a module that can be run from the root of the project,
+e.g.:
+```bash
+uv run python -m benchmarks.airplanes_tick
+```
+"""
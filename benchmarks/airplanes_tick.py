@@ -0,0 +1,104 @@
+"""
+Benchmark for Airplanes.tick.
+
+Measures the time per tick and the memory allocated during a tick, for
+a number of planes. Since all intermediate results are written to
+scratch buffers, the memory allocated per tick should not grow with the
+number of planes.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+import yaml
+
+from simulation.airplanes import Airplanes
+from simulation.entity_store import EntityStore
+
+PLANE_CONFIG = "config/i-16_falangist.yaml"
+N_PLANES = (1, 100, 10_000)
+N_TICKS = 1_000
+
+
+def create_airplanes(n_planes: int, seed: int = 0)-> Airplanes:
+    """
+    Create Airplanes object with copies of the plane in PLANE_CONFIG.
+
+    The spawn pitch of each plane is randomised, so all pieces of the
+    lift curve are used. The planes are kept in an EntityStore, like
+    they are in the simulation.
+
+    @params:
+        - n_planes (int): Number of planes.
+        - seed (int): Seed for randomizer.
+
+    @returns:
+        - Airplanes with n_planes planes.
+    """
+    with open(PLANE_CONFIG, "r") as stream:
+        properties = yaml.safe_load(stream)["properties"]
+
+    scalars = np.array(list(properties.values())[:10], dtype=float)
+    # the extra data is [aoa_degree, entity_type, coll_flag, debug]
+    scalars = np.concatenate((scalars, np.array([0, 0, -1, 0])))
+    vectors = np.array(list(properties.values())[10:14], dtype=float)
+    vectors = np.concatenate((vectors, np.zeros(shape=(6, 2))))
+
+    store = EntityStore((n_planes,))
+    store.scalars[:] = scalars
+    store.vectors[:] = vectors
+    store.pitch[:] = np.random.default_rng(seed).uniform(-30, 30, n_planes)
+    return Airplanes(store.scalars, store.vectors)
+
+
+def benchmark(n_planes: int)-> tuple[float, int]:
+    """
+    Benchmark ticking a number of planes.
+
+    @params:
+        - n_planes (int): Number of planes.
+
+    @returns:
+        - float with the time per tick in microseconds.
+        - int with the peak memory allocated during a tick in bytes.
+    """
+    airplanes = create_airplanes(n_planes)
+    rng = np.random.default_rng(0)
+    actions = np.stack(
+        (np.arange(n_planes), rng.integers(0, 5, n_planes)),
+        axis=1,
+    )
+    dt = 1 / 60
+
+    # warm up
+    airplanes.tick(dt, actions)
+
+    start = time.perf_counter()
+    for _ in range(N_TICKS):
+        airplanes.tick(dt, actions)
+    time_per_tick = (time.perf_counter() - start) / N_TICKS * 1e6
+
+    tracemalloc.start()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    airplanes.tick(dt, actions)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return time_per_tick, peak - current
+
+
+def main()-> None:
+    """Run the benchmark for all numbers of planes and print a table."""
+    print(f"{'planes':>8} {'us/tick':>10} {'us/plane':>10} {'alloc B':>10}")  # noqa: T201
+    for n_planes in N_PLANES:
+        time_per_tick, allocated = benchmark(n_planes)
+        print(  # noqa: T201
+            f"{n_planes:>8} {time_per_tick:>10.1f} "
+            f"{time_per_tick / n_planes:>10.3f} {allocated:>10}",
+        )
+
+
+if __name__ == "__main__":
+    main()
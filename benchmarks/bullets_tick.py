@@ -0,0 +1,81 @@
+"""
+Benchmark for Bullets.tick.
+
+Bullets are not moved, a tick only advances their clock, so its time
+no longer grows with the number of bullets in flight. Measures the time
+per tick of the bullets alone and of all entities, which then computes
+the positions of the alive bullets for the collision check, for a
+vectorized environment whose planes shoot every tick.
+"""
+
+import time
+
+import numpy as np
+
+from environment.vector_env import VectorEnv
+from simulation.numba_backend import NUMBA_AVAILABLE
+
+N_TICKS = 500
+N_WORLDS = (1, 64)
+
+
+def benchmark(physics_backend: str, n_worlds: int)-> tuple[float, float, int]:
+    """
+    Benchmark ticking the bullets and the entities of an environment.
+
+    @params:
+        - physics_backend (str): "numpy" or "numba".
+        - n_worlds (int): Number of worlds.
+
+    @returns:
+        - float with the time per bullet tick in microseconds.
+        - float with the time per entity tick in microseconds.
+        - int with the number of bullet slots in use.
+    """
+    env = VectorEnv(
+        seed=0,
+        num_envs=n_worlds,
+        physics_backend=physics_backend,
+    )
+    entities = env._entities  # noqa: SLF001
+    ids = np.arange(n_worlds) * entities.n_planes
+    shoot = np.stack((ids, np.full(n_worlds, 5)), axis=1)
+    dt = 1 / 60
+
+    # fill the rings, which also compiles the numba kernels
+    for _ in range(int(entities.bullets.scalars.shape[-2])):
+        entities.tick(dt, shoot)
+
+    start = time.perf_counter()
+    for _ in range(N_TICKS):
+        entities.bullets.tick(dt)
+    bullets_time = (time.perf_counter() - start) / N_TICKS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(N_TICKS):
+        entities.tick(dt, shoot)
+    entities_time = (time.perf_counter() - start) / N_TICKS * 1e6
+    return bullets_time, entities_time, entities.bullets.n_slots
+
+
+def main()-> None:
+    """Run the benchmark for all backends and print a table."""
+    backends = ("numpy", "numba") if NUMBA_AVAILABLE else ("numpy",)
+    print(  # noqa: T201
+        f"{'backend':>8} {'worlds':>8} {'slots':>8} "
+        f"{'bullets us':>12} {'entities us':>12}",
+    )
+    for physics_backend in backends:
+        for n_worlds in N_WORLDS:
+            bullets_time, entities_time, n_slots = benchmark(
+                physics_backend,
+                n_worlds,
+            )
+            print(  # noqa: T201
+                f"{physics_backend:>8} {n_worlds:>8} {n_slots:>8} "
+                f"{bullets_time:>12.1f} {entities_time:>12.1f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
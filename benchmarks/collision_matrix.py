@@ -0,0 +1,90 @@
+"""
+Benchmark for the collision matrix of Entities.
+
+Measures the time per collision check with every pair of entity types
+colliding and with the default collision matrix, in which bullets pass
+through each other, for a vectorized environment whose planes shoot
+every tick, which keeps the rings of bullets full. Bullets then make up
+nearly all entities, so the bullet-bullet pairs dominate the check.
+"""
+
+import time
+
+import numpy as np
+
+from environment.vector_env import VectorEnv
+from simulation.entities import DEFAULT_COLLISIONS, ENTITY_TYPES
+from simulation.numba_backend import NUMBA_AVAILABLE
+
+N_CHECKS = 100
+N_WORLDS = (1, 64)
+ALL_COLLISIONS = tuple(
+    (first, second)
+    for i, first in enumerate(ENTITY_TYPES)
+    for second in ENTITY_TYPES[i:]
+)
+
+
+def benchmark(
+    collisions: tuple[tuple[str, str], ...],
+    physics_backend: str,
+    n_worlds: int,
+)-> float:
+    """
+    Benchmark the collision check of the entities of an environment.
+
+    @params:
+        - collisions (tuple[tuple[str, str], ...]): Pairs of entity
+        types that collide.
+        - physics_backend (str): "numpy" or "numba".
+        - n_worlds (int): Number of worlds.
+
+    @returns:
+        - float with the time per collision check in microseconds.
+    """
+    env = VectorEnv(
+        seed=0,
+        num_envs=n_worlds,
+        physics_backend=physics_backend,
+    )
+    env._env_data["collisions"] = collisions  # noqa: SLF001
+    env._create_entities()  # noqa: SLF001
+    entities = env._entities  # noqa: SLF001
+    ids = np.arange(n_worlds) * entities.n_planes
+    shoot = np.stack((ids, np.full(n_worlds, 5)), axis=1)
+    dt = 1 / 60
+
+    # fill the rings, which also compiles the numba kernels
+    for _ in range(int(env._plane_data["bullet_config"]["lifetime"]) + 1):  # noqa: SLF001
+        entities.tick(dt, shoot)
+    state = entities.get_state()
+
+    total = 0.0
+    for _ in range(N_CHECKS):
+        entities.set_state(state)
+        start = time.perf_counter()
+        entities.entity_collision()
+        total += time.perf_counter() - start
+    return total / N_CHECKS * 1e6
+
+
+def main()-> None:
+    """Run the benchmark for both matrices and backends and print a table."""
+    backends = ("numpy", "numba") if NUMBA_AVAILABLE else ("numpy",)
+    print(  # noqa: T201
+        f"{'backend':>8} {'worlds':>8} {'all us':>12} {'default us':>12}",
+    )
+    for physics_backend in backends:
+        for n_worlds in N_WORLDS:
+            times = [
+                benchmark(collisions, physics_backend, n_worlds)
+                for collisions in (ALL_COLLISIONS, DEFAULT_COLLISIONS)
+            ]
+            print(  # noqa: T201
+                f"{physics_backend:>8} {n_worlds:>8}" +
+                "".join(f"{t:>12.1f}" for t in times),
+            )
+
+
+if __name__ == "__main__":
+    main()
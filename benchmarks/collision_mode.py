@@ -0,0 +1,80 @@
+"""
+Benchmark for the collision modes of Entities.
+
+Measures the time per tick of the pairwise and the event collision
+mode, for a single environment and for a vectorized environment whose
+planes shoot every tick, which keeps the rings of bullets full. The
+pairwise mode tests every pair of these bullets every tick, the event
+mode only tests them against the planes.
+"""
+
+import time
+
+import numpy as np
+
+from environment.vector_env import VectorEnv
+from simulation.entities import COLLISION_MODES
+from simulation.numba_backend import NUMBA_AVAILABLE
+
+N_TICKS = 500
+N_WORLDS = (1, 64)
+
+
+def benchmark(
+    collision_mode: str,
+    physics_backend: str,
+    n_worlds: int,
+)-> float:
+    """
+    Benchmark ticking the entities of an environment.
+
+    @params:
+        - collision_mode (str): "pairwise" or "event".
+        - physics_backend (str): "numpy" or "numba".
+        - n_worlds (int): Number of worlds.
+
+    @returns:
+        - float with the time per tick in microseconds.
+    """
+    env = VectorEnv(
+        seed=0,
+        num_envs=n_worlds,
+        physics_backend=physics_backend,
+        collision_mode=collision_mode,
+    )
+    entities = env._entities  # noqa: SLF001
+    ids = np.arange(n_worlds) * entities.n_planes
+    shoot = np.stack((ids, np.full(n_worlds, 5)), axis=1)
+    dt = 1 / 60
+
+    # fill the rings, which also compiles the numba kernels
+    for _ in range(int(entities.bullets.scalars.shape[-2])):
+        entities.tick(dt, shoot)
+
+    start = time.perf_counter()
+    for _ in range(N_TICKS):
+        entities.tick(dt, shoot)
+    return (time.perf_counter() - start) / N_TICKS * 1e6
+
+
+def main()-> None:
+    """Run the benchmark for all modes and backends and print a table."""
+    backends = ("numpy", "numba") if NUMBA_AVAILABLE else ("numpy",)
+    print(  # noqa: T201
+        f"{'backend':>8} {'worlds':>8}" +
+        "".join(f"{mode + ' us':>12}" for mode in COLLISION_MODES),
+    )
+    for physics_backend in backends:
+        for n_worlds in N_WORLDS:
+            times = [
+                benchmark(mode, physics_backend, n_worlds)
+                for mode in COLLISION_MODES
+            ]
+            print(  # noqa: T201
+                f"{physics_backend:>8} {n_worlds:>8}" +
+                "".join(f"{t:>12.1f}" for t in times),
+            )
+
+
+if __name__ == "__main__":
+    main()
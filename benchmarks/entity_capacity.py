@@ -0,0 +1,85 @@
+"""
+Benchmark for the dynamic capacity of the entity store.
+
+Measures the memory of the entity store per world when it is created,
+at its largest during episodes in which the planes shoot, and after a
+reset, next to the memory of the fixed store of 1000 slots per world
+that was allocated before. Also measures the time per step.
+"""
+
+import time
+
+import numpy as np
+
+from environment.vector_env import VectorEnv
+from simulation.entity_store import EntityStore
+
+N_STEPS = 2_000
+N_WORLDS = (1, 64)
+SHOOT_PROBABILITY = (0.05, 0.5)
+FIXED_CAPACITY = 1000
+
+
+def benchmark(
+    n_worlds: int,
+    shoot_probability: float,
+)-> tuple[float, float, float, float]:
+    """
+    Benchmark the entity store of a vectorized environment.
+
+    @params:
+        - n_worlds (int): Number of worlds.
+        - shoot_probability (float): Probability that a plane shoots in
+        a step.
+
+    @returns:
+        - float with the memory per world at the start in kilobytes.
+        - float with the largest memory per world in kilobytes.
+        - float with the memory per world after a reset in kilobytes.
+        - float with the time per step in microseconds.
+    """
+    env = VectorEnv(seed=0, num_envs=n_worlds)
+    rng = np.random.default_rng(0)
+    start_bytes = peak_bytes = env._entities.store.nbytes  # noqa: SLF001
+
+    total = 0.0
+    for _ in range(N_STEPS):
+        actions = np.where(
+            rng.random(n_worlds) < shoot_probability,
+            5,
+            rng.integers(0, 5, n_worlds),
+        )
+        start = time.perf_counter()
+        env.step(actions)
+        total += time.perf_counter() - start
+        peak_bytes = max(peak_bytes, env._entities.store.nbytes)  # noqa: SLF001
+
+    env.reset()
+    reset_bytes = env._entities.store.nbytes  # noqa: SLF001
+    return (
+        start_bytes / n_worlds / 1e3,
+        peak_bytes / n_worlds / 1e3,
+        reset_bytes / n_worlds / 1e3,
+        total / N_STEPS * 1e6,
+    )
+
+
+def main()-> None:
+    """Run the benchmark for all numbers of worlds and print a table."""
+    fixed = EntityStore((1, FIXED_CAPACITY)).nbytes / 1e3
+    print(f"fixed store of {FIXED_CAPACITY} slots: {fixed:.1f} kB per world")  # noqa: T201
+    print(  # noqa: T201
+        f"{'worlds':>8} {'shoot':>6} {'start kB':>10} {'peak kB':>10} "
+        f"{'reset kB':>10} {'us/step':>10}",
+    )
+    for n_worlds in N_WORLDS:
+        for shoot_probability in SHOOT_PROBABILITY:
+            results = benchmark(n_worlds, shoot_probability)
+            print(  # noqa: T201
+                f"{n_worlds:>8} {shoot_probability:>6.2f}" +
+                "".join(f"{r:>11.1f}" for r in results),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Tolerance check for the float32 simulation mode.
+
+Flies the same episodes, with the same seed and random actions, in a
+float64 and a float32 environment and compares their trajectories. The
+float32 mode is within tolerance if, for every episode:
+    - the position and velocity differ at most STATE_TOLERANCE (in
+    pixels and pixels per second) at any step,
+    - the reward differs at most REWARD_TOLERANCE at any step,
+    - the episode ends at the same step, in the same way.
+
+With the default configs the largest deviation is in the order of 1e-3,
+over episodes of roughly 800 steps.
+
+Exits with status 1 if any episode is out of tolerance.
+"""
+
+import sys
+
+import numpy as np
+
+from environment.base_env import BaseEnv
+
+N_EPISODES = 10
+MAX_STEPS = 3_000
+STATE_TOLERANCE = 1e-2
+REWARD_TOLERANCE = 1e-2
+
+
+def compare_episode(seed: int)-> tuple[float, float, bool]:
+    """
+    Fly one episode in float64 and float32 and compare them.
+
+    @params:
+        - seed (int): Seed for the environments and the actions.
+
+    @returns:
+        - float with the largest deviation of position and velocity.
+        - float with the largest deviation of the reward.
+        - bool, True if both episodes ended at the same step, in the
+        same way.
+    """
+    env_64 = BaseEnv(seed=seed, dtype="float64")
+    env_32 = BaseEnv(seed=seed, dtype="float32")
+    rng = np.random.default_rng(seed)
+
+    state_deviation, reward_deviation = 0.0, 0.0
+    for _ in range(MAX_STEPS):
+        action = int(rng.integers(0, 6))
+        state_64, reward_64, terminated_64, truncated_64, _ = env_64.step(action)
+        state_32, reward_32, terminated_32, truncated_32, _ = env_32.step(action)
+
+        state_deviation = max(
+            state_deviation,
+            float(np.max(np.abs(state_64[:4] - state_32[:4]))),
+        )
+        reward_deviation = max(
+            reward_deviation,
+            abs(float(reward_64) - float(reward_32)),
+        )
+
+        done_64 = terminated_64 or truncated_64
+        done_32 = terminated_32 or truncated_32
+        if done_64 or done_32:
+            same_end = bool(
+                terminated_64 == terminated_32 and truncated_64 == truncated_32,
+            )
+            return state_deviation, reward_deviation, same_end
+    return state_deviation, reward_deviation, True
+
+
+def main()-> None:
+    """Compare N_EPISODES episodes and print a table."""
+    within_tolerance = True
+    print(f"{'seed':>6} {'state dev':>12} {'reward dev':>12} {'same end':>9}")  # noqa: T201
+    for seed in range(N_EPISODES):
+        state_deviation, reward_deviation, same_end = compare_episode(seed)
+        print(  # noqa: T201
+            f"{seed:>6} {state_deviation:>12.2e} {reward_deviation:>12.2e} "
+            f"{same_end!s:>9}",
+        )
+        within_tolerance &= state_deviation <= STATE_TOLERANCE and \
+            reward_deviation <= REWARD_TOLERANCE and same_end
+
+    if not within_tolerance:
+        print("float32 is out of tolerance")  # noqa: T201
+        sys.exit(1)
+    print("float32 is within tolerance")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark for the frame skip of BaseEnv.
+
+Measures the number of decisions and simulated ticks per second for a
+range of frame skips, with random actions. Every decision calculates
+one observation and reward, regardless of the frame skip, so the
+simulated ticks per second grow with it until the ticks dominate.
+"""
+
+import time
+
+import numpy as np
+
+from environment.base_env import BaseEnv
+
+FRAME_SKIPS = (1, 2, 4, 8)
+DURATION = 2.0
+
+
+def benchmark(frame_skip: int, physics_backend: str)-> tuple[float, float]:
+    """
+    Benchmark stepping an environment with random actions.
+
+    @params:
+        - frame_skip (int): Number of ticks per decision.
+        - physics_backend (str): "numpy" or "numba".
+
+    @returns:
+        - float with the number of decisions per second.
+        - float with the number of simulated ticks per second.
+    """
+    env = BaseEnv(
+        seed=0,
+        physics_backend=physics_backend,
+        frame_skip=frame_skip,
+    )
+    rng = np.random.default_rng(0)
+    # warm up, which compiles the numba kernels
+    env.step(5)
+
+    n_decisions = 0
+    n_ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        _, _, is_terminated, is_truncated, _ = env.step(int(rng.integers(0, 6)))
+        n_decisions += 1
+        n_ticks += frame_skip
+        if is_terminated or is_truncated:
+            env.reset()
+    duration = time.perf_counter() - start
+    return n_decisions / duration, n_ticks / duration
+
+
+def main()-> None:
+    """Run the benchmark for all frame skips and print a table."""
+    for physics_backend in ("numpy", "numba"):
+        print(f"{physics_backend} backend")  # noqa: T201
+        print(f"{'frame_skip':>12} {'decisions/s':>12} {'ticks/s':>12}")  # noqa: T201
+        for frame_skip in FRAME_SKIPS:
+            decisions, ticks = benchmark(frame_skip, physics_backend)
+            print(f"{frame_skip:>12} {decisions:>12.0f} {ticks:>12.0f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
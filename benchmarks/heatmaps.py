@@ -0,0 +1,89 @@
+"""
+Benchmark for the trajectory heatmaps.
+
+Measures the time of create_heatmaps() per step of the history and the
+number of images it saves, for histories of a growing number of
+episodes. The episodes of a vectorized environment with random actions
+are repeated to make the longer histories. The number of images is
+fixed, unlike the path plots, of which there is one per episode, so
+their cost is spread over more steps and the time per step drops to
+that of reading the history.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from environment.vector_env import VectorEnv
+from utils.create_heatmaps import create_heatmaps
+
+N_WORLDS = 8
+N_STEPS = 2_000
+REPEATS = (1, 10, 100)
+ENV_CONFIG = "config/default_env.yaml"
+
+
+def record_episodes()-> list:
+    """
+    Record the episodes of a vectorized environment.
+
+    @returns:
+        - list with the observations of every non-empty episode.
+    """
+    env = VectorEnv(seed=0, num_envs=N_WORLDS, env_config=ENV_CONFIG)
+    rng = np.random.default_rng(0)
+    for _ in range(N_STEPS):
+        env.step(rng.integers(0, 6, N_WORLDS))
+    env._store_episodes(np.arange(N_WORLDS))  # noqa: SLF001
+    episodes = [
+        observations
+        for _, observations in env._history.items()  # noqa: SLF001
+        if observations
+    ]
+    env.close()
+    return episodes
+
+
+def benchmark(episodes: list, env_data: dict)-> tuple[float, int]:
+    """
+    Benchmark creating the heatmaps of a history.
+
+    @params:
+        - episodes (list): Observations of every episode.
+        - env_data (dict): Environment configuration.
+
+    @returns:
+        - float with the time per step in microseconds.
+        - int with the number of saved images.
+    """
+    history = dict(enumerate(episodes))
+    n_steps = sum(len(observations) for observations in episodes)
+    with tempfile.TemporaryDirectory() as folder_path:
+        start = time.perf_counter()
+        create_heatmaps(folder_path, history, env_data)
+        elapsed = time.perf_counter() - start
+        n_images = len(list(Path(folder_path).iterdir()))
+    return elapsed / n_steps * 1e6, n_images
+
+
+def main()-> None:
+    """Run the benchmark for every history length and print a table."""
+    with Path(ENV_CONFIG).open() as stream:
+        env_data = yaml.safe_load(stream)
+    episodes = record_episodes()
+
+    print(f"{'episodes':>10} {'steps':>10} {'us/step':>10} {'images':>8}")  # noqa: T201
+    for repeats in REPEATS:
+        history = episodes * repeats
+        step, n_images = benchmark(history, env_data)
+        n_steps = sum(len(observations) for observations in history)
+        print(  # noqa: T201
+            f"{len(history):>10} {n_steps:>10} {step:>10.2f} {n_images:>8}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark for the formats of the observation history.
+
+Measures, for the json and the columnar .npy format, the time spent on
+the history while stepping a vectorized environment, the time to
+finalize the history to an output folder, its size on disk and the
+time to load it and read a single episode from it.
+"""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from environment.vector_env import VectorEnv
+from utils.history_columns import ColumnarHistory
+
+N_WORLDS = 16
+N_STEPS = 5_000
+
+
+def folder_size(path: str)-> int:
+    """
+    Size of all files in a folder and its subfolders.
+
+    @params:
+        - path (str): Path to the folder.
+
+    @returns:
+        - int with the size in bytes.
+    """
+    return sum(
+        file.stat().st_size for file in Path(path).rglob("*") if file.is_file()
+    )
+
+
+def benchmark(history_format: str)-> tuple[float, float, float, float]:
+    """
+    Benchmark a history format.
+
+    @params:
+        - history_format (str): "json" or "npy".
+
+    @returns:
+        - float with the time per step in microseconds.
+        - float with the time to finalize the history in seconds.
+        - float with the size of the history in megabytes.
+        - float with the time to load the history and read its middle
+        episode in milliseconds.
+    """
+    env = VectorEnv(seed=0, num_envs=N_WORLDS, history_format=history_format)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(N_STEPS):
+        env.step(rng.integers(0, 6, N_WORLDS))
+    step = (time.perf_counter() - start) / N_STEPS * 1e6
+    # the unfinished episodes are stored as well
+    env._store_episodes(np.arange(N_WORLDS))  # noqa: SLF001
+
+    with tempfile.TemporaryDirectory() as folder_path:
+        start = time.perf_counter()
+        env._history.finalize(folder_path)  # noqa: SLF001
+        finalize = time.perf_counter() - start
+        size = folder_size(folder_path) / 1e6
+
+        start = time.perf_counter()
+        if history_format == "json":
+            path = Path(folder_path) / "_observation_history.json"
+            with path.open() as stream:
+                history = json.load(stream)
+            episode = list(history.values())[len(history) // 2]
+            np.array([observation[0] for observation in episode])
+        else:
+            history = ColumnarHistory(
+                Path(folder_path) / "_observation_history",
+            )
+            np.array(history.episode(len(history) // 2)["x"])
+        load = (time.perf_counter() - start) * 1e3
+        del history
+    return step, finalize, size, load
+
+
+def main()-> None:
+    """Run the benchmark for both formats and print a table."""
+    print(f"{N_WORLDS} worlds, {N_STEPS} steps")  # noqa: T201
+    print(  # noqa: T201
+        f"{'format':>8} {'us/step':>10} {'finalize s':>11} {'MB':>8} "
+        f"{'load ms':>10}",
+    )
+    for history_format in ("json", "npy"):
+        step, finalize, size, load = benchmark(history_format)
+        print(  # noqa: T201
+            f"{history_format:>8} {step:>10.1f} {finalize:>11.3f} {size:>8.2f} "
+            f"{load:>10.2f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark for the history levels and retention policy.
+
+Measures the time per step of a vectorized environment and the memory
+held by Python objects at the end of the run, for every history level
+and for the "full" level with the observations of only the last few or
+every Nth episode kept. The memory includes the episodes that are
+kept in memory by keep_last, but not the spill files on disk, of which
+the size is given as well. The time is measured in a separate run,
+without tracing the memory.
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from environment.vector_env import VectorEnv
+
+N_WORLDS = 8
+N_STEPS = 4_000
+
+# name and keyword arguments of every configuration
+CONFIGS = (
+    ("off", {"history_level": "off"}),
+    ("episode_summary", {"history_level": "episode_summary"}),
+    ("full", {"history_level": "full"}),
+    ("full, every 10th", {"history_level": "full", "history_every": 10}),
+    ("full, last 10", {"history_level": "full", "history_keep_last": 10}),
+)
+
+
+def run(kwargs: dict)-> VectorEnv:
+    """
+    Step a vectorized environment with random actions.
+
+    @params:
+        - kwargs (dict): History arguments of the environment.
+
+    @returns:
+        - VectorEnv after N_STEPS steps.
+    """
+    env = VectorEnv(seed=0, num_envs=N_WORLDS, **kwargs)
+    rng = np.random.default_rng(0)
+    for _ in range(N_STEPS):
+        env.step(rng.integers(0, 6, N_WORLDS))
+    return env
+
+
+def benchmark(kwargs: dict)-> tuple[float, float, float]:
+    """
+    Benchmark a history configuration of a vectorized environment.
+
+    @params:
+        - kwargs (dict): History arguments of the environment.
+
+    @returns:
+        - float with the time per step in microseconds.
+        - float with the traced memory in kilobytes.
+        - float with the size of the spill files in kilobytes.
+    """
+    start = time.perf_counter()
+    run(kwargs).close()
+    step = (time.perf_counter() - start) / N_STEPS * 1e6
+
+    tracemalloc.start()
+    env = run(kwargs)
+    memory = tracemalloc.get_traced_memory()[0] / 1e3
+    tracemalloc.stop()
+
+    history = env._history  # noqa: SLF001
+    history._flush()  # noqa: SLF001
+    directory = Path(history._dir.name)  # noqa: SLF001
+    size = sum(file.stat().st_size for file in directory.iterdir()) / 1e3
+    env.close()
+    return step, memory, size
+
+
+def main()-> None:
+    """Run the benchmark for every configuration and print a table."""
+    print(f"{N_WORLDS} worlds, {N_STEPS} steps")  # noqa: T201
+    print(  # noqa: T201
+        f"{'history':>18} {'us/step':>10} {'memory kB':>10} {'disk kB':>10}",
+    )
+    for name, kwargs in CONFIGS:
+        step, memory, size = benchmark(kwargs)
+        print(  # noqa: T201
+            f"{name:>18} {step:>10.1f} {memory:>10.1f} {size:>10.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
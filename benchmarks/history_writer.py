@@ -0,0 +1,67 @@
+"""
+Benchmark for the streaming history writer.
+
+Measures the time per step of a vectorized environment and the memory
+held by Python objects after a growing number of steps, with the
+history written on the main thread and on a background thread. The
+memory should stay flat however many steps are taken. The times include
+the overhead of tracing the memory.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from environment.vector_env import VectorEnv
+
+N_WORLDS = 8
+N_STEPS = (1_000, 4_000, 16_000)
+
+
+def benchmark(history_thread: bool)-> list[tuple[int, float, float]]:
+    """
+    Benchmark the history of a vectorized environment.
+
+    @params:
+        - history_thread (bool): Write the history on a background
+        thread.
+
+    @returns:
+        - list with, per number of steps in N_STEPS, the number of
+        steps, the time per step in microseconds and the traced memory
+        in kilobytes.
+    """
+    env = VectorEnv(seed=0, num_envs=N_WORLDS, history_thread=history_thread)
+    rng = np.random.default_rng(0)
+    results = []
+    tracemalloc.start()
+    total = 0.0
+    n_steps = 0
+    for target in N_STEPS:
+        while n_steps < target:
+            actions = rng.integers(0, 6, N_WORLDS)
+            start = time.perf_counter()
+            env.step(actions)
+            total += time.perf_counter() - start
+            n_steps += 1
+        memory = tracemalloc.get_traced_memory()[0]
+        results.append((n_steps, total / n_steps * 1e6, memory / 1e3))
+    tracemalloc.stop()
+    env.close()
+    return results
+
+
+def main()-> None:
+    """Run the benchmark with and without a thread and print a table."""
+    print(f"{N_WORLDS} worlds, memory traced by tracemalloc")  # noqa: T201
+    print(f"{'thread':>8} {'steps':>8} {'us/step':>10} {'kB':>10}")  # noqa: T201
+    for history_thread in (False, True):
+        for n_steps, step, memory in benchmark(history_thread):
+            print(  # noqa: T201
+                f"{history_thread!s:>8} {n_steps:>8} {step:>10.1f} {memory:>10.1f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
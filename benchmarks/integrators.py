@@ -0,0 +1,116 @@
+"""
+Benchmark for the integrators of the airplane physics.
+
+Flies the agent through the same manoeuvre, a fixed action per 0.2
+simulated seconds, with every integrator and a range of delta times,
+and compares its positions every 0.2 s with a reference flown with rk4
+at dt = 1/1200. Only the airplane physics are ticked, so the plane never
+crashes. The throughput is measured with full BaseEnv steps and random
+actions, in simulated seconds per second. The first row, euler at dt =
+1/60, is the default of the environment.
+"""
+
+import time
+
+import numpy as np
+
+from environment.base_env import BaseEnv
+
+SAMPLE_INTERVAL = 0.2
+N_SAMPLES = 20
+# per sample interval: 1 pitch up, 2 pitch down, 3 throttle up
+MANOEUVRE = np.random.default_rng(0).choice([0, 1, 2, 3], N_SAMPLES)
+REFERENCE = ("rk4", 1 / 1200)
+SETTINGS = (
+    ("euler", 1 / 60),
+    ("euler", 1 / 120),
+    ("euler", 1 / 30),
+    ("midpoint", 1 / 60),
+    ("midpoint", 1 / 30),
+    ("midpoint", 1 / 20),
+    ("rk4", 1 / 60),
+    ("rk4", 1 / 40),
+    ("rk4", 1 / 30),
+    ("rk4", 1 / 20),
+)
+DURATION = 2.0
+
+
+def fly(integrator: str, dt: float)-> np.ndarray:
+    """
+    Fly the manoeuvre and record the position of the agent.
+
+    @params:
+        - integrator (str): "euler", "midpoint" or "rk4".
+        - dt (float): Delta time, which has to divide SAMPLE_INTERVAL.
+
+    @returns:
+        - np.ndarray with the position every SAMPLE_INTERVAL, shape
+        (N_SAMPLES, 2).
+    """
+    env = BaseEnv(seed=0, dt=dt, integrator=integrator)
+    airplanes = env._entities.airplanes  # noqa: SLF001
+    ticks_per_sample = round(SAMPLE_INTERVAL / dt)
+    positions = np.empty((N_SAMPLES, 2))
+    for sample, action in enumerate(MANOEUVRE):
+        actions = np.array([[0, action]])
+        for _ in range(ticks_per_sample):
+            airplanes.tick(dt, actions)
+        positions[sample] = airplanes.fields.pos[0]
+    return positions
+
+
+def throughput(integrator: str, dt: float, physics_backend: str)-> float:
+    """
+    Measure stepping an environment with random actions.
+
+    The agent does not shoot, as the number of bullets per simulated
+    second would grow with the number of steps.
+
+    @params:
+        - integrator (str): "euler", "midpoint" or "rk4".
+        - dt (float): Delta time.
+        - physics_backend (str): "numpy" or "numba".
+
+    @returns:
+        - float with the number of simulated seconds per second.
+    """
+    env = BaseEnv(
+        seed=0,
+        physics_backend=physics_backend,
+        dt=dt,
+        integrator=integrator,
+    )
+    rng = np.random.default_rng(0)
+    # warm up, which compiles the numba kernels
+    env.step(0)
+
+    n_steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        _, _, is_terminated, is_truncated, _ = env.step(int(rng.integers(0, 5)))
+        n_steps += 1
+        if is_terminated or is_truncated:
+            env.reset()
+    return n_steps * dt / (time.perf_counter() - start)
+
+
+def main()-> None:
+    """Run the benchmark for all settings and print a table."""
+    reference = fly(*REFERENCE)
+    print(  # noqa: T201
+        f"{'integrator':>10} {'dt':>6} {'max error':>10} {'mean error':>11}"
+        f" {'numpy sim s/s':>14} {'numba sim s/s':>14}",
+    )
+    for integrator, dt in SETTINGS:
+        error = np.linalg.norm(fly(integrator, dt) - reference, axis=-1)
+        print(  # noqa: T201
+            f"{integrator:>10} {f'1/{round(1 / dt)}':>6}"
+            f" {error.max():>10.3f} {error.mean():>11.3f}"
+            f" {throughput(integrator, dt, 'numpy'):>14.1f}"
+            f" {throughput(integrator, dt, 'numba'):>14.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
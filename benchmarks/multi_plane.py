@@ -0,0 +1,74 @@
+"""
+Benchmark for the number of planes per world.
+
+Measures the time per step of a multi-plane environment for a growing
+number of planes per world, in which the planes shoot now and then.
+All planes are stepped in the same vectorized calls, so the time per
+plane should drop as the number of planes grows.
+"""
+
+import time
+
+import numpy as np
+
+from environment.multi_plane_env import MultiPlaneEnv
+
+N_STEPS = 1_000
+N_WORLDS = 16
+N_PLANES = (1, 2, 4, 8, 16)
+SHOOT_PROBABILITY = 0.1
+
+
+def benchmark(physics_backend: str, n_planes: int)-> tuple[float, float]:
+    """
+    Benchmark a multi-plane environment.
+
+    @params:
+        - physics_backend (str): "numpy" or "numba".
+        - n_planes (int): Number of planes per world.
+
+    @returns:
+        - float with the time per step in microseconds.
+        - float with the time per step per plane in microseconds.
+    """
+    env = MultiPlaneEnv(
+        seed=0,
+        num_envs=N_WORLDS,
+        n_planes=n_planes,
+        physics_backend=physics_backend,
+    )
+    rng = np.random.default_rng(0)
+    shape = (N_WORLDS, n_planes)
+    # compile the numba backend before timing
+    env.step(np.zeros(shape, dtype=int))
+
+    total = 0.0
+    for _ in range(N_STEPS):
+        actions = np.where(
+            rng.random(shape) < SHOOT_PROBABILITY,
+            5,
+            rng.integers(0, 5, shape),
+        )
+        start = time.perf_counter()
+        env.step(actions)
+        total += time.perf_counter() - start
+    step = total / N_STEPS * 1e6
+    return step, step / (N_WORLDS * n_planes)
+
+
+def main()-> None:
+    """Run the benchmark for all numbers of planes and print a table."""
+    print(f"{N_WORLDS} worlds, {N_STEPS} steps")  # noqa: T201
+    print(  # noqa: T201
+        f"{'backend':>8} {'planes':>7} {'us/step':>10} {'us/plane':>10}",
+    )
+    for physics_backend in ("numpy", "numba"):
+        for n_planes in N_PLANES:
+            step, plane = benchmark(physics_backend, n_planes)
+            print(  # noqa: T201
+                f"{physics_backend:>8} {n_planes:>7} {step:>10.1f} {plane:>10.2f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
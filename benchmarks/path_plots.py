@@ -0,0 +1,128 @@
+"""
+Benchmark for the path plots.
+
+Measures the time per figure of create_path_plots() in a single process
+and with a pool of processes, against drawing every figure from
+scratch with pyplot, which decodes the background and builds the
+figure, axes and colour bar for every episode. The episodes are
+recorded from a vectorized environment with random actions.
+"""
+
+import os
+import tempfile
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import yaml
+from matplotlib.collections import LineCollection
+
+from environment.vector_env import VectorEnv
+from utils.create_path_plots import create_path_plots
+
+N_WORLDS = 8
+N_STEPS = 3_000
+ENV_CONFIG = "config/default_env.yaml"
+
+
+def record_episodes()-> dict:
+    """
+    Record the episodes of a vectorized environment.
+
+    @returns:
+        - dict with the observations per iteration.
+    """
+    env = VectorEnv(seed=0, num_envs=N_WORLDS, env_config=ENV_CONFIG)
+    rng = np.random.default_rng(0)
+    for _ in range(N_STEPS):
+        env.step(rng.integers(0, 6, N_WORLDS))
+    env._store_episodes(np.arange(N_WORLDS))  # noqa: SLF001
+    episodes = dict(env._history.items())  # noqa: SLF001
+    env.close()
+    return episodes
+
+
+def plot_from_scratch(folder_path: str, episodes: dict, env_data: dict)-> None:
+    """
+    Draw every figure from scratch with pyplot.
+
+    @params:
+        - folder_path (str): Path to output folder.
+        - episodes (dict): Observations per iteration.
+        - env_data (dict): Environment configuration.
+    """
+    for iteration, observations in episodes.items():
+        states = np.array([state for state, *_ in observations])
+        rewards = np.array([reward for _, reward, *_ in observations])
+        fig, ax = plt.subplots()
+        points = states[:, :2].reshape(-1, 1, 2)
+        lc = LineCollection(
+            np.concatenate([points[:-1], points[1:]], axis=1),
+            cmap=plt.get_cmap("RdYlGn"),
+            norm=plt.Normalize(rewards.min(), rewards.max()),
+        )
+        lc.set_array(rewards)
+        ax.add_collection(lc)
+        ax.set_xlim(0, env_data["window_dimensions"][0])
+        ax.set_ylim(0, env_data["window_dimensions"][1])
+        ax.invert_yaxis()
+        plt.colorbar(lc, ax=ax).set_label("Reward")
+        ax.set_title(f"Flight path for iteration {iteration}.")
+        ax.imshow(plt.imread(env_data["background"]["sprite"]))
+        plt.savefig(f"{folder_path}/flight_path_it-{iteration}")
+        plt.close(fig)
+
+
+def benchmark(episodes: dict, env_data: dict, n_workers: int|None)-> float:
+    """
+    Benchmark drawing the path plots.
+
+    @params:
+        - episodes (dict): Observations per iteration.
+        - env_data (dict): Environment configuration.
+        - n_workers (int): Number of processes of create_path_plots().
+        If None, the figures are drawn from scratch.
+
+    @returns:
+        - float with the time per figure in milliseconds.
+    """
+    with tempfile.TemporaryDirectory() as folder_path:
+        start = time.perf_counter()
+        if n_workers is None:
+            plot_from_scratch(folder_path, episodes, env_data)
+        else:
+            create_path_plots(
+                folder_path,
+                episodes,
+                env_data,
+                n_workers=n_workers,
+                progress=False,
+            )
+        return (time.perf_counter() - start) / len(episodes) * 1e3
+
+
+def main()-> None:
+    """Run the benchmark for every way of plotting and print a table."""
+    with open(ENV_CONFIG, "r") as stream:
+        env_data = yaml.safe_load(stream)
+    episodes = {
+        iteration: observations
+        for iteration, observations in record_episodes().items()
+        if observations
+    }
+    n_cpus = os.cpu_count() or 1
+
+    print(f"{len(episodes)} episodes, {n_cpus} cpus")  # noqa: T201
+    print(f"{'plots':>16} {'ms/figure':>10}")  # noqa: T201
+    for name, n_workers in (
+        ("from scratch", None),
+        ("1 worker", 1),
+        (f"{max(n_cpus, 2)} workers", max(n_cpus, 2)),
+    ):
+        print(  # noqa: T201
+            f"{name:>16} {benchmark(episodes, env_data, n_workers):>10.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
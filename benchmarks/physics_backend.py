@@ -0,0 +1,71 @@
+"""
+Benchmark for the physics backends of Entities.tick.
+
+Measures the time per tick of the numpy and numba backends for the
+production shape, a single environment with one plane, one target and
+a handful of bullets, and for a vectorized environment. The first tick
+is not measured, so numba's compile time is left out.
+"""
+
+import time
+
+import numpy as np
+
+from environment.base_env import BaseEnv
+from environment.vector_env import VectorEnv
+from simulation.numba_backend import NUMBA_AVAILABLE
+
+N_TICKS = 5_000
+N_WORLDS = (1, 64)
+# shoot every SHOOT_INTERVAL ticks, which keeps a handful of bullets alive
+SHOOT_INTERVAL = 10
+
+
+def benchmark(physics_backend: str, n_worlds: int)-> float:
+    """
+    Benchmark ticking the entities of an environment.
+
+    @params:
+        - physics_backend (str): "numpy" or "numba".
+        - n_worlds (int): Number of worlds, 1 uses a BaseEnv.
+
+    @returns:
+        - float with the time per tick in microseconds.
+    """
+    if n_worlds == 1:
+        env = BaseEnv(seed=0, physics_backend=physics_backend)
+    else:
+        env = VectorEnv(
+            seed=0,
+            num_envs=n_worlds,
+            physics_backend=physics_backend,
+        )
+    entities = env._entities  # noqa: SLF001
+    ids = np.arange(n_worlds) * entities.n_planes
+    do_nothing = np.stack((ids, np.zeros(n_worlds, dtype=int)), axis=1)
+    shoot = np.stack((ids, np.full(n_worlds, 5)), axis=1)
+    dt = 1 / 60
+
+    # warm up, which compiles the numba kernels
+    entities.tick(dt, shoot)
+
+    start = time.perf_counter()
+    for i in range(N_TICKS):
+        entities.tick(dt, shoot if i % SHOOT_INTERVAL == 0 else do_nothing)
+    return (time.perf_counter() - start) / N_TICKS * 1e6
+
+
+def main()-> None:
+    """Run the benchmark for both backends and print a table."""
+    if not NUMBA_AVAILABLE:
+        print("numba is not installed, only the numpy backend is measured")  # noqa: T201
+    backends = ("numpy", "numba") if NUMBA_AVAILABLE else ("numpy",)
+
+    print(f"{'worlds':>8}" + "".join(f"{b + ' us':>12}" for b in backends))  # noqa: T201
+    for n_worlds in N_WORLDS:
+        times = [benchmark(backend, n_worlds) for backend in backends]
+        print(f"{n_worlds:>8}" + "".join(f"{t:>12.1f}" for t in times))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark for BaseEnv.reset.
+
+Compares the latency of the in-place reset, which respawns the agent
+and targets into the existing entities, with recreating the entities,
+which is what reset used to do. Every reset follows a short episode in
+which bullets are shot, so there are bullets to clear.
+"""
+
+import time
+
+import numpy as np
+
+from environment.base_env import BaseEnv
+
+N_RESETS = 2_000
+EPISODE_LENGTH = 20
+
+
+def benchmark(in_place: bool)-> float:
+    """
+    Benchmark resetting an environment.
+
+    @params:
+        - in_place (bool): Use the in-place reset, or recreate the
+        entities.
+
+    @returns:
+        - float with the time per reset in microseconds.
+    """
+    env = BaseEnv(seed=0)
+    rng = np.random.default_rng(0)
+    total = 0.0
+    for _ in range(N_RESETS):
+        for action in rng.integers(0, 6, EPISODE_LENGTH):
+            env.step(int(action))
+
+        start = time.perf_counter()
+        if in_place:
+            env.reset()
+        else:
+            env._create_entities()  # noqa: SLF001
+        total += time.perf_counter() - start
+    return total / N_RESETS * 1e6
+
+
+def main()-> None:
+    """Run the benchmark for both resets and print a table."""
+    print(f"{'reset':>12} {'us/reset':>10}")  # noqa: T201
+    print(f"{'recreate':>12} {benchmark(in_place=False):>10.1f}")  # noqa: T201
+    print(f"{'in place':>12} {benchmark(in_place=True):>10.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark for BaseEnv.get_state and BaseEnv.set_state.
+
+Measures the latency of taking and restoring a snapshot mid-episode,
+with bullets in flight, and the number of short branches per second
+that a planner can evaluate by restoring the same snapshot.
+"""
+
+import time
+
+import numpy as np
+
+from environment.base_env import BaseEnv
+
+N_REPEATS = 5_000
+# length of every branch in the branching benchmark
+BRANCH_LENGTH = 10
+
+
+def main()-> None:
+    """Run the benchmark and print a table."""
+    env = BaseEnv(seed=0)
+    rng = np.random.default_rng(0)
+    for action in rng.integers(0, 6, 50):
+        env.step(int(action))
+
+    start = time.perf_counter()
+    for _ in range(N_REPEATS):
+        state = env.get_state()
+    get_time = (time.perf_counter() - start) / N_REPEATS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(N_REPEATS):
+        env.set_state(state)
+    set_time = (time.perf_counter() - start) / N_REPEATS * 1e6
+
+    branches = rng.integers(0, 6, (N_REPEATS // BRANCH_LENGTH, BRANCH_LENGTH))
+    start = time.perf_counter()
+    for branch in branches:
+        env.set_state(state)
+        for action in branch:
+            env.step(int(action))
+    branch_rate = len(branches) / (time.perf_counter() - start)
+
+    print(f"{'get_state us':>16} {get_time:>10.1f}")  # noqa: T201
+    print(f"{'set_state us':>16} {set_time:>10.1f}")  # noqa: T201
+    print(f"{'branches/s':>16} {branch_rate:>10.0f}")  # noqa: T201
+    print(f"{'branch length':>16} {BRANCH_LENGTH:>10}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
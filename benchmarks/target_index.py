@@ -0,0 +1,96 @@
+"""
+Benchmark for the target index of Entities.
+
+Measures the time of the collision check and of the reward, which
+looks up the nearest alive target, for a growing number of targets
+scattered over the window. Above DENSE_THRESHOLD targets both use the
+target index, which is only rebuilt when the targets are respawned.
+"""
+
+import tempfile
+import time
+
+import numpy as np
+import yaml
+
+from environment.vector_env import VectorEnv
+from simulation.target_index import DENSE_THRESHOLD
+
+N_REPEATS = 50
+N_WORLDS = (1, 16)
+N_TARGETS = (1, DENSE_THRESHOLD, 200, 900)
+
+
+def target_config(n_targets: int, path: str)-> None:
+    """
+    Write a target yaml file with targets scattered over the window.
+
+    @params:
+        - n_targets (int): Number of targets.
+        - path (str): Path of the yaml file.
+    """
+    rng = np.random.default_rng(0)
+    config = {
+        f"target{i}": {
+            "sprite": "assets/target.png",
+            "size": [40, 40],
+            "position": [int(rng.integers(40, 1240)), int(rng.integers(40, 680))],
+            "max_spawn_position_deviation": 0,
+            "coll_radius": 20,
+        }
+        for i in range(n_targets)
+    }
+    with open(path, "w") as stream:
+        yaml.safe_dump(config, stream)
+
+
+def benchmark(n_targets: int, n_worlds: int)-> tuple[float, float]:
+    """
+    Benchmark the collision check and the reward of an environment.
+
+    @params:
+        - n_targets (int): Number of targets per world.
+        - n_worlds (int): Number of worlds.
+
+    @returns:
+        - float with the time per collision check in microseconds.
+        - float with the time per reward in microseconds.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".yaml") as config:
+        target_config(n_targets, config.name)
+        env = VectorEnv(seed=0, num_envs=n_worlds, target_config=config.name)
+    entities = env._entities  # noqa: SLF001
+    state = env._calculate_state()  # noqa: SLF001
+    snapshot = entities.get_state()
+
+    total = 0.0
+    for _ in range(N_REPEATS):
+        entities.set_state(snapshot)
+        start = time.perf_counter()
+        entities.entity_collision()
+        total += time.perf_counter() - start
+    collision_time = total / N_REPEATS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(N_REPEATS):
+        env._calculate_reward(state)  # noqa: SLF001
+    reward_time = (time.perf_counter() - start) / N_REPEATS * 1e6
+    return collision_time, reward_time
+
+
+def main()-> None:
+    """Run the benchmark for all numbers of targets and print a table."""
+    print(  # noqa: T201
+        f"{'targets':>8} {'worlds':>8} {'collide us':>12} {'reward us':>12}",
+    )
+    for n_targets in N_TARGETS:
+        for n_worlds in N_WORLDS:
+            collision_time, reward_time = benchmark(n_targets, n_worlds)
+            print(  # noqa: T201
+                f"{n_targets:>8} {n_worlds:>8} "
+                f"{collision_time:>12.1f} {reward_time:>12.1f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,9 @@ Minimal viable yaml file looks like (_'s are placeholders for data):
 ```yaml
 window_dimensions : [_, _]
 ```
+
+The optional collisions list holds the pairs of entity types that
+collide, see simulation.entities.DEFAULT_COLLISIONS for the default.
 """
 
 ENVIRONMENT_TEMPLATE = {
@@ -36,4 +39,17 @@ ENVIRONMENT_TEMPLATE = {
             },
         },
     },
+    "collisions" : {
+        "required" : False,
+        "type" : "array",
+        "items" : {
+            "type" : "array",
+            "minlength" : 2,
+            "maxlength" : 2,
+            "items" : {
+                "type" : "string",
+                "enum" : ["plane", "target", "bullet"],
+            },
+        },
+    },
 }
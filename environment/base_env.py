@@ -1,22 +1,21 @@
-import datetime  # noqa: D100
-import json
+import copy  # noqa: D100
+import datetime
 import os
+from pathlib import Path
 
 import numpy as np
 import yaml
 from jsonschema import ValidationError, validate
 
 import config.validation_templates as templates
-from simulation.entities import Entities
+from environment.simulation_state import SimulationState
+from simulation.entities import DEFAULT_COLLISIONS, Entities
+from simulation.entity_store import Action, EntityType, Scalar, Vector
+from utils.create_heatmaps import create_heatmaps
 from utils.create_path_plots import create_path_plots
-from utils.numpy_encoder import NumpyEncoder
+from utils.episode_summaries import summarize
+from utils.history_writer import HistoryWriter
 
-# Define the maximum number of entities that can spawn at the same time.
-# Dead bullet entities will not count towards the maximum. Meaning the
-# chances of going beyond this limit are very slim.
-# !!! CAUTION !!!:
-#   Increasing this number may have significant impact on runtime!
-MAX_ENTITIES = 1000
 
 class BaseEnv:
     """
@@ -39,9 +38,16 @@ class BaseEnv:
     + close(
         save_json: bool=False,
         save_figs: bool=False,
-        figs_stride: int=1
+        figs_stride: int=1,
+        save_heatmaps: bool=False
       )-> None
         Closes the environment and thereby outputs its entire history.
+    + get_state()-> SimulationState
+        Takes a snapshot of the full state of the environment.
+    + set_state(state: SimulationState)-> None
+        Restores the environment to a snapshot.
+    + clone()-> BaseEnv
+        Copies the environment, the copy continues independently.
     """
     
     def __init__(
@@ -50,6 +56,19 @@ class BaseEnv:
         env_config: str="config/default_env.yaml",
         target_config: str="config/default_target.yaml",
         seed: int|None = None,
+        *,
+        dtype: str = "float64",
+        physics_backend: str = "numpy",
+        frame_skip: int = 1,
+        dt: float = 1 / 60,
+        integrator: str = "euler",
+        collision_mode: str = "pairwise",
+        history_chunk_size: int = 1000,
+        history_thread: bool = False,
+        history_format: str = "json",
+        history_level: str = "full",
+        history_keep_last: int|None = None,
+        history_every: int = 1,
     )-> None:
         """
         Initialize the BaseEnv class.
@@ -63,66 +82,139 @@ class BaseEnv:
             configuration. See config/default_target.yaml for more
             info.
             - seed (int): Seed for randomizer. If None, no seed is used.
+            - dtype (str): Precision of the simulation, "float64" or
+            "float32". The states and rewards have the same precision.
+            See benchmarks/float32_tolerance.py for the deviation of
+            float32 from float64.
+            - physics_backend (str): "numpy" or "numba". The numba
+            backend compiles the physics into loops, which is faster
+            for a single environment. Falls back to "numpy" if numba is
+            not installed.
+            - frame_skip (int): Number of ticks every action is applied
+            for, see self.step().
+            - dt (float): Simulated seconds per tick. Larger ticks need
+            a higher order integrator to stay accurate. The lifetime of
+            bullets is given in ticks, so it scales with dt.
+            - integrator (str): Integrator of the airplane physics,
+            "euler", "midpoint" or "rk4". See
+            benchmarks/integrators.py for their accuracy per dt.
+            - collision_mode (str): "pairwise" or "event". The event
+            mode predicts when bullets hit targets as they are shot, so
+            fast bullets can not pass through small targets at a large
+            dt. See Entities.
+            - history_chunk_size (int): Number of steps of finished
+            episodes that are kept in memory before they are written to
+            disk, see HistoryWriter.
+            - history_thread (bool): Write the history on a background
+            thread.
+            - history_format (str): "json" or "npy", the format the
+            history is saved in by self.close(). "npy" saves a .npy file
+            per field, see ColumnarHistory.
+            - history_level (str): "off", "episode_summary" or "full".
+            "off" records no history at all, "episode_summary" only
+            the length, return, hits and outcome of every episode and
+            "full" every observation as well.
+            - history_keep_last (int): Only keep the observations of
+            the last K episodes, in memory. If None, all are kept.
+            - history_every (int): Only keep the observations of every
+            Nth episode. The summaries of all episodes are kept.
         """
+        if dtype not in ("float64", "float32"):
+            raise ValueError("`dtype` must be 'float64' or 'float32'.")
+        if frame_skip < 1:
+            raise ValueError("`frame_skip` must be at least 1.")
+        self._dtype = np.dtype(dtype)
+        self._physics_backend = physics_backend
+        self._frame_skip = frame_skip
+        self._integrator = integrator
+        self._collision_mode = collision_mode
+
         # Initialize random number generators
         self._target_rng = np.random.default_rng(seed)
         self._plane_rng = np.random.default_rng(seed)
 
-        # for saving the observation history, used in self.close()
+        # for saving the observation history, used in self.close(),
+        # finished episodes are streamed to disk
         self._current_iteration = 0
-        self._observation_history = {self._current_iteration : []}
+        self._history_level = history_level
+        self._history = HistoryWriter(
+            history_chunk_size,
+            thread=history_thread,
+            history_format=history_format,
+            level=history_level,
+            keep_last=history_keep_last,
+            every=history_every,
+        )
+        # the current episode, its observations are only kept at the
+        # "full" history level
+        self._episode = []
+        self._episode_length = 0
+        self._episode_return = 0.0
+        self._last_observation = None
 
         # delta with which to update the environment each tick
-        self._dt = 1 / 60
+        self._dt = dt
         
         # validate all of the provided config files
-        with open(plane_config, "r") as stream:
-            self._plane_data = yaml.safe_load(stream)
-        try:
-            validate(self._plane_data, templates.PLANE_TEMPLATE)
-        except ValidationError as e:
-            print(  # noqa: T201
-                f"A validation error occurred in the plane data: {e.message}",
-            )
-
-        with open(env_config, "r") as stream:
-            self._env_data = yaml.safe_load(stream)
-        try:
-            validate(self._env_data, templates.ENVIRONMENT_TEMPLATE)
-        except ValidationError as e:
-            print(  # noqa: T201
-                f"A validation error occurred in the env data: {e.message}",
-            )
+        self._plane_data = self._load_config(
+            plane_config, templates.PLANE_TEMPLATE, "plane",
+        )
+        self._env_data = self._load_config(
+            env_config, templates.ENVIRONMENT_TEMPLATE, "env",
+        )
+        self._target_data = self._load_config(
+            target_config, templates.TARGET_TEMPLATE, "target",
+        )
 
-        with open(target_config, "r") as stream:
-            self._target_data = yaml.safe_load(stream)
-        try:
-            validate(self._target_data, templates.TARGET_TEMPLATE)
-        except ValidationError as e:
-            print(  # noqa: T201
-                f"A validation error occurred in the target data: {e.message}",
-            )
+        # the planes and targets are derived from the config once, every
+        # spawn copies and randomises these templates
+        plane_scalars, plane_vectors = self._create_planes()
+        target_scalars, target_vectors = self._create_targets()
+        self._n_planes = plane_scalars.shape[0]
+        self._spawn_scalars = np.concatenate((plane_scalars, target_scalars))
+        self._spawn_vectors = np.concatenate((plane_vectors, target_vectors))
 
         # reserve memory for necessary member objects
         self._entities = None
         
         self._create_entities()
 
+    @staticmethod
+    def _load_config(path: str, template: dict, name: str)-> dict:
+        """
+        Load a yaml config file and validate it.
+
+        A config that does not match its template is still used, the
+        validation error is only printed.
+
+        @params:
+            - path (str): Path to the yaml file.
+            - template (dict): Validation template of the config, see
+            config/validation_templates.
+            - name (str): Name of the config in the error message, e.g.
+            "plane".
+
+        @returns:
+            - dict with the config.
+        """
+        with Path(path).open() as stream:
+            data = yaml.safe_load(stream)
+        try:
+            validate(data, template)
+        except ValidationError as e:
+            print(  # noqa: T201
+                f"A validation error occurred in the {name} data: {e.message}",
+            )
+        return data
+
     def _create_entities(self)-> None:
         """
         Create plane and target entities.
 
-        Uses self._create_agent() and self._create_target() to do this.
-        Combines scalars of these two objects into two big matrices,
-        which it uses to create an Entities object.
+        Uses self._spawn() to create the scalars and vectors of all
+        entities, which it uses to create an Entities object.
         """
-        agent_scalars, agent_vectors = self._create_agent()
-        agent_scalars = agent_scalars.reshape((1,) + agent_scalars.shape)
-        agent_vectors = agent_vectors.reshape((1,) + agent_vectors.shape)
-        target_scalars, target_vectors = self._create_targets()
-        
-        scalars = np.concatenate((agent_scalars, target_scalars))
-        vectors = np.concatenate((agent_vectors, target_vectors))
+        scalars, vectors = self._spawn()
 
         window_dimensions = self._env_data["window_dimensions"]
         boundaries = np.array(
@@ -135,68 +227,157 @@ class BaseEnv:
         self._entities = Entities(
             scalars=scalars,
             vectors=vectors,
-            n_entities=MAX_ENTITIES,
+            n_entities=None,
             boundaries=boundaries,
             plane_data=self._plane_data,
+            dtype=self._dtype,
+            physics_backend=self._physics_backend,
+            integrator=self._integrator,
+            collision_mode=self._collision_mode,
+            collisions=tuple(
+                tuple(pair)
+                for pair in self._env_data.get("collisions", DEFAULT_COLLISIONS)
+            ),
         )
 
-    def _create_agent(self)-> tuple[np.ndarray, np.ndarray]:
+    def _spawn(self)-> tuple[np.ndarray, np.ndarray]:
         """
-        Create agent object for self.
+        Spawn plane and target entities.
+
+        Copies the spawn templates of the planes and targets and
+        randomises them, using self._randomise_planes() and
+        self._randomise_targets().
 
-        Use plane data to create Plane object.
+        @returns:
+            - tuple with numpy arrays containing scalars and vectors
+        """
+        scalars = self._spawn_scalars.copy()
+        vectors = self._spawn_vectors.copy()
+        self._randomise_planes(
+            scalars[:self._n_planes],
+            vectors[:self._n_planes],
+        )
+        self._randomise_targets(vectors[self._n_planes:])
+        return scalars, vectors
+
+    def _create_planes(self)-> tuple[np.ndarray, np.ndarray]:
+        """
+        Create spawn templates of the planes of a world.
+
+        This environment has a single plane, the agent, see
+        self._create_agent().
+
+        @returns:
+            - tuple with numpy arrays containing scalars and vectors,
+            each with a leading plane axis.
+        """
+        scalars, vectors = self._create_agent()
+        return scalars[np.newaxis], vectors[np.newaxis]
+
+    def _randomise_planes(self, scalars: np.ndarray, vectors: np.ndarray)-> None:
+        """
+        Randomise the spawns of the planes of a world in place.
+
+        @params:
+            - scalars (np.ndarray): Scalars of the planes.
+            - vectors (np.ndarray): Vectors of the planes.
+        """
+        self._randomise_agent(scalars[0], vectors[0])
+
+    def _create_agent(
+        self,
+        plane_data: dict|None = None,
+    )-> tuple[np.ndarray, np.ndarray]:
+        """
+        Create spawn template of the agent.
+
+        Use plane data to create Plane object, without any of the
+        randomisation of its spawn.
+
+        @params:
+            - plane_data (dict): Plane configuration to use. If None,
+            the plane configuration of the environment is used.
         
         @returns:
             - tuple with numpy arrays containing scalars and vectors
         """
-        scalars = np.array(list(self._plane_data["properties"].values())[:10])
+        if plane_data is None:
+            plane_data = self._plane_data
+        scalars = np.array(
+            list(plane_data["properties"].values())[:10],
+            dtype=self._dtype,
+        )
+        # the extra data is [aoa_degree, entity_type, coll_flag, debug]
+        scalars = np.concatenate(
+            (scalars, np.array([0, EntityType.PLANE, -1, 0], dtype=self._dtype)),
+        )
+
+        vectors = np.array(
+            list(plane_data["properties"].values())[10:14],
+            dtype=self._dtype,
+        )
+        # the extra data is
+        # v_uv, f_gravity, f_engine, f_drag, f_lift, pitch_uv
+        vectors = np.concatenate(
+            (vectors, np.zeros(shape=(6,2), dtype=self._dtype)),
+        )
+
+        return scalars, vectors
+
+    def _randomise_agent(
+        self,
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        plane_data: dict|None = None,
+    )-> None:
+        """
+        Randomise the spawn pitch and location of the agent in place.
+
+        @params:
+            - scalars (np.ndarray): Scalars of the agent.
+            - vectors (np.ndarray): Vectors of the agent.
+            - plane_data (dict): Plane configuration to use. If None,
+            the plane configuration of the environment is used.
+        """
+        if plane_data is None:
+            plane_data = self._plane_data
         # randomise spawn pitch based on config
-        if self._plane_data["properties"]["max_spawn_pitch_deviation"] > 0:
+        if plane_data["properties"]["max_spawn_pitch_deviation"] > 0:
             pitch_deviation = self._plane_rng.integers(
-                low=-self._plane_data["properties"][
+                low=-plane_data["properties"][
                     "max_spawn_pitch_deviation"
                 ],
-                high=self._plane_data["properties"][
+                high=plane_data["properties"][
                     "max_spawn_pitch_deviation"
                 ],
             )
-            scalars[8] += pitch_deviation
+            scalars[Scalar.PITCH] += pitch_deviation
 
-        # the extra data is [aoa_degree, entity_type, coll_flag, debug]
-        scalars = np.concatenate((scalars, np.array([0, 0, -1, 0])))
-
-        vectors = np.array(
-            list(self._plane_data["properties"].values())[10:14],
-        )
         # randomise spawn locations based on config
-        if self._plane_data["properties"]["max_spawn_position_deviation"] > 0:
-            vectors[3] += self._plane_rng.integers(
-                low=-self._plane_data["properties"][
+        if plane_data["properties"]["max_spawn_position_deviation"] > 0:
+            vectors[Vector.POS] += self._plane_rng.integers(
+                low=-plane_data["properties"][
                     "max_spawn_position_deviation"
                 ],
-                high=self._plane_data["properties"][
+                high=plane_data["properties"][
                     "max_spawn_position_deviation"
                 ],
                 size=2,
             )
         # update the velocity based on the new pitch
-        if self._plane_data["properties"]["max_spawn_pitch_deviation"] > 0:
+        if plane_data["properties"]["max_spawn_pitch_deviation"] > 0:
             pitch_angle_rad = np.radians(pitch_deviation)
-            vectors[2] = np.linalg.norm(vectors[2]) * np.array([
+            vectors[Vector.V] = np.linalg.norm(vectors[Vector.V]) * np.array([
                 np.cos(pitch_angle_rad),
                 np.sin(pitch_angle_rad),
             ])
-        # the extra data is
-        # v_uv, f_gravity, f_engine, f_drag, f_lift, pitch_uv
-        vectors = np.concatenate((vectors, np.zeros(shape=(6,2), dtype=float)))
-
-        return scalars, vectors
 
     def _create_targets(self)-> tuple[np.ndarray, np.ndarray]:
         """
-        Create target object(s) for self.
+        Create spawn templates of the target(s).
 
-        Use target data to create Target object.
+        Use target data to create Target object, without any of the
+        randomisation of its spawn.
 
         @returns:
             - tuple with numpy arrays containing scalars and vectors
@@ -204,25 +385,36 @@ class BaseEnv:
         # each key in the target data is equal to a new target,
         # the validation template guarantees this
         n_targets = len(self._target_data)
-        scalars = np.zeros(shape=(n_targets, 14))
-        vectors = np.zeros(shape=(n_targets, 10, 2))
+        scalars = np.zeros(shape=(n_targets, len(Scalar)), dtype=self._dtype)
+        vectors = np.zeros(shape=(n_targets, len(Vector), 2), dtype=self._dtype)
 
         for i, target_key in enumerate(list(self._target_data.keys())):
             # set coll radius from template
-            scalars[i, 9] = self._target_data[target_key]["coll_radius"]
+            scalars[i, Scalar.COLL_RADIUS] = \
+                self._target_data[target_key]["coll_radius"]
             # set entity type flag to target
-            scalars[i, 11] = 1
+            scalars[i, Scalar.ENTITY_TYPE] = EntityType.TARGET
             # set collision flag to alive
-            scalars[i, 12] = -1
+            scalars[i, Scalar.COLL_FLAG] = -1
 
             # set position from template
-            vectors[i, 3] = np.array(self._target_data[target_key]["position"])
-            
+            vectors[i, Vector.POS] = \
+                np.array(self._target_data[target_key]["position"])
+        return scalars, vectors
+
+    def _randomise_targets(self, vectors: np.ndarray)-> None:
+        """
+        Randomise the spawn locations of the target(s) in place.
+
+        @params:
+            - vectors (np.ndarray): Vectors of the target(s).
+        """
+        for i, target_key in enumerate(list(self._target_data.keys())):
             # randomise spawn location based on config
             if self._target_data[target_key][
                 "max_spawn_position_deviation"
             ] > 0:
-                vectors[i, 3] += self._target_rng.integers(
+                vectors[i, Vector.POS] += self._target_rng.integers(
                     low=-self._target_data[target_key][
                         "max_spawn_position_deviation"
                     ],
@@ -231,9 +423,8 @@ class BaseEnv:
                     ],
                     size=2,
                 )
-        return scalars, vectors
 
-    def _calculate_reward(self, state: np.ndarray)-> float:
+    def _calculate_reward(self, state: np.ndarray)-> np.ndarray:
         """
         Reward function for environment.
 
@@ -245,6 +436,11 @@ class BaseEnv:
         the number of remaining targets, as to punish the agent less the
         more targets it has shot.
 
+        The closest alive target is looked up in the target index of
+        the entities, see TargetIndex.nearest(). A leading world axis
+        gives a reward per world, and a plane axis after it a reward
+        per plane.
+
         NOTE: function does not check for validity of state parameter
 
         @params:
@@ -255,40 +451,50 @@ class BaseEnv:
                 * velocity_x (float): velocity of plane in x direction
                 * velocity_y (float): velocity of plane in y direction
                 * n_targets (int): number of targets remaining
+            optionally with a leading world axis and a plane axis.
         
         @returns:
-            - float with reward.
+            - np.ndarray with reward, per world and plane if state has
+            these axes.
         """
-        # find closest target for reward
-        closest_target_distance = float("inf")
-        i_closest_target = None
-        for i, (target_scalars, target_vectors) in enumerate(
-            zip(self._entities.targets.scalars, self._entities.targets.vectors),
-        ):
-            if target_scalars[12] == -1:
-                distance = np.linalg.norm(target_vectors[3] - state[:2])
-                if distance < closest_target_distance:
-                    closest_target_distance = distance
-                    i_closest_target = i
-
-        if i_closest_target is not None:
-            direction_to_target = self._entities.targets.vectors[
-                i_closest_target,
-                3,
-            ] - state[:2]
-                
-            unit_vector_to_target = direction_to_target / \
-                np.linalg.norm(direction_to_target)
-
-            velocity = state[2:4]
-            unit_vector_agent = velocity / np.linalg.norm(velocity)
-
-            return -100 * np.linalg.norm(
-                unit_vector_agent - unit_vector_to_target,
-            ) * state[4]
+        targets = self._entities.targets.fields
+
+        # find closest alive target for reward, the first target if no
+        # target is alive
+        position = state[..., :2].reshape(-1, 2)
+        n_targets = targets.coll_flag.shape[-1]
+        target_pos = targets.pos.reshape(-1, n_targets, 2)
+        # every world has the same number of planes in the state
+        worlds = np.repeat(
+            np.arange(target_pos.shape[0]),
+            position.shape[0] // target_pos.shape[0],
+        )
+        closest = np.maximum(
+            self._entities.target_index.nearest(
+                worlds,
+                position[:, 0],
+                position[:, 1],
+            ),
+            0,
+        )
+        direction_to_target = (target_pos[worlds, closest] - position).reshape(
+            np.shape(state[..., :2]),
+        )
+        unit_vector_to_target = direction_to_target / np.hypot(
+            direction_to_target[..., 0],
+            direction_to_target[..., 1],
+        )[..., None]
+
+        velocity = state[..., 2:4]
+        unit_vector_agent = velocity / \
+            np.hypot(velocity[..., 0], velocity[..., 1])[..., None]
+
+        difference = unit_vector_agent - unit_vector_to_target
+        reward = -100 * np.hypot(difference[..., 0], difference[..., 1]) * \
+            state[..., 4]
         # for the last state, if agent succeeded we dont need to
         # calculate any distance, reward should be zero
-        return 0
+        return np.where(state[..., 4] > 0, reward, 0)
     
     def _check_if_terminated(self)-> bool:
         """
@@ -300,7 +506,7 @@ class BaseEnv:
         @returns:
             - boolean; True if terminal, False if not
         """
-        return np.all(self._entities.targets.scalars[:, 12] != -1)
+        return ~np.any(self._entities.targets.alive, axis=-1)
     
     def _check_if_truncated(self)-> bool:
         """
@@ -312,10 +518,38 @@ class BaseEnv:
         @returns:
             - boolean; True if truncated, False if not
         """
-        return np.all(self._entities.airplanes.scalars[:, 12] != -1)
+        return ~np.any(self._entities.airplanes.alive, axis=-1)
+
+    def _calculate_state(self)-> np.ndarray:
+        """
+        Calculate state of current conditions.
+
+        State contains:
+            * x (float): x position of plane
+            * y (float): y position of plane
+            * velocity_x (float): velocity of plane in x direction
+            * velocity_y (float): velocity of plane in y direction
+            * n_targets (int): number of targets remaining
+
+        @returns:
+            - np.ndarray with state, with a leading world axis if the
+            entities have one.
+        """
+        pos = self._entities.airplanes.fields.pos[..., 0, :]
+        v = self._entities.airplanes.fields.v[..., 0, :]
+        n_remaining_targets = np.count_nonzero(
+            self._entities.targets.alive,
+            axis=-1,
+        )
+        return np.concatenate(
+            (pos, v, n_remaining_targets[..., None]),
+            axis=-1,
+            dtype=self._dtype,
+        )
 
     def _calculate_observation(
             self,
+            n_ticks: int|np.ndarray=1,
         )-> tuple[np.ndarray, float, bool, bool, dict]:
         """
         Calculate observation of current conditions.
@@ -327,7 +561,7 @@ class BaseEnv:
                 * velocity_x (float): velocity of plane in x direction
                 * velocity_y (float): velocity of plane in y direction
                 * n_targets (int): number of targets remaining
-            - reward (see self._calculate_reward())
+            - reward (see self._calculate_reward()) for every tick,
                 terminal states are rewarded a bonus,
                 whilst truncated states are punished.
             - is_terminal (see self._check_if_terminal)
@@ -335,6 +569,12 @@ class BaseEnv:
             - info, made for compatibility with Gym environment,
             but is always empty.
 
+        @params:
+            - n_ticks (int|np.ndarray): Number of ticks since the
+            previous observation, per world and plane if the reward has
+            these axes. The reward of the current conditions is counted
+            for each of them.
+
         @returns:
             - np.ndarray with state
             - float with reward
@@ -342,22 +582,16 @@ class BaseEnv:
             - bool with is_truncated
             - dict with info (always empty)
         """
-        pos = self._entities.airplanes.vectors[0, 3]
-        v = self._entities.airplanes.vectors[0, 2]
-        n_remaining_targets = np.count_nonzero(self._entities.targets.scalars[:, 12] == -1)
-        state = np.concatenate(
-            (pos, v, np.array(n_remaining_targets)),
-            axis=None,
-        )
+        state = self._calculate_state()
         
         is_terminated = self._check_if_terminated()
         is_truncated = self._check_if_truncated()
         reward = self._calculate_reward(state)
         
-        if is_terminated:
-            reward += 200
-        if is_truncated:
-            reward -= 100
+        # written without branches, so it also holds for world axes
+        reward = self._dtype.type(
+            reward * n_ticks + 200.0 * is_terminated - 100.0 * is_truncated,
+        )
 
         return(state, reward, is_terminated, is_truncated, {})
 
@@ -370,6 +604,81 @@ class BaseEnv:
         """
         raise NotImplementedError("As this class has no gui, this is not implemented.")
 
+    def _predict_hits(self)-> tuple[np.ndarray, np.ndarray]:
+        """
+        Predict if the bullets that were just shot will hit a target.
+
+        Every bullet is followed in a straight line for its remaining
+        lifetime, which is tested against the circles of all alive
+        targets of its world at once. The first target along the line
+        has its debug flag set, so it is not rewarded twice. Bullets
+        shot in the same tick are judged independently.
+
+        @returns:
+            - np.ndarray with the world of each bullet.
+            - np.ndarray with the reward bonus per bullet, 50 if it
+            will hit, -5 if it misses.
+        """
+        bullets = self._entities.bullets
+        worlds, slots = bullets.spawned()
+        n_slots = bullets.fields.spawn_tick.shape[-1]
+        # the bullets were spawned this tick, so they are still at their
+        # spawn positions
+        bullet_pos = bullets.fields.spawn_pos.reshape(-1, n_slots, 2)[worlds, slots]
+        bullet_v = bullets.fields.v.reshape(-1, n_slots, 2)[worlds, slots]
+        # calculate remaining bullet lifespan in ticks
+        remaining_bullet_lifetime = self._plane_data["bullet_config"] \
+            ["lifetime"] - bullets.age(
+                bullets.fields.spawn_tick.reshape(-1, n_slots)[worlds, slots],
+            )
+        # simulate bullet path using dt, ticks and velocity, as a unit
+        # vector and a length, one per bullet
+        speed = np.hypot(bullet_v[:, 0], bullet_v[:, 1])
+        bullet_line_length = speed * self._dt * remaining_bullet_lifetime
+        direction_x = (bullet_v[:, 0] / speed)[:, None]
+        direction_y = (bullet_v[:, 1] / speed)[:, None]
+
+        # the targets of the world of each bullet, one row per bullet
+        # and one column per target
+        targets = self._entities.targets.fields
+        n_targets = targets.coll_flag.shape[-1]
+        target_pos = targets.pos.reshape(-1, n_targets, 2)[worlds]
+        to_target_x = target_pos[..., 0] - bullet_pos[:, 0, None]
+        to_target_y = target_pos[..., 1] - bullet_pos[:, 1, None]
+        # effective radius also takes bullet radius into acount
+        effective_radius = targets.coll_radius.reshape(-1, n_targets)[worlds] + \
+            bullets.fields.coll_radius.reshape(-1, n_slots)[worlds, slots, None]
+
+        # closest point on the trajectory
+        projection_length = to_target_x * direction_x
+        projection_length += to_target_y * direction_y
+        np.maximum(projection_length, 0, out=projection_length)
+        np.minimum(
+            projection_length,
+            bullet_line_length[:, None],
+            out=projection_length,
+        )
+        distance_to_center = np.hypot(
+            to_target_x - projection_length * direction_x,
+            to_target_y - projection_length * direction_y,
+        )
+
+        # only alive targets that have not been aimed at yet count, the
+        # first one along the trajectory is hit
+        hit = (
+            self._entities.targets.alive.reshape(-1, n_targets)[worlds] &
+            (targets.debug.reshape(-1, n_targets)[worlds] == 0) &
+            (distance_to_center <= effective_radius)
+        )
+        is_hit = np.any(hit, axis=-1)
+        if np.any(is_hit):
+            first_hit = np.argmin(
+                np.where(hit[is_hit], projection_length[is_hit], np.inf),
+                axis=-1,
+            )
+            targets.debug.reshape(-1, n_targets)[worlds[is_hit], first_hit] = 1
+        return worlds, np.where(is_hit, 50, -5)
+
     def step(self, action: int)-> np.ndarray:
         """
         Step function for environment.
@@ -380,6 +689,12 @@ class BaseEnv:
         reward will be altered with a bonus of 50. If it misses, there
         will be a punishment of -5 reward.
 
+        With a frame skip of k, the action is applied for k ticks, or
+        until the episode ends, before the observation is calculated.
+        A bullet is only shot in the first of these ticks. The reward
+        of the final conditions is counted once per tick, the bonuses
+        are given once.
+
         @params:
             - action (int): one of:
                 * 0: do nothing
@@ -394,79 +709,79 @@ class BaseEnv:
         """
         actions = np.array([[0, action]])
         self._entities.tick(self._dt, actions)
-        
+
+        # if the action was shoot, predict the bonus right after the
+        # bullet is spawned
+        if action == Action.SHOOT:
+            _, shot_bonus = self._predict_hits()
+            actions[0, 1] = 0
+
+        n_ticks = 1
+        while n_ticks < self._frame_skip and not (
+            self._check_if_terminated() or self._check_if_truncated()
+        ):
+            self._entities.tick(self._dt, actions)
+            n_ticks += 1
+
         # calculate observation in current conditions
-        observation = self._calculate_observation()
+        observation = self._calculate_observation(n_ticks)
         
         # if the action was shoot, alter the reward accordingly
-        if action == 5:
-            # first bullet is most recent one shot
-            bullet_scalars = self._entities.bullets.scalars[0]
-            bullet_vectors = self._entities.bullets.vectors[0]
-            # calculate remaining bullet lifespan in ticks
-            remaining_bullet_lifetime = self._plane_data["bullet_config"] \
-                ["lifetime"] - bullet_scalars[2]
-            # simulate bullet destination using dt, ticks and velocity
-            bullet_destination = bullet_vectors[3] + bullet_vectors[2] * \
-                self._dt * remaining_bullet_lifetime
-
-            direction_vector_bullet = bullet_destination - bullet_vectors[3]
-            bullet_line_length = np.linalg.norm(direction_vector_bullet)
-            norm_direction_vector_bullet = \
-                direction_vector_bullet / bullet_line_length
-
-            # get all alive targets
-            target_indices = np.where(
-                (self._entities.targets.scalars[:, 12] == -1) &
-                (self._entities.targets.scalars[:, 13] == 0),
-            )[0]
-            target_positions = self._entities.targets.vectors[
-                target_indices,
-                3,
-            ]
-            target_radii = self._entities.targets.scalars[target_indices, 9]
-
-            # for each target, see if bullet will hit.
-            for i, (target_pos, target_rad) in enumerate(
-                zip(target_positions, target_radii),
-            ):
-                # effective radius also takes bullet radius into acount
-                effective_radius = bullet_scalars[9] + target_rad
-
-                bullet_start_to_target = target_pos - bullet_vectors[3]
-                projection_length = np.dot(
-                    bullet_start_to_target,
-                    norm_direction_vector_bullet,
-                )
-                # closest point on the trajectory
-                closest_point = bullet_vectors[3] + \
-                    norm_direction_vector_bullet * \
-                    np.clip(projection_length, 0, bullet_line_length)
-                distance_to_center = np.linalg.norm(target_pos- closest_point)
-
-                # if bullet will hit, set debug of target and return
-                # positively altered reward
-                if distance_to_center <= effective_radius:
-                    self._entities.targets.scalars[i, 13] = 1
-                    # Create modified observation with increased reward
-                    state, reward, is_terminal, is_truncated, info = observation
-                    observation = (state, reward + 50, is_terminal, is_truncated, info)
-                    break
-            else:
-                # if bullet does not hit, give small punishment
-                state, reward, is_terminal, is_truncated, info = observation
-                observation = (state, reward - 5, is_terminal, is_truncated, info)
-
-        self._observation_history[self._current_iteration].append(observation)
+        if action == Action.SHOOT:
+            state, reward, is_terminal, is_truncated, info = observation
+            observation = (
+                state, reward + shot_bonus[0], is_terminal, is_truncated, info,
+            )
+
+        self._record(observation)
 
         return observation
 
+    def _record(self, observation: tuple)-> None:
+        """
+        Record an observation in the current episode.
+
+        Only the summary of the episode is updated, unless the history
+        level is "full". Nothing is recorded at the "off" level.
+
+        @params:
+            - observation (tuple): Observation of the step.
+        """
+        if self._history_level == "off":
+            return
+        state, reward, is_terminated, is_truncated, _ = observation
+        self._episode_length += 1
+        self._episode_return += reward
+        self._last_observation = (state, is_terminated, is_truncated)
+        if self._history_level == "full":
+            self._episode.append(observation)
+
+    def _finish_episode(self)-> None:
+        """Add the current episode to the history and start a new one."""
+        if self._history_level != "off":
+            self._history.add(
+                self._current_iteration,
+                summarize(
+                    self._episode_length,
+                    self._episode_return,
+                    self._last_observation,
+                    len(self._target_data),
+                ),
+                self._episode,
+            )
+        self._current_iteration += 1
+        self._episode = []
+        self._episode_length = 0
+        self._episode_return = 0.0
+        self._last_observation = None
+
     def reset(self, seed: int|None = None)-> tuple[np.ndarray, dict]:
         """
         Reset environment.
 
-        Will create completely new entities.
-        Adds new page to the history dictionary.
+        Respawns the agent and targets in place and removes all
+        bullets, the entities are not recreated.
+        Adds the finished episode to the history.
         Returns initial state & info.
 
         @params:
@@ -482,58 +797,172 @@ class BaseEnv:
         if seed is not None:
             self._plane_rng = np.random.default_rng(seed)
             self._target_rng = np.random.default_rng(seed)
-        self._create_entities()
+        scalars, vectors = self._spawn()
+        self._entities.respawn(scalars, vectors)
 
-        self._current_iteration += 1
-        self._observation_history[self._current_iteration] = []
-
-        # the agent's current coordinates are defined by the centre of
-        # its rect
-        pos = self._entities.airplanes.vectors[0, 3]
-        v = self._entities.airplanes.vectors[0, 2]
-        n_remaining_targets = len(self._entities.targets.scalars) - \
-            np.sum(self._entities.targets.scalars[:, 12])
-        return np.concatenate(
-            (pos, v, np.array(n_remaining_targets)), axis=None,
-        ), {}
+        self._finish_episode()
+
+        return self._calculate_state(), {}
 
     def close(
         self,
         save_json: bool=False,
         save_figs: bool=False,
         figs_stride: int=1,
+        save_heatmaps: bool=False,
     )-> None:
         """
         Close environment and output history.
 
+        The unfinished episode is added to the history, after which the
+        history is finalized, see HistoryWriter. Below the "full"
+        history level there are no observations to plot, and at the
+        "off" level there is nothing to save at all.
+
         Will create a folder indicated by the current date and time,
         provided save == True in which resides:
-            - a json file with the entire observation history.
+            - a json file with the entire observation history, or a
+            folder with its .npy columns, see history_format.
+            - a json or .npy file with the summary of every episode.
             - an image per iteration, which displays the flown path of
             the agent, along with the reward (indicated by the colour).
+            - a fixed number of heatmaps, which display the visits and
+            mean reward per part of the window over all iterations and
+            over windows of consecutive iterations. Unlike the images
+            per iteration, their number does not grow with the length
+            of the run, see create_heatmaps().
         
         @params:
-            - save_json (bool): Save json or not.
+            - save_json (bool): Save the history or not.
             - save_figs (bool): Save the plots or not.
             - figs_stride (int): Stride for saving the figures.
+            - save_heatmaps (bool): Save the heatmaps or not.
         """
+        if self._episode_length:
+            self._finish_episode()
+        save_json = save_json and self._history_level != "off"
+        save_figs = save_figs and self._history_level == "full"
+        save_heatmaps = save_heatmaps and self._history_level == "full"
+
         # prepare the output folder
-        if save_json or save_figs:
+        if save_json or save_figs or save_heatmaps:
             folder_path = f"output/{datetime.datetime.now().strftime('%d-%m-%Y_%Hu%M')}"
             os.mkdir(folder_path)
 
-        # write all the observations to a json file
+        # write all the observations to the output folder
         if save_json:
-            with open(
-                f"{folder_path}/_observation_history.json", "w",
-            ) as outfile:
-                json.dump(self._observation_history, outfile, cls=NumpyEncoder)
+            self._history.finalize(folder_path)
 
         # create all the graphs and save them to the `folder_path`
         if save_figs:
             create_path_plots(
                 folder_path,
-                self._observation_history,
+                self._history,
                 self._env_data,
                 figs_stride,
             )
+
+        # aggregate all the paths into heatmaps
+        if save_heatmaps:
+            create_heatmaps(folder_path, self._history, self._env_data)
+
+        self._history.close()
+
+    def _get_history_state(self)-> tuple:
+        """
+        History of the current episode, for a snapshot.
+
+        @returns:
+            - tuple with a copy of the observations of the current
+            iteration, its summary so far and the number of finished
+            episodes.
+        """
+        return (
+            list(self._episode),
+            self._episode_length,
+            self._episode_return,
+            self._last_observation,
+            self._history.n_episodes,
+        )
+
+    def _set_history_state(self, history: tuple)-> None:
+        """
+        Restore the history of the current episode from a snapshot.
+
+        @params:
+            - history (tuple): History, as returned by
+            self._get_history_state().
+        """
+        observations, self._episode_length, self._episode_return, \
+            self._last_observation, n_episodes = history
+        self._history.discard(n_episodes)
+        self._episode = list(observations)
+
+    def get_state(self)-> SimulationState:
+        """
+        Take a snapshot of the full state of the environment.
+
+        The snapshot holds copies of the entities that are in use, the
+        bullet counters, the states of the random number generators and
+        the history of the current episode, so stepping or resetting
+        the environment afterwards does not change it.
+
+        @returns:
+            - SimulationState with the snapshot.
+        """
+        return SimulationState(
+            entities=self._entities.get_state(),
+            plane_rng=self._plane_rng.bit_generator.state,
+            target_rng=self._target_rng.bit_generator.state,
+            iteration=self._current_iteration,
+            history=self._get_history_state(),
+        )
+
+    def set_state(self, state: SimulationState)-> None:
+        """
+        Restore the environment to a snapshot.
+
+        All buffers are overwritten in place, so restoring is a copy of
+        the used entities. Afterwards the environment continues exactly
+        as it did after the snapshot was taken. The history is rewound
+        as well, episodes that were finished after the snapshot are
+        removed from it.
+
+        @params:
+            - state (SimulationState): Snapshot, as returned by
+            self.get_state().
+        """
+        self._entities.set_state(state.entities)
+        self._plane_rng.bit_generator.state = state.plane_rng
+        self._target_rng.bit_generator.state = state.target_rng
+
+        self._current_iteration = state.iteration
+        self._set_history_state(state.history)
+
+    def _detach(self)-> None:
+        """
+        Give a shallow copy of the environment its own mutable state.
+
+        The configs are shared, the entities are recreated and the
+        random number generators and history are copied.
+        """
+        self._plane_rng = copy.deepcopy(self._plane_rng)
+        self._target_rng = copy.deepcopy(self._target_rng)
+        self._history = self._history.copy()
+        self._create_entities()
+
+    def clone(self)-> "BaseEnv":
+        """
+        Copy the environment.
+
+        The copy continues exactly like this environment would, but
+        independently of it. A copy of a rendering environment renders
+        to the same window.
+
+        @returns:
+            - BaseEnv, of the same class as self, with the copy.
+        """
+        clone = copy.copy(self)
+        clone._detach()  # noqa: SLF001
+        clone.set_state(self.get_state())
+        return clone
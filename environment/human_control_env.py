@@ -9,6 +9,7 @@ import numpy as np
 import pygame
 
 from environment.human_rendering_env import HumanRenderingEnv
+from simulation.entity_store import Action
 
 
 class HumanControlEnv(HumanRenderingEnv):
@@ -33,7 +34,8 @@ class HumanControlEnv(HumanRenderingEnv):
     + close(
         save_json: bool=False,
         save_figs: bool=False,
-        figs_stride: int=1
+        figs_stride: int=1,
+        save_heatmaps: bool=False
       )-> None
         Closes the environment and thereby outputs its entire history.
     """
@@ -53,23 +55,23 @@ class HumanControlEnv(HumanRenderingEnv):
         """
         # provided action argument is ignored as this instance should
         # be controlled manually
-        action = 0
+        action = Action.NOTHING
 
         keys = pygame.key.get_pressed()
         # up = pitch up
         if keys[pygame.K_UP]:
-            action = 1
+            action = Action.PITCH_UP
         # down = pitch down
         elif keys[pygame.K_DOWN]:
-            action = 2
+            action = Action.PITCH_DOWN
         # right = increase throttle
         elif keys[pygame.K_RIGHT]:
-            action = 3
+            action = Action.THROTTLE_UP
         # left = decrease throttle
         elif keys[pygame.K_LEFT]:
-            action = 4
+            action = Action.THROTTLE_DOWN
         # space = shoot a bullet
         elif keys[pygame.K_SPACE]:
-            action = 5
+            action = Action.SHOOT
 
         return super().step(action=action)
@@ -34,7 +34,8 @@ class HumanRenderingEnv(BaseEnv):
     + close(
         save_json: bool=False,
         save_figs: bool=False,
-        figs_stride: int=1
+        figs_stride: int=1,
+        save_heatmaps: bool=False
       )-> None
         Closes the environment and thereby outputs its entire history.
     """
@@ -45,6 +46,13 @@ class HumanRenderingEnv(BaseEnv):
         env_config: str="config/default_env.yaml",
         target_config: str="config/default_target.yaml",
         seed: int|None = None,
+        *,
+        dtype: str = "float64",
+        physics_backend: str = "numpy",
+        frame_skip: int = 1,
+        dt: float = 1 / 60,
+        integrator: str = "euler",
+        collision_mode: str = "pairwise",
     )-> None:
         """
         Initialize HumanRenderingEnv class.
@@ -58,6 +66,15 @@ class HumanRenderingEnv(BaseEnv):
             configuration. See config/default_target.yaml for more
             info.
             - seed (int): seed for randomizer. If None, no seed is used.
+            - dtype (str): Precision of the simulation, "float64" or
+            "float32", see BaseEnv.
+            - physics_backend (str): "numpy" or "numba", see BaseEnv.
+            - frame_skip (int): Number of ticks every action is applied
+            for, see BaseEnv. Only the last tick is rendered.
+            - dt (float): Simulated seconds per tick, see BaseEnv.
+            - integrator (str): "euler", "midpoint" or "rk4", see
+            BaseEnv.
+            - collision_mode (str): "pairwise" or "event", see BaseEnv.
         """
         # place pygame window in top left of monitor(s)
         os.environ["SDL_VIDEO_WINDOW_POS"] = f"{0},{30}"
@@ -71,6 +88,12 @@ class HumanRenderingEnv(BaseEnv):
             env_config=env_config,
             target_config=target_config,
             seed=seed,
+            dtype=dtype,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            dt=dt,
+            integrator=integrator,
+            collision_mode=collision_mode,
         )
 
         # sprite data is not mandatory in config,
@@ -131,20 +154,18 @@ class HumanRenderingEnv(BaseEnv):
         This function draws the background, targets, bullets, and planes to the screen.
         """
         # gather all rotation instructions for bullets and save to tuple
-        alive_bullets = self._entities.bullets.vectors[(
-            (self._entities.bullets.scalars[:, 12] == -1) &
-            (self._entities.bullets.scalars[:, 11] != -1)
-        )]
+        bullets = self._entities.bullets.fields
+        alive = self._entities.bullets.alive
+        bullet_v = bullets.v[alive]
+        bullet_pos = self._entities.bullets.positions(np.nonzero(alive))
 
         rotate_instructions = (
-            np.degrees(
-                np.arctan2(alive_bullets[:, 2, 0], alive_bullets[:, 2, 1]),
-            ) + 270
+            np.degrees(np.arctan2(bullet_v[:, 0], bullet_v[:, 1])) + 270
         ) % 360
 
         blit_data_bullets = []
-        for bullet_vectors, rotate_instruction in zip(
-            alive_bullets,
+        for position, rotate_instruction in zip(
+            bullet_pos,
             rotate_instructions,
             strict=True,
         ):
@@ -154,22 +175,17 @@ class HumanRenderingEnv(BaseEnv):
             )
             # use coordinates as center for sprite
             bullet_rect = rotated_sprite.get_rect()
-            bullet_rect.center = bullet_vectors[3]
+            bullet_rect.center = position.tolist()
             blit_data_bullets.append((rotated_sprite, bullet_rect.topleft))
 
         # gather all rotation instructions for planes and save to tuple
-        alive_airplanes = self._entities.airplanes.vectors[
-            (self._entities.airplanes.scalars[:, 12] == -1)
-        ]
-
-        rotate_instructions = self._entities.airplanes.scalars[
-            (self._entities.airplanes.scalars[:, 12] == -1)
-        ][:, 8]
+        airplanes = self._entities.airplanes.fields
+        alive = self._entities.airplanes.alive
 
         blit_data_planes = []
-        for airplane_vectors, rotate_instruction in zip(
-            alive_airplanes,
-            rotate_instructions,
+        for airplane_pos, rotate_instruction in zip(
+            airplanes.pos[alive],
+            airplanes.pitch[alive],
             strict=True,
         ):
             rotated_sprite = pygame.transform.rotate(
@@ -178,15 +194,16 @@ class HumanRenderingEnv(BaseEnv):
             )
             # use coordinates as center for sprite
             plane_rect = rotated_sprite.get_rect()
-            plane_rect.center = airplane_vectors[3]
+            plane_rect.center = airplane_pos.tolist()
             blit_data_planes.append((rotated_sprite, plane_rect.topleft))
 
         # put target sprite(s) position in center
         blit_data_targets = []
         for i, target_sprite in enumerate(self._target_sprites):
-            if self._entities.targets.scalars[i, 12] == -1:
+            if self._entities.targets.alive[i]:
                 target_rect = target_sprite.get_rect()
-                target_rect.center = self._entities.targets.vectors[i, 3]
+                target_rect.center = \
+                    self._entities.targets.fields.pos[i].tolist()
                 blit_data_targets.append((target_sprite, target_rect.topleft))
 
         # blit all objects in order of background, target, bullet, plane
@@ -243,7 +260,7 @@ class HumanRenderingEnv(BaseEnv):
         Reset environment.
 
         Will create completely new entities.
-        Adds new page to the history dictionary
+        Adds the finished episode to the history
         return initial state & info. Renders the initial frame
 
         @params:
@@ -267,6 +284,7 @@ class HumanRenderingEnv(BaseEnv):
         save_json: bool=False,
         save_figs: bool=False,
         figs_stride: int=1,
+        save_heatmaps: bool=False,
     )-> None:
         """
         Close environment and output history.
@@ -281,6 +299,7 @@ class HumanRenderingEnv(BaseEnv):
             - save_json (bool): Save json or not.
             - save_figs (bool): Save the plots or not.
             - figs_stride (int): Stride for saving the figures.
+            - save_heatmaps (bool): Save the heatmaps or not.
         """
         pygame.display.quit()
         pygame.quit()
@@ -288,4 +307,5 @@ class HumanRenderingEnv(BaseEnv):
             save_json=save_json,
             save_figs=save_figs,
             figs_stride=figs_stride,
+            save_heatmaps=save_heatmaps,
         )
@@ -0,0 +1,363 @@
+"""
+Multi-plane environment module for Target Terminator.
+
+This module provides the MultiPlaneEnv class, a vectorized environment
+with a number of planes, the agents, in every world. All planes of all
+worlds share one Entities object, so the physics, collisions and
+shooting of every plane are a single set of vectorized calls per tick,
+regardless of the number of planes.
+"""
+
+import numpy as np
+
+import config.validation_templates as templates
+from environment.vector_env import VectorEnv
+from simulation.entity_store import Vector
+
+
+class MultiPlaneEnv(VectorEnv):
+    """
+    Multi-plane environment class.
+
+    This class instantiates a number of independent worlds, excluding a
+    GUI, each with the same planes and target(s), as stated in the
+    provided config files. Every plane gets its own action, observation
+    and reward, stacked along a plane axis after the world axis.
+
+    Planes shoot each other as well as the targets. A plane that has
+    crashed or was shot does nothing until its world is reset, which
+    happens once all of its targets or all of its planes are dead.
+
+    All bullets use the bullet configuration of the first plane config.
+
+    This class has no public member variables.
+
+    @public methods:
+    + step(actions: np.ndarray)-> tuple[
+        np.ndarray,
+        np.ndarray,
+        np.ndarray,
+        np.ndarray,
+        dict,
+      ]
+        Takes a step in all worlds. This means that every plane will be
+        updated based on its action and that the worlds will react
+        accordingly.
+    + reset(seed: int=None, mask: np.ndarray=None)-> tuple[
+        np.ndarray,
+        dict,
+      ]
+        Resets the worlds given a seed, see VectorEnv.
+    + close(
+        save_json: bool=False,
+        save_figs: bool=False,
+        figs_stride: int=1,
+        save_heatmaps: bool=False
+      )-> None
+        Closes the environment and thereby outputs its entire history.
+    + get_state()-> SimulationState
+        Takes a snapshot of the full state of all worlds, see BaseEnv.
+    + set_state(state: SimulationState)-> None
+        Restores all worlds to a snapshot, see BaseEnv.
+    + clone()-> MultiPlaneEnv
+        Copies the environment, see BaseEnv.
+    """
+
+    def __init__(
+        self,
+        plane_config: str|list[str]="config/i-16_falangist.yaml",
+        env_config: str="config/default_env.yaml",
+        target_config: str="config/default_target.yaml",
+        seed: int|None = None,
+        *,
+        num_envs: int = 1,
+        n_planes: int|None = None,
+        plane_spacing: float|None = None,
+        autoreset: bool = True,
+        dtype: str = "float64",
+        physics_backend: str = "numpy",
+        frame_skip: int = 1,
+        dt: float = 1 / 60,
+        integrator: str = "euler",
+        collision_mode: str = "pairwise",
+        history_chunk_size: int = 1000,
+        history_thread: bool = False,
+        history_format: str = "json",
+        history_level: str = "full",
+        history_keep_last: int|None = None,
+        history_every: int = 1,
+    )-> None:
+        """
+        Initialize the MultiPlaneEnv class.
+
+        @params:
+            - plane_config (str|list[str]): Path to yaml file with plane
+            configuration, or a list with one path per plane. See
+            config/i-16_falangist.yaml for more info.
+            - env_config (str): Path to yaml file with environment
+            configuration. See config/default_env.yaml for more info.
+            - target_config (str): Path to yaml file with target
+            configuration. See config/default_target.yaml for more
+            info.
+            - seed (int): Seed for randomizer. If None, no seed is used.
+            - num_envs (int): Number of worlds to simulate at once.
+            - n_planes (int): Number of planes per world. If None, there
+            is one plane per plane config. A single plane config is
+            used for every plane.
+            - plane_spacing (float): Distance in pixels along the y axis
+            between the spawn positions of consecutive planes, the
+            planes are centered around the spawn positions in their
+            configs. If None, the spacing is large enough for planes
+            with the same spawn position to never collide as they
+            spawn.
+            - autoreset (bool): Reset worlds as soon as they are
+            finished, see VectorEnv.
+            - dtype (str): Precision of the simulation, "float64" or
+            "float32", see BaseEnv.
+            - physics_backend (str): "numpy" or "numba", see BaseEnv.
+            - frame_skip (int): Number of ticks every action is applied
+            for, see VectorEnv.step().
+            - dt (float): Simulated seconds per tick, see BaseEnv.
+            - integrator (str): "euler", "midpoint" or "rk4", see
+            BaseEnv.
+            - collision_mode (str): "pairwise" or "event", see BaseEnv.
+            - history_chunk_size (int): Number of steps of finished
+            episodes that are kept in memory, see BaseEnv.
+            - history_thread (bool): Write the history on a background
+            thread, see BaseEnv.
+            - history_format (str): "json" or "npy", see BaseEnv.
+            - history_level (str): "off", "episode_summary" or "full",
+            see BaseEnv.
+            - history_keep_last (int): Only keep the observations of
+            the last K episodes, see BaseEnv.
+            - history_every (int): Only keep the observations of every
+            Nth episode, see BaseEnv.
+        """
+        plane_configs = [plane_config] if isinstance(plane_config, str) \
+            else list(plane_config)
+        if n_planes is None:
+            n_planes = len(plane_configs)
+        if len(plane_configs) == 1:
+            plane_configs *= n_planes
+        if n_planes < 1 or len(plane_configs) != n_planes:
+            raise ValueError(
+                "`n_planes` must be at least 1 and match the number of "
+                "plane configs.",
+            )
+
+        # the configs have to be loaded before the base class is
+        # initialized, as it creates the planes from them
+        self._plane_configs = [
+            self._load_config(path, templates.PLANE_TEMPLATE, "plane")
+            for path in plane_configs
+        ]
+
+        if plane_spacing is None:
+            plane_spacing = 1 + 2 * max(
+                plane_data["properties"]["collision_radius"] +
+                plane_data["properties"]["max_spawn_position_deviation"]
+                for plane_data in self._plane_configs
+            )
+        self._plane_spacing = plane_spacing
+
+        super().__init__(
+            plane_config=plane_configs[0],
+            env_config=env_config,
+            target_config=target_config,
+            seed=seed,
+            num_envs=num_envs,
+            autoreset=autoreset,
+            dtype=dtype,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            dt=dt,
+            integrator=integrator,
+            collision_mode=collision_mode,
+            history_chunk_size=history_chunk_size,
+            history_thread=history_thread,
+            history_format=history_format,
+            history_level=history_level,
+            history_keep_last=history_keep_last,
+            history_every=history_every,
+        )
+
+        # every plane is an agent
+        self._agent_ids = np.arange(num_envs * self._n_planes)
+        # planes that were alive at the start of the current step
+        self._was_alive = np.ones((num_envs, self._n_planes), dtype=bool)
+
+    def _create_planes(self)-> tuple[np.ndarray, np.ndarray]:
+        """
+        Create spawn templates of the planes of a world.
+
+        Creates one plane per plane config, see BaseEnv._create_agent(),
+        and spreads them along the y axis by the plane spacing.
+
+        @returns:
+            - tuple with numpy arrays containing scalars and vectors,
+            each with a leading plane axis.
+        """
+        scalars, vectors = zip(
+            *(self._create_agent(plane_data) for plane_data in self._plane_configs),
+            strict=True,
+        )
+        scalars, vectors = np.stack(scalars), np.stack(vectors)
+        offsets = np.arange(vectors.shape[0]) - (vectors.shape[0] - 1) / 2
+        vectors[:, Vector.POS, 1] += offsets * self._plane_spacing
+        return scalars, vectors
+
+    def _randomise_planes(self, scalars: np.ndarray, vectors: np.ndarray)-> None:
+        """
+        Randomise the spawns of the planes of a world in place.
+
+        Every plane is randomised by its own config, see
+        BaseEnv._randomise_agent().
+
+        @params:
+            - scalars (np.ndarray): Scalars of the planes.
+            - vectors (np.ndarray): Vectors of the planes.
+        """
+        for plane_scalars, plane_vectors, plane_data in zip(
+            scalars, vectors, self._plane_configs, strict=True,
+        ):
+            self._randomise_agent(plane_scalars, plane_vectors, plane_data)
+
+    def _check_if_terminated(self)-> np.ndarray:
+        """
+        Check if the current conditions result in a terminal state.
+
+        A world is terminated when all of its targets are dead, which
+        holds for every plane in it.
+
+        @returns:
+            - np.ndarray with is_terminal per plane.
+        """
+        return np.repeat(
+            super()._check_if_terminated()[..., np.newaxis],
+            self._n_planes,
+            axis=-1,
+        )
+
+    def _check_if_truncated(self)-> np.ndarray:
+        """
+        Check if the current conditions result in a truncated state.
+
+        A plane is truncated once it has crashed or was shot.
+
+        @returns:
+            - np.ndarray with is_truncated per plane.
+        """
+        return ~self._entities.airplanes.alive
+
+    def _check_if_done(
+        self,
+        is_terminated: np.ndarray,
+        is_truncated: np.ndarray,
+    )-> np.ndarray:
+        """
+        Check which worlds have finished their episode.
+
+        A world is finished when all of its targets or all of its
+        planes are dead.
+
+        @params:
+            - is_terminated (np.ndarray): is_terminal per plane.
+            - is_truncated (np.ndarray): is_truncated per plane.
+
+        @returns:
+            - np.ndarray with the mask of the finished worlds.
+        """
+        return np.all(is_terminated | is_truncated, axis=-1)
+
+    def _calculate_state(self)-> np.ndarray:
+        """
+        Calculate state of current conditions.
+
+        The state of every plane contains:
+            * x (float): x position of plane
+            * y (float): y position of plane
+            * velocity_x (float): velocity of plane in x direction
+            * velocity_y (float): velocity of plane in y direction
+            * n_targets (int): number of targets remaining in its world
+
+        @returns:
+            - np.ndarray with state, with shape (num_envs, n_planes, 5).
+        """
+        planes = self._entities.airplanes.fields
+        n_remaining_targets = np.count_nonzero(
+            self._entities.targets.alive,
+            axis=-1,
+        )
+        return np.concatenate(
+            (
+                planes.pos,
+                planes.v,
+                np.repeat(
+                    n_remaining_targets[:, np.newaxis, np.newaxis],
+                    self._n_planes,
+                    axis=1,
+                ),
+            ),
+            axis=-1,
+            dtype=self._dtype,
+        )
+
+    def _calculate_observation(
+            self,
+            n_ticks: int|np.ndarray=1,
+        )-> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """
+        Calculate observation of current conditions.
+
+        See BaseEnv._calculate_observation(), with a plane axis after
+        the world axis. Planes that were already dead at the start of
+        the step get no reward.
+
+        @params:
+            - n_ticks (int|np.ndarray): Number of ticks since the
+            previous observation, per plane if given as an array.
+
+        @returns:
+            - np.ndarray with state per plane
+            - np.ndarray with reward per plane
+            - np.ndarray with is_terminal per plane
+            - np.ndarray with is_truncated per plane
+            - dict with info (always empty)
+        """
+        state, reward, is_terminated, is_truncated, info = \
+            super()._calculate_observation(n_ticks)
+        reward[~self._was_alive] = 0
+        return state, reward, is_terminated, is_truncated, info
+
+    def step(
+        self,
+        actions: np.ndarray,
+    )-> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """
+        Step function for all worlds.
+
+        Performs the action of each plane, see BaseEnv.step() for the
+        actions and the shooting reward and VectorEnv.step() for the
+        frame skip and autoreset. Dead planes do nothing, whatever
+        their action.
+
+        @params:
+            - actions (np.ndarray): action per plane, with shape
+            (num_envs, n_planes).
+
+        @returns:
+            - np.ndarray with state per plane
+            - np.ndarray with reward per plane
+            - np.ndarray with is_terminal per plane
+            - np.ndarray with is_truncated per plane
+            - dict with info, if any worlds were reset, contains:
+                * final_observation (np.ndarray): states before reset.
+                * _final_observation (np.ndarray): mask of reset worlds.
+        """
+        np.copyto(self._was_alive, self._entities.airplanes.alive)
+        actions = np.where(
+            self._was_alive,
+            np.reshape(actions, self._was_alive.shape),
+            0,
+        )
+        return super().step(actions.reshape(-1))
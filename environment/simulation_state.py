@@ -0,0 +1,22 @@
+"""Snapshot data structure for the full state of an environment."""
+
+from typing import NamedTuple
+
+
+class SimulationState(NamedTuple):
+    """
+    Snapshot of the full state of an environment.
+
+    Returned by BaseEnv.get_state() and restored by BaseEnv.set_state(),
+    a snapshot can be restored any number of times:
+    - entities: Copies of the used entity slots and bullet counters
+    - plane_rng: State of the random number generator of the plane
+    - target_rng: State of the random number generator of the targets
+    - iteration: Current iteration of the observation history
+    - history: History of the current episode(s)
+    """
+    entities: tuple
+    plane_rng: dict
+    target_rng: dict
+    iteration: int
+    history: tuple
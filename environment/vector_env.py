@@ -0,0 +1,429 @@
+"""
+Vectorized environment module for Target Terminator.
+
+This module provides the VectorEnv class, which steps a number of
+independent simulations (worlds) at once, without a GUI. All worlds
+share one Entities object with a leading world axis, so every tick is
+a single set of vectorized calls, regardless of the number of worlds.
+"""
+
+import numpy as np
+
+from environment.base_env import BaseEnv
+from simulation.entity_store import Action
+from utils.episode_summaries import summarize
+
+
+class VectorEnv(BaseEnv):
+    """
+    Vectorized environment class.
+
+    This class instantiates a number of independent environments,
+    excluding a GUI. Each world has its own plane and target(s), as
+    stated in the provided config files, and all worlds are stepped
+    together.
+
+    This class has no public member variables.
+
+    @public methods:
+    + step(actions: np.ndarray)-> tuple[
+        np.ndarray,
+        np.ndarray,
+        np.ndarray,
+        np.ndarray,
+        dict,
+      ]
+        Takes a step in all worlds. This means that the plane of each
+        world will be updated based on its action and that the worlds
+        will react accordingly.
+    + reset(seed: int=None, mask: np.ndarray=None)-> tuple[
+        np.ndarray,
+        dict,
+      ]
+        Resets the worlds given a seed. This means that the planes
+        and targets of the (masked) worlds will be reset to their spawn
+        locations.
+    + close(
+        save_json: bool=False,
+        save_figs: bool=False,
+        figs_stride: int=1,
+        save_heatmaps: bool=False
+      )-> None
+        Closes the environment and thereby outputs its entire history.
+    + get_state()-> SimulationState
+        Takes a snapshot of the full state of all worlds, see BaseEnv.
+    + set_state(state: SimulationState)-> None
+        Restores all worlds to a snapshot, see BaseEnv.
+    + clone()-> VectorEnv
+        Copies the environment, see BaseEnv.
+    """
+
+    def __init__(
+        self,
+        plane_config: str="config/i-16_falangist.yaml",
+        env_config: str="config/default_env.yaml",
+        target_config: str="config/default_target.yaml",
+        seed: int|None = None,
+        *,
+        num_envs: int = 1,
+        autoreset: bool = True,
+        dtype: str = "float64",
+        physics_backend: str = "numpy",
+        frame_skip: int = 1,
+        dt: float = 1 / 60,
+        integrator: str = "euler",
+        collision_mode: str = "pairwise",
+        history_chunk_size: int = 1000,
+        history_thread: bool = False,
+        history_format: str = "json",
+        history_level: str = "full",
+        history_keep_last: int|None = None,
+        history_every: int = 1,
+    )-> None:
+        """
+        Initialize the VectorEnv class.
+
+        @params:
+            - plane_config (str): Path to yaml file with plane
+            configuration. See config/i-16_falangist.yaml for more info.
+            - env_config (str): Path to yaml file with environment
+            configuration. See config/default_env.yaml for more info.
+            - target_config (str): Path to yaml file with target
+            configuration. See config/default_target.yaml for more
+            info.
+            - seed (int): Seed for randomizer. If None, no seed is used.
+            - num_envs (int): Number of worlds to simulate at once.
+            - autoreset (bool): Reset worlds as soon as they are
+            terminated or truncated. If False, finished worlds have to
+            be reset using reset(mask=...).
+            - dtype (str): Precision of the simulation, "float64" or
+            "float32", see BaseEnv.
+            - physics_backend (str): "numpy" or "numba", see BaseEnv.
+            - frame_skip (int): Number of ticks every action is applied
+            for, see self.step().
+            - dt (float): Simulated seconds per tick, see BaseEnv.
+            - integrator (str): "euler", "midpoint" or "rk4", see
+            BaseEnv.
+            - collision_mode (str): "pairwise" or "event", see BaseEnv.
+            - history_chunk_size (int): Number of steps of finished
+            episodes that are kept in memory, see BaseEnv.
+            - history_thread (bool): Write the history on a background
+            thread, see BaseEnv.
+            - history_format (str): "json" or "npy", see BaseEnv.
+            - history_level (str): "off", "episode_summary" or "full",
+            see BaseEnv.
+            - history_keep_last (int): Only keep the observations of
+            the last K episodes, see BaseEnv.
+            - history_every (int): Only keep the observations of every
+            Nth episode, see BaseEnv.
+        """
+        if num_envs < 1:
+            raise ValueError("`num_envs` must be at least 1.")
+
+        # needed by self._spawn(), which is called by super().__init__()
+        self._num_envs = num_envs
+        self._autoreset = autoreset
+
+        super().__init__(
+            plane_config=plane_config,
+            env_config=env_config,
+            target_config=target_config,
+            seed=seed,
+            dtype=dtype,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            dt=dt,
+            integrator=integrator,
+            collision_mode=collision_mode,
+            history_chunk_size=history_chunk_size,
+            history_thread=history_thread,
+            history_format=history_format,
+            history_level=history_level,
+            history_keep_last=history_keep_last,
+            history_every=history_every,
+        )
+
+        # batched (state, reward, terminated, truncated) per step, kept
+        # until the episodes of all worlds that span them are finished
+        self._step_history = []
+        # step number of self._step_history[0]
+        self._first_step = 0
+        self._n_steps = 0
+        # step number at which the current episode of each world began
+        self._episode_start = np.zeros(num_envs, dtype=int)
+        # return of the current episode of each world and the state,
+        # is_terminal and is_truncated of the last step, for the
+        # episode summaries
+        self._episode_return = np.zeros(self._calculate_state().shape[:-1])
+        self._last_step = None
+
+        # the agent is the first plane of every world, given as index
+        # in the flattened (world, plane) axes
+        self._agent_ids = np.arange(num_envs) * self._entities.n_planes
+
+    def _spawn(self, n_worlds: int|None = None)-> tuple[np.ndarray, np.ndarray]:
+        """
+        Spawn plane and target entities for a number of worlds.
+
+        Uses BaseEnv._spawn() for each world, each world has its own
+        randomised spawn locations.
+
+        @params:
+            - n_worlds (int): Number of worlds to spawn. If None, all
+            worlds are spawned.
+
+        @returns:
+            - tuple with numpy arrays containing scalars and vectors,
+            each with a leading world axis.
+        """
+        if n_worlds is None:
+            n_worlds = self._num_envs
+        scalars, vectors = zip(
+            *(super(VectorEnv, self)._spawn() for _ in range(n_worlds)),
+            strict=True,
+        )
+        return np.stack(scalars), np.stack(vectors)
+
+    def step(
+        self,
+        actions: np.ndarray,
+    )-> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """
+        Step function for all worlds.
+
+        Performs the action of each world on its agent, see
+        BaseEnv.step() for the actions and the shooting reward. Worlds
+        that end up terminated or truncated are reset if autoreset is
+        enabled, in which case their final state is put in the info.
+
+        With a frame skip of k, the actions are applied for k ticks, see
+        BaseEnv.step(). A world that ends in an earlier tick is frozen
+        for the remaining ticks, like a plane that dies, see
+        Entities.tick(). The reward of every world only counts the
+        ticks it was simulated for, so each world steps exactly like a
+        BaseEnv would.
+
+        @params:
+            - actions (np.ndarray): action per world, see BaseEnv.step().
+
+        @returns:
+            - np.ndarray with state per world
+            - np.ndarray with reward per world
+            - np.ndarray with is_terminal per world
+            - np.ndarray with is_truncated per world
+            - dict with info, if any worlds were reset, contains:
+                * final_observation (np.ndarray): states before reset.
+                * _final_observation (np.ndarray): mask of reset worlds.
+        """
+        actions = np.asarray(actions)
+        tick_actions = np.stack((self._agent_ids, actions), axis=1)
+        self._entities.tick(self._dt, tick_actions)
+
+        # if the action was shoot, predict the bonus right after the
+        # bullets are spawned
+        shooting = np.flatnonzero(actions == Action.SHOOT)
+        if shooting.shape[0] != 0:
+            _, shot_bonus = self._predict_hits()
+            tick_actions[shooting, 1] = 0
+
+        # worlds that have ended and planes that have died are frozen,
+        # the others count the ticks they are simulated for
+        n_ticks = np.ones(self._episode_return.shape, dtype=int)
+        for _ in range(self._frame_skip - 1):
+            done = self._check_if_done(
+                self._check_if_terminated(),
+                self._check_if_truncated(),
+            )
+            frozen = ~self._entities.airplanes.alive | done[:, np.newaxis]
+            if np.all(frozen):
+                break
+            self._entities.tick(self._dt, tick_actions, frozen)
+            n_ticks += ~frozen.reshape(n_ticks.shape)
+
+        state, reward, is_terminated, is_truncated, info = \
+            self._calculate_observation(n_ticks)
+
+        # if the action was shoot, alter the reward accordingly, the
+        # bullets are spawned in the order of the agents that shot them
+        if shooting.shape[0] != 0:
+            reward.reshape(-1)[shooting] += shot_bonus
+
+        if self._history_level == "full":
+            self._step_history.append((state, reward, is_terminated, is_truncated))
+        if self._history_level != "off":
+            self._episode_return += reward
+            self._last_step = (state, is_terminated, is_truncated)
+        self._n_steps += 1
+
+        done = self._check_if_done(is_terminated, is_truncated)
+        if np.any(done):
+            self._store_episodes(np.flatnonzero(done))
+            if self._autoreset:
+                info["final_observation"] = state
+                info["_final_observation"] = done
+                state, _ = self.reset(mask=done)
+
+        return state, reward, is_terminated, is_truncated, info
+
+    def _check_if_done(
+        self,
+        is_terminated: np.ndarray,
+        is_truncated: np.ndarray,
+    )-> np.ndarray:
+        """
+        Check which worlds have finished their episode.
+
+        @params:
+            - is_terminated (np.ndarray): is_terminal per world.
+            - is_truncated (np.ndarray): is_truncated per world.
+
+        @returns:
+            - np.ndarray with the mask of the finished worlds.
+        """
+        return is_terminated | is_truncated
+
+    def _store_episodes(self, worlds: np.ndarray)-> None:
+        """
+        Move the current episode of worlds to the observation history.
+
+        Each episode gets its own iteration in the history, steps that
+        are no longer part of any current episode are dropped. Only the
+        summaries of the episodes are stored below the "full" history
+        level, nothing at the "off" level.
+
+        @params:
+            - worlds (np.ndarray): Index of the worlds whose episode
+            has ended.
+        """
+        for world in worlds:
+            length = self._n_steps - self._episode_start[world]
+            # episodes without any steps are not stored
+            if length == 0 or self._history_level == "off":
+                continue
+            # every finished episode of any world gets its own iteration
+            self._current_iteration += 1
+            state, is_terminated, is_truncated = self._last_step
+            summary = summarize(
+                int(length),
+                self._episode_return[world].copy(),
+                (state[world], is_terminated[world], is_truncated[world]),
+                len(self._target_data),
+            )
+            observations = None
+            if self._history_level == "full":
+                start = self._episode_start[world] - self._first_step
+                # copy the state, so the history does not hold on to the
+                # states of all worlds
+                observations = [
+                    (state[world].copy(), reward[world], is_terminated[world],
+                     is_truncated[world], {})
+                    for state, reward, is_terminated, is_truncated
+                    in self._step_history[start:]
+                ]
+            self._history.add(self._current_iteration, summary, observations)
+        self._episode_start[worlds] = self._n_steps
+        self._episode_return[worlds] = 0
+
+        n_obsolete = np.min(self._episode_start) - self._first_step
+        del self._step_history[:n_obsolete]
+        self._first_step += n_obsolete
+
+    def _get_history_state(self)-> tuple:
+        """
+        History of the current episodes, for a snapshot.
+
+        The batched steps are shared with the snapshot, they are never
+        changed after they are added.
+
+        @returns:
+            - tuple with a copy of the step history, its counters, the
+            summaries so far and the number of finished episodes.
+        """
+        return (
+            list(self._step_history),
+            self._first_step,
+            self._n_steps,
+            self._episode_start.copy(),
+            self._episode_return.copy(),
+            self._last_step,
+            self._history.n_episodes,
+        )
+
+    def _set_history_state(self, history: tuple)-> None:
+        """
+        Restore the history of the current episodes from a snapshot.
+
+        @params:
+            - history (tuple): History, as returned by
+            self._get_history_state().
+        """
+        step_history, self._first_step, self._n_steps, episode_start, \
+            episode_return, self._last_step, n_episodes = history
+        self._history.discard(n_episodes)
+        self._step_history = list(step_history)
+        self._episode_start = episode_start.copy()
+        self._episode_return = episode_return.copy()
+
+    def reset(
+        self,
+        seed: int|None = None,
+        mask: np.ndarray|None = None,
+    )-> tuple[np.ndarray, dict]:
+        """
+        Reset worlds.
+
+        Respawns the entities of the (masked) worlds in place. Any
+        unfinished episode of these worlds is added to the history.
+        Returns the states of all worlds & info.
+
+        @params:
+            - seed (int): seed used to spawn in the entities. If None,
+            no seed is used.
+            - mask (np.ndarray): boolean mask of the worlds to reset. If
+            None, all worlds are reset.
+
+        @returns:
+            - np.ndarray with state per world
+            (see self._calculate_state()).
+            - dict with info, made for compatibility with Gym
+            environment, but is always empty.
+        """
+        if seed is not None:
+            self._plane_rng = np.random.default_rng(seed)
+            self._target_rng = np.random.default_rng(seed)
+
+        worlds = np.arange(self._num_envs) if mask is None else \
+            np.flatnonzero(mask)
+        self._store_episodes(worlds)
+
+        scalars, vectors = self._spawn(worlds.shape[0])
+        self._entities.respawn(scalars, vectors, worlds)
+
+        return self._calculate_state(), {}
+
+    def close(
+        self,
+        save_json: bool=False,
+        save_figs: bool=False,
+        figs_stride: int=1,
+        save_heatmaps: bool=False,
+    )-> None:
+        """
+        Close environment and output history.
+
+        Adds the unfinished episodes to the history and closes the
+        environment, see BaseEnv.close().
+
+        @params:
+            - save_json (bool): Save json or not.
+            - save_figs (bool): Save the plots or not.
+            - figs_stride (int): Stride for saving the figures.
+            - save_heatmaps (bool): Save the heatmaps or not.
+        """
+        self._store_episodes(np.arange(self._num_envs))
+        super().close(
+            save_json=save_json,
+            save_figs=save_figs,
+            figs_stride=figs_stride,
+            save_heatmaps=save_heatmaps,
+        )
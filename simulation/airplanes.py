@@ -8,7 +8,26 @@ It manages multiple airplane entities, their movements, forces, and actions.
 import math
 
 import numpy as np
-from sklearn.preprocessing import normalize
+
+from simulation.entity_store import Action, EntityType, Fields
+from simulation.numba_backend import (
+    resolve_backend,
+    scalar_block,
+    tick_airplanes,
+    vector_block,
+)
+
+# explicit Runge-Kutta methods for the velocity, position, pitch and
+# throttle, given as the fraction of dt at which each stage is evaluated
+# and the weight of each stage. every stage starts from the derivative
+# of the previous stage, which holds for these methods. "euler" is the
+# semi-implicit Euler method, which moves the planes with their updated
+# velocity and only then turns them.
+INTEGRATORS = {
+    "euler": (np.zeros(0), np.zeros(0)),
+    "midpoint": (np.array([0, 0.5]), np.array([0, 1.0])),
+    "rk4": (np.array([0, 0.5, 0.5, 1]), np.array([1, 2, 2, 1]) / 6),
+}
 
 
 class Airplanes:
@@ -17,6 +36,17 @@ class Airplanes:
 
     This class contains all the airplanes needed for a simulation. It
     also contains all the math required to make the planes move.
+    The matrices may have a leading world axis, in which case the
+    planes of all worlds are moved by the same vectorized calls.
+
+    All intermediate results of a tick are written into scratch buffers
+    that are allocated once, so ticking does not allocate any arrays.
+    With the numba physics backend, a tick is a single compiled loop
+    over all planes instead.
+
+    The velocity, position, pitch and throttle are integrated with one
+    of INTEGRATORS. The actions set the rate of change of the pitch and
+    throttle during the whole tick.
 
     @public member variables:
     + scalars (np.ndarray): numpy matrix with the following columns:
@@ -50,13 +80,24 @@ class Airplanes:
         7 - f_drag
         8 - f_lift
         9 - pitch_uv
+    + fields (Fields): Named views on the columns of the matrices.
+    + alive (np.ndarray): Mask of the alive planes.
     
     @public methods:
     + tick(dt: float, actions: np.ndarray)-> None:
         Tick function to move all airplanes.
+    + update_gravity()-> None:
+        Scale the force of gravity with the weight of the planes.
     """
     
-    def __init__(self, scalars: np.ndarray, vectors: np.ndarray)-> None:
+    def __init__(
+        self,
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        physics_backend: str = "numpy",
+        integrator: str = "euler",
+        alive: np.ndarray|None = None,
+    )-> None:
         """
         Initialize for Airplanes class.
 
@@ -97,10 +138,71 @@ class Airplanes:
             7 - f_drag
             8 - f_lift
             9 - pitch_uv
+            - physics_backend (str): "numpy" or "numba", see
+            simulation/numba_backend.py.
+            - integrator (str): "euler", "midpoint" or "rk4", see
+            INTEGRATORS. The higher order methods evaluate the forces
+            two or four times per tick, but stay accurate for larger
+            delta times.
+            - alive (np.ndarray): Mask of the alive planes, which the
+            owner keeps up to date. If None, it is derived from the
+            flags once.
         """
+        if integrator not in INTEGRATORS:
+            raise ValueError(
+                f"`integrator` must be one of {tuple(INTEGRATORS)}.",
+            )
+        self._integrator = integrator
+        self._stage_time, self._stage_weight = INTEGRATORS[integrator]
+
         self.scalars = scalars
         self.vectors = vectors
-        self.vectors[:,5,1] = self.scalars[:,0] * 9.81
+        self.fields = Fields(scalars, vectors)
+        self.alive = alive if alive is not None else \
+            (self.fields.entity_type != EntityType.NOTHING) & \
+            (self.fields.coll_flag == -1)
+        self.update_gravity()
+
+        self._physics_backend = resolve_backend(physics_backend)
+        # (column, world, plane) views for the numba kernels
+        self._scalar_block = scalar_block(scalars)
+        self._vector_block = vector_block(vectors)
+
+        # scratch buffers for the intermediate results of a tick, one
+        # value per plane
+        shape = scalars.shape[:-1]
+        dtype = scalars.dtype
+        self._speed = np.empty(shape, dtype=dtype)
+        self._speed_squared = np.empty(shape, dtype=dtype)
+        self._norm_drag = np.empty(shape, dtype=dtype)
+        self._coef_lift = np.empty(shape, dtype=dtype)
+        self._crit = np.empty(shape, dtype=dtype)
+        self._coef = np.empty(shape, dtype=dtype)
+        self._temp = np.empty(shape, dtype=dtype)
+        self._f_res = np.empty(shape, dtype=dtype)
+        # start of the tick, derivatives and their weighted sums for
+        # the runge-kutta stages, vectors per component
+        self._v0 = np.empty((2, *shape), dtype=dtype)
+        self._accel = np.empty((2, *shape), dtype=dtype)
+        self._dv = np.empty((2, *shape), dtype=dtype)
+        self._pitch0 = np.empty(shape, dtype=dtype)
+        self._pitch_rate = np.empty(shape, dtype=dtype)
+        self._d_pitch = np.empty(shape, dtype=dtype)
+        self._throttle0 = np.empty(shape, dtype=dtype)
+        self._turn_rate = np.empty(shape, dtype=dtype)
+        self._throttle_rate = np.empty(shape, dtype=dtype)
+        self._mask = np.empty(shape, dtype=bool)
+        self._other_mask = np.empty(shape, dtype=bool)
+        self._action = np.empty(shape, dtype=int)
+        self._action_block = self._action.reshape(-1, scalars.shape[-2])
+
+    def update_gravity(self)-> None:
+        """
+        Scale the force of gravity with the weight of the planes.
+
+        Has to be called again whenever the planes are respawned.
+        """
+        self.fields.f_gravity[..., 1] = self.fields.mass * 9.81
 
     def tick(self, dt: float, actions: np.ndarray)-> None:
         """
@@ -115,59 +217,250 @@ class Airplanes:
             - actions (np.ndarray): List of actions corresponding to the
             number of planes.
         """
+        if self._physics_backend == "numba":
+            self._set_actions(actions)
+            tick_airplanes(
+                self._scalar_block,
+                self._vector_block,
+                self._action_block,
+                dt,
+                self._stage_time,
+                self._stage_weight,
+            )
+            return
+
+        f, temp = self.fields, self._temp
+
         # update pitch unit vector
-        self.vectors[:, 9, 0] = np.cos(-math.pi / 180 * self.scalars[:, 8])
-        self.vectors[:, 9, 1] = np.sin(-math.pi / 180 * self.scalars[:, 8])
+        np.multiply(f.pitch, -math.pi / 180, out=temp)
+        np.cos(temp, out=f.pitch_uv[..., 0])
+        np.sin(temp, out=f.pitch_uv[..., 1])
+
+        self._calculate_forces()
+
+        if self._integrator == "euler":
+            self._euler(dt)
+            self._execute_actions(dt, actions)
+        else:
+            self._set_actions(actions)
+            self._runge_kutta(dt)
+
+    def _calculate_forces(self)-> None:
+        """
+        Calculate all forces on the planes at their current velocity.
 
-        # update velocity unit vector
-        self.vectors[:, 4] = normalize(self.vectors[:, 2])
+        Updates the velocity unit vector, AoA and the engine, lift and
+        drag forces, and writes the norm of the drag to
+        self._norm_drag. Expects an up-to-date pitch unit vector.
+        """
+        f = self.fields
+        v, aoa = f.v, f.aoa_deg
+        temp, speed, speed_squared = self._temp, self._speed, self._speed_squared
+
+        # update velocity unit vector, which stays zero for zero speed
+        np.multiply(v[..., 0], v[..., 0], out=speed)
+        np.multiply(v[..., 1], v[..., 1], out=temp)
+        np.add(speed, temp, out=speed)
+        np.sqrt(speed, out=speed)
+        np.multiply(speed, speed, out=speed_squared)
+        np.equal(speed, 0, out=self._mask)
+        np.copyto(temp, speed)
+        np.copyto(temp, 1.0, where=self._mask)
+        np.divide(v[..., 0], temp, out=f.v_uv[..., 0])
+        np.divide(v[..., 1], temp, out=f.v_uv[..., 1])
 
         # update AoA
-        self.scalars[:, 10] = ((
-            np.arctan2(self.vectors[:, 9, 0], self.vectors[:, 9, 1]) -
-            np.arctan2(self.vectors[:, 2, 0], self.vectors[:, 2, 1])
-        ) * 180 / math.pi + 180) % 360 - 180
+        np.arctan2(f.pitch_uv[..., 0], f.pitch_uv[..., 1], out=aoa)
+        np.arctan2(v[..., 0], v[..., 1], out=temp)
+        np.subtract(aoa, temp, out=aoa)
+        np.multiply(aoa, 180, out=aoa)
+        np.divide(aoa, math.pi, out=aoa)
+        np.add(aoa, 180, out=aoa)
+        np.remainder(aoa, 360, out=aoa)
+        np.subtract(aoa, 180, out=aoa)
 
         # engine force vector
-        self.vectors[:, 6] = self.scalars[:, 7][:, None] * 0.1 * \
-            self.scalars[:, 5][:, None] * self.vectors[:, 9]
+        np.multiply(f.throttle, 0.1, out=temp)
+        np.multiply(temp, f.engine_force, out=temp)
+        np.multiply(temp, f.pitch_uv[..., 0], out=f.f_engine[..., 0])
+        np.multiply(temp, f.pitch_uv[..., 1], out=f.f_engine[..., 1])
 
         # lift force vector
-        coef_lift = self._lift_curve()
-        norm_lift = self.scalars[:, 2] * coef_lift * np.linalg.norm(
-            self.vectors[:, 2],
-            axis=1,
-        )**2
-        self.vectors[:, 8, 0] = norm_lift * self.vectors[:, 4, 1]
-        self.vectors[:, 8, 1] = norm_lift * -self.vectors[:, 4, 0]
+        self._lift_curve()
+        np.multiply(f.const_lift, self._coef_lift, out=temp)
+        np.multiply(temp, speed_squared, out=temp)
+        np.multiply(temp, f.v_uv[..., 1], out=f.f_lift[..., 0])
+        # negated in the buffer before it is written to the field
+        np.negative(temp, out=temp)
+        np.multiply(temp, f.v_uv[..., 0], out=f.f_lift[..., 1])
 
         # drag force vector
-        coef_drag = (self.scalars[:, 10] / np.sqrt(40))**2 + self.scalars[:, 4]
-        norm_drag = self.scalars[:, 1] * coef_drag * np.linalg.norm(
-            self.vectors[:, 2],
-            axis=1,
-        )**2
-        self.vectors[:, 7] = -norm_drag[:, None] * self.vectors[:, 4]
-
-        # fres + update v, pos
-        f_res = self.vectors[:, 5] + self.vectors[:, 6] + \
-            self.vectors[:, 7] + self.vectors[:, 8]
-        self.vectors[:, 2] += dt * f_res / self.scalars[:, 0][:, None]
-        self.vectors[:, 3] += dt * self.vectors[:, 2]
-
-        # induced torque
-        filter = np.zeros(self.scalars.shape[0])
-        filter[self.scalars[:, 10] < self.vectors[:, 0, 0]] = 1
-        filter[self.scalars[:, 10] > self.vectors[:, 1, 0]] = -1
-        self.scalars[:, 8] = (
-            self.scalars[:, 8] +
-            dt *
-            filter *
-            norm_drag *
-            0.01
-        ) % 360
-
-        self._execute_actions(dt, actions)
+        np.divide(aoa, math.sqrt(40), out=temp)
+        np.multiply(temp, temp, out=temp)
+        np.add(temp, f.cd_min, out=temp)
+        np.multiply(f.const_drag, temp, out=self._norm_drag)
+        np.multiply(self._norm_drag, speed_squared, out=self._norm_drag)
+        np.negative(self._norm_drag, out=temp)
+        np.multiply(temp, f.v_uv[..., 0], out=f.f_drag[..., 0])
+        np.multiply(temp, f.v_uv[..., 1], out=f.f_drag[..., 1])
+
+    def _induced_torque(self, dt: float, out: np.ndarray)-> None:
+        """
+        Calculate the change in pitch caused by the induced torque.
+
+        The induced torque pitches the planes towards the critical AoA.
+
+        @params:
+            - dt (float): Delta time, 1 gives the pitch rate.
+            - out (np.ndarray): Buffer for the change in pitch, one per
+            plane.
+        """
+        f = self.fields
+        np.less(f.aoa_deg, f.aoa_crit_low[..., 0], out=self._mask)
+        np.greater(f.aoa_deg, f.aoa_crit_high[..., 0], out=self._other_mask)
+        np.copyto(out, self._mask)
+        np.copyto(out, -1.0, where=self._other_mask)
+        np.multiply(out, dt, out=out)
+        np.multiply(out, self._norm_drag, out=out)
+        np.multiply(out, 0.01, out=out)
+
+    def _euler(self, dt: float)-> None:
+        """
+        Integrate velocity and position with semi-implicit Euler.
+
+        The induced torque is applied afterwards, the actions are left
+        to self._execute_actions().
+
+        @params:
+            - dt (float): Delta time.
+        """
+        f, f_res, temp = self.fields, self._f_res, self._temp
+
+        # fres + update v, pos, per component since numpy buffers
+        # operations on strided 2d views
+        for i in range(2):
+            np.add(f.f_gravity[..., i], f.f_engine[..., i], out=f_res)
+            np.add(f_res, f.f_drag[..., i], out=f_res)
+            np.add(f_res, f.f_lift[..., i], out=f_res)
+            np.multiply(f_res, dt, out=f_res)
+            np.divide(f_res, f.mass, out=f_res)
+            np.add(f.v[..., i], f_res, out=f.v[..., i])
+            np.multiply(f.v[..., i], dt, out=f_res)
+            np.add(f.pos[..., i], f_res, out=f.pos[..., i])
+
+        self._induced_torque(dt, temp)
+        np.add(f.pitch, temp, out=f.pitch)
+        np.remainder(f.pitch, 360, out=f.pitch)
+
+    def _runge_kutta(self, dt: float)-> None:
+        """
+        Integrate velocity, position, pitch and throttle with Runge-Kutta.
+
+        Expects the forces at the start of the tick and the actions in
+        self._action. Every further stage recalculates the forces at
+        the velocity, pitch and throttle of that stage.
+
+        @params:
+            - dt (float): Delta time.
+        """
+        f, temp = self.fields, self._temp
+        v0, dv = self._v0, self._dv
+        pitch0, d_pitch, throttle0 = self._pitch0, self._d_pitch, self._throttle0
+
+        self._action_rates()
+        for i in range(2):
+            np.copyto(v0[i], f.v[..., i])
+        np.copyto(pitch0, f.pitch)
+        np.copyto(throttle0, f.throttle)
+        dv.fill(0)
+        d_pitch.fill(0)
+        for stage, (fraction, weight) in enumerate(
+            zip(self._stage_time, self._stage_weight, strict=True),
+        ):
+            if stage > 0:
+                self._stage_state(fraction * dt)
+            self._add_stage_derivative(weight * dt)
+
+        for i in range(2):
+            np.add(v0[i], dv[i], out=f.v[..., i])
+        np.add(pitch0, d_pitch, out=f.pitch)
+        np.remainder(f.pitch, 360, out=f.pitch)
+        np.multiply(self._throttle_rate, dt, out=temp)
+        np.add(throttle0, temp, out=f.throttle)
+        np.clip(f.throttle, 0, 100, out=f.throttle)
+
+    def _action_rates(self)-> None:
+        """
+        Set the turn and throttle rates of the actions in self._action.
+
+        Action 1 pitches up, 2 pitches down, 3 throttles up and 4
+        throttles down.
+        """
+        np.equal(self._action, Action.PITCH_UP, out=self._mask)
+        np.equal(self._action, Action.PITCH_DOWN, out=self._other_mask)
+        np.copyto(self._turn_rate, self._mask)
+        np.copyto(self._turn_rate, -1.0, where=self._other_mask)
+        np.multiply(self._turn_rate, self.fields.agility, out=self._turn_rate)
+        np.equal(self._action, Action.THROTTLE_UP, out=self._mask)
+        np.equal(self._action, Action.THROTTLE_DOWN, out=self._other_mask)
+        np.copyto(self._throttle_rate, self._mask)
+        np.copyto(self._throttle_rate, -1.0, where=self._other_mask)
+        np.multiply(self._throttle_rate, 100, out=self._throttle_rate)
+
+    def _stage_state(self, step: float)-> None:
+        """
+        Set the state of a Runge-Kutta stage and its forces.
+
+        The state follows from the state at the start of the tick and
+        the derivative of the previous stage.
+
+        @params:
+            - step (float): Time from the start of the tick to the stage.
+        """
+        f, temp, accel = self.fields, self._temp, self._accel
+        for i in range(2):
+            np.multiply(accel[i], step, out=temp)
+            np.add(self._v0[i], temp, out=f.v[..., i])
+        np.multiply(self._pitch_rate, step, out=temp)
+        np.add(self._pitch0, temp, out=f.pitch)
+        np.multiply(self._throttle_rate, step, out=temp)
+        np.add(self._throttle0, temp, out=f.throttle)
+        np.clip(f.throttle, 0, 100, out=f.throttle)
+
+        np.multiply(f.pitch, -math.pi / 180, out=temp)
+        np.cos(temp, out=f.pitch_uv[..., 0])
+        np.sin(temp, out=f.pitch_uv[..., 1])
+        self._calculate_forces()
+
+    def _add_stage_derivative(self, step: float)-> None:
+        """
+        Add the weighted derivative of a Runge-Kutta stage.
+
+        The change in velocity and pitch is summed in self._dv and
+        self._d_pitch, the position is moved directly.
+
+        @params:
+            - step (float): Weight of the stage times the delta time.
+        """
+        f, f_res, temp, accel = self.fields, self._f_res, self._temp, self._accel
+        pitch_rate = self._pitch_rate
+
+        self._induced_torque(1.0, pitch_rate)
+        np.add(pitch_rate, self._turn_rate, out=pitch_rate)
+        np.multiply(pitch_rate, step, out=temp)
+        np.add(self._d_pitch, temp, out=self._d_pitch)
+
+        for i in range(2):
+            np.add(f.f_gravity[..., i], f.f_engine[..., i], out=f_res)
+            np.add(f_res, f.f_drag[..., i], out=f_res)
+            np.add(f_res, f.f_lift[..., i], out=f_res)
+            np.divide(f_res, f.mass, out=accel[i])
+
+            # weighted sum of the derivatives of v and pos
+            np.multiply(accel[i], step, out=temp)
+            np.add(self._dv[i], temp, out=self._dv[i])
+            np.multiply(f.v[..., i], step, out=temp)
+            np.add(f.pos[..., i], temp, out=f.pos[..., i])
 
     def _execute_actions(self, dt: float, actions: np.ndarray)-> None:
         """
@@ -177,90 +470,96 @@ class Airplanes:
             - dt (float): Delta time, which controls the severity of the
             performed actions.
             - actions (np.ndarray): List of actions corresponding to the
-            number of planes. format:
+            number of planes. With a leading world axis, the agent ID
+            is the index in the flattened (world, plane) axes. format:
                 [[<agent ID 0>, <action ID 0>],
                 [<agent ID 1>, <action ID 1>],
                 ...
                 [<agent ID n>, <action ID n>]]
         """
-        l = self.scalars.shape[0]
-
-        # action 1 pitch up
-        filter = np.zeros(l)
-        filter[actions[actions[:, 1] == 1][:, 0]] = 1
-        self.scalars[:, 8] = (
-            self.scalars[:, 8] +
-            self.scalars[:, 6] *
-            dt *
-            filter
-        ) % 360
-
-        # action 2 pitch down
-        filter = np.zeros(l)
-        filter[actions[actions[:, 1] == 2][:, 0]] = 1
-        self.scalars[:, 8] = (
-            self.scalars[:, 8] -
-            self.scalars[:, 6] *
-            dt *
-            filter
-        ) % 360
-
-        # action 3 throttle up
-        filter = np.zeros(l)
-        filter[actions[actions[:, 1] == 3][:, 0]] = 1
-        self.scalars[:, 7] += dt * 100 * filter
-        self.scalars[self.scalars[:, 7] > 100, 7] = 100
-
-        # action 4 throttle down
-        filter = np.zeros(l)
-        filter[actions[actions[:, 1] == 4][:, 0]] = 1
-        self.scalars[:, 7] -= dt * 100 * filter
-        self.scalars[self.scalars[:, 7] < 0, 7] = 0
-
-    def _lift_curve(self) -> np.ndarray:
+        self._set_actions(actions)
+        f, temp = self.fields, self._temp
+
+        # action 1 pitch up, action 2 pitch down
+        np.equal(self._action, Action.PITCH_UP, out=self._mask)
+        np.equal(self._action, Action.PITCH_DOWN, out=self._other_mask)
+        np.copyto(temp, self._mask)
+        np.copyto(temp, -1.0, where=self._other_mask)
+        np.multiply(temp, dt, out=temp)
+        np.multiply(temp, f.agility, out=temp)
+        np.add(f.pitch, temp, out=f.pitch)
+        np.remainder(f.pitch, 360, out=f.pitch)
+
+        # action 3 throttle up, action 4 throttle down
+        np.equal(self._action, Action.THROTTLE_UP, out=self._mask)
+        np.equal(self._action, Action.THROTTLE_DOWN, out=self._other_mask)
+        np.copyto(temp, self._mask)
+        np.copyto(temp, -1.0, where=self._other_mask)
+        np.multiply(temp, dt * 100, out=temp)
+        np.add(f.throttle, temp, out=f.throttle)
+        np.clip(f.throttle, 0, 100, out=f.throttle)
+
+    def _set_actions(self, actions: np.ndarray)-> None:
+        """
+        Write the list of actions to self._action, one per plane.
+
+        Planes without an action get action 0, do nothing.
+
+        @params:
+            - actions (np.ndarray): List of actions, see
+            self._execute_actions().
+        """
+        # agent IDs index the flattened planes
+        self._action.fill(0)
+        self._action.reshape(-1)[actions[:, 0]] = actions[:, 1]
+
+    def _lift_curve(self)-> None:
         """
         Calculate lift coefficient for all planes.
 
-        @returns:
-            np.ndarray with lift coefficients for all planes.
+        The lift coefficient is piecewise linear in the AoA. Between
+        the critical AoAs it runs from cl0 at zero AoA to the critical
+        coefficients, beyond them it drops to zero within one degree.
+        Only the critical AoA on the side of the current AoA matters,
+        so it is selected first and every piece is computed once.
+
+        Writes the coefficients to self._coef_lift.
         """
-        AoA = self.scalars[:, 10]
-        AoA_crit_low = self.vectors[:, 0, 0]
-        coef_low = self.vectors[:, 0, 1]
-        AoA_crit_high = self.vectors[:, 1, 0]
-        coef_high = self.vectors[:, 1, 1]
-        cl0 = self.scalars[:, 3]
-
-        lift_coef = np.zeros_like(AoA)
-
-        # Mask AoA < AoA_crit_low[0] - 1
-        mask1 = AoA < (AoA_crit_low - 1)
-        lift_coef[mask1] = 0.0
-
-        # Mask AoA_crit_low[0] - 1 <= AoA < AoA_crit_low[0]
-        mask2 = (AoA >= (AoA_crit_low - 1)) & (AoA < AoA_crit_low)
-        lift_coef[mask2] = coef_low[mask2] * \
-            np.abs(AoA_crit_low[mask2] - 1 - AoA[mask2])
-
-        # Mask AoA_crit_low[0] <= AoA < 0
-        mask3 = (AoA >= AoA_crit_low) & (AoA < 0)
-        b = cl0 - coef_low
-        c = AoA / AoA_crit_low
-        lift_coef[mask3] = cl0[mask3] - b[mask3] * c[mask3]
-
-        # Mask 0 <= AoA < AoA_crit_high[0]
-        mask4 = (AoA >= 0) & (AoA < AoA_crit_high)
-        b = coef_high - cl0
-        c = AoA / AoA_crit_high
-        lift_coef[mask4] = cl0[mask4] + b[mask4] * c[mask4]
-
-        # Mask AoA_crit_high[0] <= AoA < AoA_crit_high[0] + 1
-        mask5 = (AoA >= AoA_crit_high) & (AoA < (AoA_crit_high + 1))
-        lift_coef[mask5] = coef_high[mask5] * \
-            np.abs(AoA_crit_high[mask5] - 1 - AoA[mask5])
-
-        # Mask AoA >= AoA_crit_high[0] + 1
-        mask6 = AoA >= (AoA_crit_high + 1)
-        lift_coef[mask6] = 0.0
-
-        return lift_coef
+        f = self.fields
+        aoa, cl0 = f.aoa_deg, f.cl0
+        aoa_crit_low = f.aoa_crit_low[..., 0]
+        aoa_crit_high = f.aoa_crit_high[..., 0]
+        coef_lift, crit, coef = self._coef_lift, self._crit, self._coef
+        temp, mask, other_mask = self._temp, self._mask, self._other_mask
+
+        # critical AoA and coefficient on the side of the AoA
+        np.less(aoa, 0, out=mask)
+        np.copyto(crit, aoa_crit_high)
+        np.copyto(crit, aoa_crit_low, where=mask)
+        np.copyto(coef, f.aoa_crit_high[..., 1])
+        np.copyto(coef, f.aoa_crit_low[..., 1], where=mask)
+
+        # crit_low <= AoA < crit_high: linear from cl0 to coef
+        np.divide(aoa, crit, out=temp)
+        np.subtract(coef, cl0, out=coef_lift)
+        np.multiply(coef_lift, temp, out=coef_lift)
+        np.add(cl0, coef_lift, out=coef_lift)
+
+        # crit_low - 1 <= AoA < crit_low or
+        # crit_high <= AoA < crit_high + 1: stalling
+        np.subtract(crit, 1, out=temp)
+        np.subtract(temp, aoa, out=temp)
+        np.abs(temp, out=temp)
+        np.multiply(coef, temp, out=temp)
+        np.less(aoa, aoa_crit_low, out=mask)
+        np.greater_equal(aoa, aoa_crit_high, out=other_mask)
+        np.logical_or(mask, other_mask, out=mask)
+        np.copyto(coef_lift, temp, where=mask)
+
+        # AoA < crit_low - 1 or AoA >= crit_high + 1: stalled
+        np.subtract(aoa_crit_low, 1, out=temp)
+        np.less(aoa, temp, out=mask)
+        np.add(aoa_crit_high, 1, out=temp)
+        np.greater_equal(aoa, temp, out=other_mask)
+        np.logical_or(mask, other_mask, out=mask)
+        np.copyto(coef_lift, 0.0, where=mask)
@@ -2,11 +2,28 @@
 Bullets module for the Target Terminator simulation.
 
 This module contains the Bullets class which manages all bullet entities
-in the simulation, including their movement, spawning, and despawning logic.
+in the simulation, including their trajectories, spawning, and despawning
+logic.
 """
 
 import numpy as np
 
+from simulation.entity_store import SCALARS_NDIM, EntityType, Fields
+from simulation.numba_backend import (
+    despawn_bullets,
+    resolve_backend,
+    scalar_block,
+    vector_block,
+)
+
+# Spawn ticks are stored in the matrices, which may be float32. Those
+# represent whole numbers exactly up to 2**24, so the tick counter is
+# rebased well before that.
+MAX_TICK = 2**20
+
+# factor by which the rings grow when they are too small
+GROWTH_FACTOR = 2
+
 
 class Bullets:
     """
@@ -14,12 +31,28 @@ class Bullets:
 
     This class contains all the bullets needed for a simulation. It
     also contains all the math required to make them move.
+    The matrices may have a leading world axis, in which case the
+    bullets of all worlds are handled by the same vectorized calls.
+
+    Bullets fly in a straight line at a constant velocity, so they are
+    never moved. Every bullet keeps the position and the tick it was
+    spawned in, from which its position at any tick follows in closed
+    form, see positions(). A tick therefore only advances the clock,
+    no matter how many bullets are in flight.
+
+    The bullets of each world are kept in a ring buffer. New bullets
+    are written at the head of the ring and, as all bullets live
+    equally long, the oldest bullets expire at its tail. Spawning and
+    despawning therefore never moves any other bullets. The rings use
+    all slots of the matrices, up to the number of bullets that can be
+    in flight at once. The owner of the matrices can grow them when
+    the rings are too small, see ring_size_needed() and grow().
 
     @public member variables:
     + scalars (np.ndarray): numpy matrix with the following columns:
         0  - mass
         1  - const_drag
-        2  - const_lift, alt scalar container 1
+        2  - const_lift, alt scalar container 1: spawn tick
         3  - cl0
         4  - cd_min
         5  - engine_force
@@ -40,22 +73,64 @@ class Bullets:
         0 - AoA_crit_low
         1 - AoA_crit_high
         2 - v
-        3 - pos
+        3 - pos, alt vector container 1: spawn position
         4 - v_uv
         5 - f_gravity
         6 - f_engine
         7 - f_drag
         8 - f_lift
         9 - pitch_uv
-    + n_bullets (int): Number of bullets alive at present time.
+    + fields (Fields): Named views on the columns of the matrices.
+    + alive (np.ndarray): Mask of the alive bullets, kept up to date
+    on spawn and despawn.
+    + n_bullets (int|np.ndarray): Number of bullets alive at present
+    time, per world if there is a leading world axis.
+    + n_slots (int): Number of slots, counted from the first, that
+    may contain a bullet.
+    + ring_size (int): Number of slots of the ring of each world.
+    + clock (tuple[int, float]): Current tick and the delta time of
+    the last tick.
     
     @public methods:
-    + tick(dt: float)-> None:
-        Tick function to move all bullets.
-    + spawn(self, vectors: np.ndarray)-> None:
+    + bind(
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        alive: np.ndarray=None,
+      )-> None:
+        Use new matrices for the bullets.
+    + grow(
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        alive: np.ndarray,
+      )-> np.ndarray:
+        Move the bullets to matrices with more slots.
+    + ring_size_needed(worlds: np.ndarray)-> int:
+        Size the rings need before bullets are spawned.
+    + tick(dt: float, frozen: np.ndarray=None)-> None:
+        Tick function to advance the clock of all bullets.
+    + positions(index: tuple[np.ndarray, ...])-> np.ndarray:
+        Compute the current positions of bullets.
+    + spawn(
+        self,
+        pos: np.ndarray,
+        v: np.ndarray,
+        worlds: np.ndarray=None,
+      )-> None:
         Spawn function for new bullets.
-    + despawn(self)-> int:
+    + despawn(self)-> int|np.ndarray:
         Despawn function for bullets.
+    + free(self, index: tuple[np.ndarray, ...])-> None:
+        Free bullets that died before their lifetime expired.
+    + clear(self, worlds: np.ndarray=None)-> None:
+        Remove all bullets.
+    + spawned(self)-> tuple[np.ndarray, np.ndarray]:
+        World and slot of the bullets of the last spawn.
+    + age(self, spawn_tick: np.ndarray)-> np.ndarray:
+        Age of bullets in ticks.
+    + get_state(self)-> tuple:
+        Snapshot of the ring buffers.
+    + set_state(self, state: tuple)-> None:
+        Restore the ring buffers from a snapshot.
     """
 
     def __init__(
@@ -63,11 +138,16 @@ class Bullets:
             scalars: np.ndarray,
             vectors: np.ndarray,
             plane_data: dict,
+            *,
+            n_planes: int = 1,
+            physics_backend: str = "numpy",
+            alive: np.ndarray|None = None,
         )-> None:
         """
         Initialize for Bullets class.
 
-        Sets self.scalars and self.vectors and sets self.n_bullets to 0.
+        Sets self.scalars and self.vectors and creates an empty ring
+        buffer for each world.
 
         @oarams:
             - scalars (np.ndarray):
@@ -103,60 +183,398 @@ class Bullets:
             7 - f_drag
             8 - f_lift
             9 - pitch_uv
+            - plane_data (dict): See plane yamls in config/ for more
+            information.
+            - n_planes (int): Number of planes that can shoot, per world.
+            - physics_backend (str): "numpy" or "numba", see
+            simulation/numba_backend.py.
+            - alive (np.ndarray): Mask of the alive bullets, which is
+            kept up to date. If None, a new mask is made.
         """
-        self.scalars = scalars
-        self.vectors = vectors
-        self.n_bullets = 0
+        self._physics_backend = resolve_backend(physics_backend)
         self._BULLET_LIFESPAN = plane_data["bullet_config"]["lifetime"]
         self._BULLET_COLL_RADIUS = plane_data["bullet_config"]["coll_radius"]
-        self.scalars[:, 9] += self._BULLET_COLL_RADIUS
-        
-    def tick(self, dt: float)-> None:
+        # a plane shoots at most one bullet per tick, which lives for
+        # the lifespan and the tick it was shot in
+        self._MAX_RING_SIZE = max(1, n_planes * (int(self._BULLET_LIFESPAN) + 1))
+        self.bind(scalars, vectors, alive)
+        self.fields.coll_radius[:] += self._BULLET_COLL_RADIUS
+        n_worlds = self._world.mass.shape[0]
+
+        self._tick = 0
+        # delta time of the last tick, bullets are assumed to be ticked
+        # with the same delta time throughout their lifetime
+        self._dt = 0.0
+        # next slot to write to and number of slots behind it that may
+        # still hold a bullet, per world
+        self._head = np.zeros(n_worlds, dtype=int)
+        self._span = np.zeros(n_worlds, dtype=int)
+        self._n_alive = np.zeros(n_worlds, dtype=int)
+        # the most bullets one world has spawned in a single tick
+        self._max_spawned = 1
+        self.n_slots = 0
+        # world and slot of the bullets of the last spawn
+        self._spawned = (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+
+    def bind(
+        self,
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        alive: np.ndarray|None = None,
+    )-> None:
+        """
+        Use new matrices for the bullets.
+
+        The rings are kept as they are, so every bullet has to be in the
+        same slot of the new matrices.
+
+        @params:
+            - scalars (np.ndarray): Scalars matrix of the bullets.
+            - vectors (np.ndarray): Vectors matrix of the bullets.
+            - alive (np.ndarray): Mask of the alive bullets, which is
+            kept up to date. If None, a new mask is made.
+        """
+        self.scalars = scalars
+        self.vectors = vectors
+        self.fields = Fields(scalars, vectors)
+        self.alive = alive if alive is not None else \
+            (self.fields.entity_type != EntityType.NOTHING) & \
+            (self.fields.coll_flag == -1)
+        # the rings are kept per world, without a world axis there is
+        # only a single world
+        if scalars.ndim == SCALARS_NDIM:
+            scalars = scalars[np.newaxis]
+            vectors = vectors[np.newaxis]
+        self._world = Fields(scalars, vectors)
+        self._alive = self.alive[np.newaxis] if self.alive.ndim == 1 else self.alive
+        # (column, world, bullet) views for the numba kernels
+        self._scalar_block = scalar_block(scalars)
+        self._vector_block = vector_block(vectors)
+        self.ring_size = max(1, min(scalars.shape[-2], self._MAX_RING_SIZE))
+
+    def grow(
+        self,
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        alive: np.ndarray,
+    )-> np.ndarray:
+        """
+        Move the bullets to matrices with more slots.
+
+        The new matrices hold a copy of the old ones in their first
+        slots, with empty slots after them. A ring that wraps around is
+        opened up at its head, moving the slots from the head on to the
+        end of the larger ring, so the bullets keep their order.
+
+        @params:
+            - scalars (np.ndarray): Scalars matrix of the bullets.
+            - vectors (np.ndarray): Vectors matrix of the bullets.
+            - alive (np.ndarray): Mask of the alive bullets, which is
+            kept up to date.
+
+        @returns:
+            - np.ndarray with the new slot of every old slot, with
+            shape (n_worlds, old ring size).
         """
-        Tick function to update cl0 of all bullets.
+        old_size = self.ring_size
+        self.bind(scalars, vectors, alive)
+        shift = self.ring_size - old_size
+        old_slots = np.arange(old_size)
+        moved = old_slots >= self._head[:, np.newaxis]
+        worlds, slots = np.nonzero(moved)
+        self._scalar_block[:, worlds, slots + shift] = \
+            self._scalar_block[:, worlds, slots]
+        self._vector_block[:, worlds, slots + shift] = \
+            self._vector_block[:, worlds, slots]
+        self._alive[worlds, slots + shift] = self._alive[worlds, slots]
+
+        # the slots in between the head and the moved slots are empty
+        new_slots = np.arange(self.ring_size)
+        gap = (new_slots >= self._head[:, np.newaxis]) & \
+            (new_slots < self._head[:, np.newaxis] + shift)
+        self._world.entity_type[:, :self.ring_size][gap] = EntityType.NOTHING
+        self._world.coll_flag[:, :self.ring_size][gap] = -1
+        self._alive[:, :self.ring_size][gap] = False
+        if np.any(self._head < self.n_slots):
+            self.n_slots += shift
+        return old_slots + shift * moved
+
+    def ring_size_needed(self, worlds: np.ndarray)-> int:
+        """
+        Size the rings need before bullets are spawned.
+
+        A ring is too small if spawning would overwrite a bullet that
+        may still be alive. Rings grow geometrically, so growing takes
+        amortized constant time per bullet, but never past the number
+        of bullets that can be in flight at once.
+
+        @params:
+            - worlds (np.ndarray): World index of each new bullet.
+
+        @returns:
+            - int with the number of slots per ring, self.ring_size if
+            the rings are large enough.
+        """
+        counts = np.bincount(worlds, minlength=self._head.shape[0])
+        needed = int(np.max(self._span + counts))
+        if needed <= self.ring_size:
+            return self.ring_size
+        return min(
+            max(needed, GROWTH_FACTOR * self.ring_size),
+            self._MAX_RING_SIZE,
+        )
+
+    @property
+    def n_bullets(self)-> int|np.ndarray:
+        """
+        Number of bullets alive at present time.
+
+        @returns:
+            - int, or np.ndarray with the number per world if there is
+            a leading world axis.
+        """
+        if self.scalars.ndim == SCALARS_NDIM:
+            return int(self._n_alive[0])
+        return self._n_alive.copy()
+
+    def tick(self, dt: float, frozen: np.ndarray|None = None)-> None:
+        """
+        Tick function to advance the clock of all bullets.
+
+        The bullets themselves are not touched, see positions().
 
         @params:
             - dt (float): Delta time, which controls the severity of the
             performed actions.
+            - frozen (np.ndarray): Mask of the worlds whose bullets keep
+            their age, so they stay where they are. If None, all
+            bullets age.
+        """
+        self._tick += 1
+        self._dt = dt
+        if frozen is not None:
+            self._world.spawn_tick[frozen, :self.n_slots] += 1
+        if self._tick >= MAX_TICK:
+            self.fields.spawn_tick[..., :self.n_slots] -= self._tick
+            self._tick = 0
+
+    def positions(self, index: tuple[np.ndarray, ...])-> np.ndarray:
+        """
+        Compute the current positions of bullets.
+
+        @params:
+            - index (tuple[np.ndarray, ...]): Index of the bullets in
+            the fields, e.g. as returned by np.nonzero().
+
+        @returns:
+            - np.ndarray with a position per bullet.
+        """
+        fields = self.fields
+        flight_time = self._dt * (self._tick - fields.spawn_tick[index])
+        return fields.spawn_pos[index] + \
+            fields.v[index] * flight_time[..., np.newaxis]
+
+    @property
+    def clock(self)-> tuple[int, float]:
+        """
+        Current tick and delta time.
+
+        @returns:
+            - int with the current tick.
+            - float with the delta time of the last tick.
         """
-        self.vectors[:self.n_bullets, 3] += \
-            dt * self.vectors[:self.n_bullets, 2]
+        return self._tick, self._dt
 
-    def spawn(self, vectors: np.ndarray)-> None:
+    def spawn(
+        self,
+        pos: np.ndarray,
+        v: np.ndarray,
+        worlds: np.ndarray|None = None,
+    )-> None:
         """
         Spawn function for new bullets.
 
-        Adds all bullet vectors in the front of the matrix and sets
-        flags where needed.
+        Writes all new bullets at the head of the ring of their world
+        and sets flags where needed. A full ring overwrites its oldest
+        bullets.
 
         @params:
-            - vectors (np.ndarray): Vectors with data of new bullets.
+            - pos (np.ndarray): Positions of the new bullets.
+            - v (np.ndarray): Velocities of the new bullets.
+            - worlds (np.ndarray): World index of each new bullet. Only
+            used when the matrices have a leading world axis.
         """
-        n = vectors.shape[0]
-        self.n_bullets += n
-        self.scalars[n:] = self.scalars[:-n]
-        self.vectors[n:] = self.vectors[:-n]
-        self.scalars[:n, 2] = 0
-        self.scalars[:n, 9] = self._BULLET_COLL_RADIUS
-        self.scalars[:n, 11] = 2
-        self.scalars[:n, 12] = -1
-        self.vectors[:n] = vectors
+        if worlds is None:
+            worlds = np.zeros(pos.shape[0], dtype=int)
+        n_worlds = self._head.shape[0]
 
-    def despawn(self)-> int:
+        # bullets of the same world are written to consecutive slots
+        order = np.argsort(worlds, kind="stable")
+        rank = np.empty_like(worlds)
+        rank[order] = np.arange(worlds.shape[0]) - \
+            np.searchsorted(worlds[order], worlds[order])
+        slots = (self._head[worlds] + rank) % self.ring_size
+        counts = np.bincount(worlds, minlength=n_worlds)
+
+        world = self._world
+        # overwritten bullets that were still alive are lost
+        self._n_alive -= np.bincount(
+            worlds,
+            weights=world.entity_type[worlds, slots] == EntityType.BULLET,
+            minlength=n_worlds,
+        ).astype(int)
+        world.spawn_tick[worlds, slots] = self._tick
+        world.coll_radius[worlds, slots] = self._BULLET_COLL_RADIUS
+        world.entity_type[worlds, slots] = EntityType.BULLET
+        world.coll_flag[worlds, slots] = -1
+        world.spawn_pos[worlds, slots] = pos
+        world.v[worlds, slots] = v
+        self._alive[worlds, slots] = True
+
+        self._n_alive += counts
+        self._head = (self._head + counts) % self.ring_size
+        self._span = np.minimum(self._span + counts, self.ring_size)
+        self._max_spawned = max(self._max_spawned, int(np.max(counts)))
+        self.n_slots = max(self.n_slots, int(np.max(slots)) + 1)
+        self._spawned = (worlds, slots)
+
+    def despawn(self)-> int|np.ndarray:
         """
         Despawn function for bullets.
         
-        Checks and marks all bullets that are dead and subtracts them
-        from total.
+        Checks and marks all bullets whose lifetime has expired and
+        subtracts them from total.
+
+        @returns:
+            int with number of destroyed bullets, or np.ndarray with
+            the number per world when there is a leading world axis.
+        """
+        if self._physics_backend == "numba":
+            n = despawn_bullets(
+                self._scalar_block,
+                self._alive,
+                self._head,
+                self._span,
+                self._n_alive,
+                self.ring_size,
+                self._max_spawned,
+                self._tick,
+                self._BULLET_LIFESPAN,
+            )
+            return int(n[0]) if self.scalars.ndim == SCALARS_NDIM else n
+
+        # bullets expire in the order they were spawned, so only the
+        # bullets spawned in a single tick at the tail can expire
+        tail = (self._head - self._span) % self.ring_size
+        window = np.arange(self._max_spawned)
+        worlds = np.arange(self._head.shape[0])[:, None]
+        slots = (tail[:, None] + window) % self.ring_size
+
+        passed = (window < self._span[:, None]) & (
+            self.age(self._world.spawn_tick[worlds, slots]) >
+            self._BULLET_LIFESPAN
+        )
+        # bullets that were freed before are passed over as well
+        expired = passed & (self._world.entity_type[worlds, slots] == EntityType.BULLET)
+        expired_index = (np.broadcast_to(worlds, slots.shape)[expired], slots[expired])
+        self._world.entity_type[expired_index] = EntityType.NOTHING
+        self._alive[expired_index] = False
+
+        n = np.count_nonzero(expired, axis=1)
+        self._n_alive -= n
+        self._span -= np.count_nonzero(passed, axis=1)
+        return int(n[0]) if self.scalars.ndim == SCALARS_NDIM else n
+
+    def free(self, index: tuple[np.ndarray, ...])-> None:
+        """
+        Free bullets that died before their lifetime expired.
+
+        @params:
+            - index (tuple[np.ndarray, ...]): Index of the bullets, as
+            returned by np.nonzero() on the bullet slots.
+        """
+        worlds = np.zeros_like(index[0]) if len(index) == 1 else index[0]
+        self._world.entity_type[worlds, index[-1]] = EntityType.NOTHING
+        self._alive[worlds, index[-1]] = False
+        self._n_alive -= np.bincount(worlds, minlength=self._head.shape[0])
+
+    def clear(self, worlds: np.ndarray|None = None)-> None:
+        """
+        Remove all bullets.
+
+        @params:
+            - worlds (np.ndarray): Index or mask of the worlds to clear.
+            If None, all worlds are cleared. Ignored when there is no
+            leading world axis.
+        """
+        clear_all = worlds is None or self.scalars.ndim == SCALARS_NDIM
+        if clear_all:
+            worlds = np.s_[:]
+        # the slots after n_slots never held a bullet
+        self._world.entity_type[worlds, :self.n_slots] = EntityType.NOTHING
+        self._world.coll_flag[worlds, :self.n_slots] = -1
+        self._alive[worlds, :self.n_slots] = False
+        if clear_all:
+            self.n_slots = 0
+        self._head[worlds] = 0
+        self._span[worlds] = 0
+        self._n_alive[worlds] = 0
+
+    def spawned(self)-> tuple[np.ndarray, np.ndarray]:
+        """
+        World and slot of the bullets of the last spawn.
+
+        @returns:
+            - np.ndarray with the world of each bullet, always 0 if
+            there is no leading world axis.
+            - np.ndarray with the slot of each bullet. Both are in the
+            order in which the bullets were passed to self.spawn().
+        """
+        return self._spawned
+
+    def age(self, spawn_tick: np.ndarray)-> np.ndarray:
+        """
+        Age of bullets in ticks.
+
+        The tick in which the bullet was spawned counts as the first.
+
+        @params:
+            - spawn_tick (np.ndarray): Spawn tick field of the bullets.
 
         @returns:
-            int with number of destroyed bullets.
+            - np.ndarray with the age of each bullet.
         """
-        # index 2 of scalars is being used as lifespan timer for bullets
-        self.scalars[:self.n_bullets, 2] += 1
-        n = np.count_nonzero(
-            self.scalars[:self.n_bullets, 2] > self._BULLET_LIFESPAN,
+        return self._tick - spawn_tick + 1
+
+    def get_state(self)-> tuple:
+        """
+        Snapshot of the ring buffers.
+
+        The bullets themselves are part of the matrices, which are not
+        included.
+
+        @returns:
+            - tuple with the tick and copies of all ring counters.
+        """
+        return (
+            self._tick,
+            self._head.copy(),
+            self._span.copy(),
+            self._n_alive.copy(),
+            self._max_spawned,
+            self.n_slots,
         )
-        self.scalars[self.n_bullets - n : self.n_bullets, 11] = -1
-        self.n_bullets -= n
-        return n
+
+    def set_state(self, state: tuple)-> None:
+        """
+        Restore the ring buffers from a snapshot.
+
+        The rings must have the size they had in the snapshot.
+
+        @params:
+            - state (tuple): Snapshot, as returned by self.get_state().
+        """
+        self._tick, head, span, n_alive, self._max_spawned, self.n_slots = state
+        self._head[:] = head
+        self._span[:] = span
+        self._n_alive[:] = n_alive
@@ -9,8 +9,39 @@ import numpy as np
 
 from simulation.airplanes import Airplanes
 from simulation.bullets import Bullets
+from simulation.entity_store import (
+    SCALARS_NDIM,
+    Action,
+    EntityStore,
+    EntityType,
+    Fields,
+    Scalar,
+)
+from simulation.impact_schedule import BOUNDARY, ImpactSchedule, first_impact
+from simulation.numba_backend import (
+    collide,
+    collide_planes,
+    first_impacts,
+    resolve_backend,
+    scalar_block,
+    vector_block,
+)
+from simulation.target_index import DENSE_THRESHOLD, TargetIndex
 from simulation.targets import Targets
 
+COLLISION_MODES = ("pairwise", "event")
+
+# entity types that can collide, in the order of their entity type flag
+ENTITY_TYPES = ("plane", "target", "bullet")
+# pairs of entity types that collide, bullets pass through each other
+DEFAULT_COLLISIONS = (
+    ("plane", "plane"),
+    ("plane", "target"),
+    ("plane", "bullet"),
+    ("target", "target"),
+    ("target", "bullet"),
+)
+
 
 class Entities:
     """
@@ -18,6 +49,29 @@ class Entities:
 
     This class contains all the entities needed for a simulation. It
     also contains some of the math required to make them act.
+    Multiple independent worlds can be simulated at once by giving the
+    matrices a leading world axis. Every world has the same layout of
+    planes, targets and bullets.
+
+    The entities are kept in an EntityStore, in which every column of
+    the matrices is its own contiguous array. The matrices are views on
+    the store. The store starts with few bullet slots and grows when
+    the rings of the bullets are too small, see Bullets. It shrinks back
+    when a respawn leaves no bullets in flight. A reallocated store
+    renews all views, so views on the matrices must not be kept around.
+
+    Collisions are found in one of two modes. In the "pairwise" mode
+    every pair of alive entities is tested every tick. In the "event"
+    mode the impacts of a bullet with the targets and the boundaries
+    are predicted when it is shot, see simulation/impact_schedule.py,
+    as bullets fly in a straight line and targets do not move. Every
+    tick, the bullets are only tested against the planes and the
+    impacts that are due are resolved. Bullets then no longer pass
+    through targets in between two ticks, and no longer hit each other.
+
+    Which entity types collide with each other is configurable, only
+    the pairs of types that collide are tested. By default bullets pass
+    through each other, see DEFAULT_COLLISIONS.
 
     @public member variables:
     + scalars (np.ndarray): numpy matrix with the following columns:
@@ -51,30 +105,62 @@ class Entities:
         7 - f_drag
         8 - f_lift
         9 - pitch_uv
+    + store (EntityStore): All fields of all entities, see
+    simulation/entity_store.py.
+    + alive (np.ndarray): Mask of the alive entities, with the shape
+    of a field. It is kept up to date whenever entities spawn or die,
+    so it never has to be derived from the flags. The airplanes,
+    targets and bullets have a view on their part of it.
     + n_planes (int): Number of planes alive.
     + n_targets (int): Number of targets alive.
-    + n_bullets (int): Number of bullets alive.
-    + n_total (int): Number of objects alive.
+    + n_bullets (int|np.ndarray): Number of bullets alive, per world
+    if there is a leading world axis.
+    + n_total (int|np.ndarray): Number of objects alive, per world if
+    there is a leading world axis.
     + self.airplanes (Airplanes): All airplanes present in simulation.
     + self.targets (Targets): All targets present in simulation.
     + self.bullets (Bullets): All bullets present in simulation.
+    + target_index (TargetIndex): Index over the positions of the
+    targets, rebuilt when they are respawned.
 
     @public methods:
-    + tick(self, dt: float, actions: np.ndarray)-> None:
+    + tick(
+        self,
+        dt: float,
+        actions: np.ndarray,
+        frozen: np.ndarray=None,
+      )-> None:
         Tick function to move all objects.
     + spawn_bullet(self, id)-> None:
         Spawn function for new bullets.
     + entity_collision(self)-> None:
         Check for, and resolve, entity collisions.
+    + respawn(
+        self,
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        worlds: np.ndarray=None,
+      )-> None:
+        Respawn planes and targets and remove all bullets in place.
+    + get_state(self)-> tuple:
+        Snapshot of all entities.
+    + set_state(self, state: tuple)-> None:
+        Restore all entities from a snapshot.
     """
 
     def __init__(
         self,
         scalars: np.ndarray,
         vectors: np.ndarray,
-        n_entities: int,
+        n_entities: int|None,
         boundaries: np.ndarray,
         plane_data: dict,
+        *,
+        dtype: type = np.float64,
+        physics_backend: str = "numpy",
+        integrator: str = "euler",
+        collision_mode: str = "pairwise",
+        collisions: tuple[tuple[str, str], ...] = DEFAULT_COLLISIONS,
     ) -> None:
         """
         Initialize the Entities class.
@@ -116,91 +202,332 @@ class Entities:
             7 - f_drag
             8 - f_lift
             9 - pitch_uv
-            - n_entities (int): Total number of entities present in
-            simulation at start.
+            Both matrices may have a leading world axis.
+            - n_entities (int): Number of slots per world the store
+            starts with, and shrinks back to. If None, there are slots
+            for the planes, the targets and a bullet per plane.
             - boundaries (np.ndarray): Simulation boundaries with
             shape[[domain_x],[domain_y]], e.g. [[0,1280],[0,720]].
             - plane_data (dict): See plane yamls in config/ for more
             information.
+            - dtype (type): Data type of the entity store, np.float32
+            halves the memory used.
+            - physics_backend (str): "numpy" or "numba". The numba
+            backend runs the airplane physics, bullet movement,
+            collisions and despawning as compiled loops, which is
+            faster for few entities. Falls back to "numpy" if numba is
+            not installed.
+            - integrator (str): Integrator of the airplane physics,
+            "euler", "midpoint" or "rk4", see Airplanes.
+            - collision_mode (str): "pairwise" or "event", see above.
+            - collisions (tuple[tuple[str, str], ...]): Pairs of entity
+            types that collide, types are one of ENTITY_TYPES. The order
+            within a pair does not matter.
         """
-        self.scalars = np.zeros((n_entities, scalars.shape[1]))
-        self.vectors = np.zeros((n_entities, vectors.shape[1], 2))
-        self.scalars[:,11] = -1
-        self.scalars[:,12] = -1
+        if collision_mode not in COLLISION_MODES:
+            raise ValueError(
+                f"`collision_mode` must be one of {COLLISION_MODES}.",
+            )
+        if any(t not in ENTITY_TYPES for pair in collisions for t in pair):
+            raise ValueError(
+                f"`collisions` must be pairs of {ENTITY_TYPES}.",
+            )
+        # all worlds share the same layout, so the first one is counted
+        n_spawned = scalars.shape[-2]
+        types = scalars[..., Scalar.ENTITY_TYPE].reshape(-1, n_spawned)[0]
+        self.n_planes = np.sum(types == EntityType.PLANE)
+        self.n_targets = np.sum(types == EntityType.TARGET)
 
-        self.scalars[:scalars.shape[0]] = scalars
-        self.vectors[:vectors.shape[0]] = vectors
+        # any leading axis is the world axis
+        worlds = scalars.shape[:-2]
+        if n_entities is None:
+            n_entities = n_spawned + max(1, self.n_planes)
+        self._n_entities = n_entities
+        self.store = EntityStore((*worlds, n_entities), dtype)
+        self.store.entity_type[:] = EntityType.NOTHING
+        self.store.coll_flag[:] = -1
+        self.store.scalars[..., :n_spawned, :] = scalars
+        self.store.vectors[..., :n_spawned, :, :] = vectors
+        self.alive = (self.store.entity_type != EntityType.NOTHING) & \
+            (self.store.coll_flag == -1)
 
         # has shape[[domain_x],[domain_y]], e.g. [[0,1280],[0,720]]
         self._boundaries = boundaries
 
-        self.n_planes = np.sum(scalars[:,11]==0)
-        self.n_targets = np.sum(scalars[:,11]==1)
-        self.n_bullets = 0
-        self.n_total = self.n_planes + self.n_targets
+        self._physics_backend = resolve_backend(physics_backend)
+        self._integrator = integrator
+        self._bind()
+        self._collision_mode = collision_mode
+        self._impacts = ImpactSchedule(self._world.mass.shape[0])
 
-        self.airplanes = Airplanes(
-            self.scalars[:self.n_planes],
-            self.vectors[:self.n_planes],
-        )
-        self.targets = Targets(
-            self.scalars[self.n_planes:self.n_planes+self.n_targets],
-            self.vectors[self.n_planes:self.n_planes+self.n_targets],
+        # which entity types collide, indexed by their entity type flags
+        self._collisions = np.zeros((len(ENTITY_TYPES),) * 2, dtype=bool)
+        for first, second in collisions:
+            i, j = ENTITY_TYPES.index(first), ENTITY_TYPES.index(second)
+            self._collisions[i, j] = self._collisions[j, i] = True
+        self._collision_pairs = tuple(
+            zip(*np.nonzero(np.triu(self._collisions)), strict=True),
         )
+
+        bullet_scalars, bullet_vectors, bullet_alive = self._bullet_views()
         self.bullets = Bullets(
-            self.scalars[self.n_planes + self.n_targets:],
-            self.vectors[self.n_planes + self.n_targets:],
+            bullet_scalars,
+            bullet_vectors,
             plane_data,
+            n_planes=self.n_planes,
+            physics_backend=self._physics_backend,
+            alive=bullet_alive,
+        )
+        self.target_index = TargetIndex(
+            self._world.mass.shape[0],
+            int(self.n_targets),
         )
+        self._build_target_index()
         # this is the bullet velocity relative to the plane, in m/s
         self._BULLET_SPEED_SCALER = plane_data["bullet_config"]["speed"]
         self._BULLET_COLL_RADIUS = plane_data["bullet_config"]["coll_radius"]
+        self._BULLET_LIFESPAN = plane_data["bullet_config"]["lifetime"]
+
+    def _bind(self)-> None:
+        """
+        Take the views on the store and the alive mask.
 
-    def tick(self, dt: float, actions: np.ndarray)-> None:
+        Creates the planes and targets on their part of the store. Has
+        to be called again whenever the store is reallocated, together
+        with Bullets.bind() or Bullets.grow().
+        """
+        self.scalars = self.store.scalars
+        self.vectors = self.store.vectors
+        self._alive = self.alive[np.newaxis] if self.alive.ndim == 1 else self.alive
+        # (column, world, entity) views for the numba kernels
+        self._scalar_block = scalar_block(self.scalars)
+        self._vector_block = vector_block(self.vectors)
+
+        # the impacts are scheduled per world, without a world axis
+        # there is only a single world
+        if self.scalars.ndim == SCALARS_NDIM:
+            self._world = Fields(self.scalars[np.newaxis], self.vectors[np.newaxis])
+        else:
+            self._world = Fields(self.scalars, self.vectors)
+
+        n_static = self.n_planes + self.n_targets
+        self.airplanes = Airplanes(
+            self.scalars[..., :self.n_planes, :],
+            self.vectors[..., :self.n_planes, :, :],
+            self._physics_backend,
+            self._integrator,
+            self.alive[..., :self.n_planes],
+        )
+        self.targets = Targets(
+            self.scalars[..., self.n_planes:n_static, :],
+            self.vectors[..., self.n_planes:n_static, :, :],
+            self.alive[..., self.n_planes:n_static],
+        )
+
+    def _bullet_views(self)-> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        View the bullet slots of the store and the alive mask.
+
+        @returns:
+            - np.ndarray with the scalars of the bullet slots.
+            - np.ndarray with the vectors of the bullet slots.
+            - np.ndarray with the alive mask of the bullet slots.
+        """
+        n_static = self.n_planes + self.n_targets
+        return (
+            self.scalars[..., n_static:, :],
+            self.vectors[..., n_static:, :, :],
+            self.alive[..., n_static:],
+        )
+
+    def _resize(self, n: int)-> None:
+        """
+        Reallocate the store and the alive mask for n slots per world.
+
+        The first slots are kept and new slots are empty. The views of
+        the bullets still have to be renewed.
+
+        @params:
+            - n (int): New number of slots, per world.
+        """
+        old = self.store.scalars.shape[-2]
+        self.store.resize(n)
+        self.store.entity_type[..., old:] = EntityType.NOTHING
+        self.store.coll_flag[..., old:] = -1
+        kept = min(n, old)
+        alive = np.zeros(self.store.entity_type.shape, dtype=bool)
+        alive[..., :kept] = self.alive[..., :kept]
+        self.alive = alive
+        self._bind()
+
+    @property
+    def n_bullets(self)-> int|np.ndarray:
+        """
+        Number of bullets alive.
+
+        @returns:
+            - int, or np.ndarray with the number per world if there is
+            a leading world axis.
+        """
+        return self.bullets.n_bullets
+
+    @property
+    def n_total(self)-> int|np.ndarray:
+        """
+        Number of objects alive.
+
+        @returns:
+            - int, or np.ndarray with the number per world if there is
+            a leading world axis.
+        """
+        return self.n_planes + self.n_targets + self.n_bullets
+
+    def tick(
+        self,
+        dt: float,
+        actions: np.ndarray,
+        frozen: np.ndarray|None = None,
+    )-> None:
         """
         Tick function to move all objects.
         
         Performs list of actions on all objects, to the extent the delta
         allows for.
 
+        Frozen planes are left as they are and their actions are
+        ignored. A world of which all planes are frozen is left as it
+        is as a whole, its bullets keep their age and their impacts are
+        delayed. Nothing in a frozen world can collide in the tick, as
+        its collisions were resolved for the same positions before.
+
         @params:
             - dt (float): Delta time, which controls the severity of the
             performed actions.
             - actions (np.ndarray): List of actions corresponding to the
             number of planes.
+            - frozen (np.ndarray): Mask of the frozen planes, with the
+            shape of self.airplanes.alive. If None, no plane is frozen.
         """
+        frozen_worlds = None
+        if frozen is not None and np.any(frozen):
+            planes = self.airplanes
+            kept = (planes.scalars[frozen], planes.vectors[frozen])
+            actions = actions.copy()
+            actions[frozen.reshape(-1)[actions[:, 0]], 1] = 0
+            frozen_worlds = np.all(frozen.reshape(-1, self.n_planes), axis=1)
+
         self.airplanes.tick(dt, actions)
-        self.bullets.tick(dt)
+        if frozen_worlds is not None:
+            planes.scalars[frozen], planes.vectors[frozen] = kept
+        self.bullets.tick(dt, frozen_worlds)
+        self._impacts.tick(frozen_worlds)
 
         self.entity_collision()
 
-        shoot_id = actions[actions[:, 1] == 5]
+        shoot_id = actions[actions[:, 1] == Action.SHOOT]
         if shoot_id.shape[0]!=0:
             self.spawn_bullet(shoot_id[:,0])
-        self.n_total += self.bullets.despawn()
+        self.bullets.despawn()
 
-    def spawn_bullet(self, id: int)-> None:
+    def spawn_bullet(self, id: np.ndarray)-> None:
         """
         Spawn function for new bullets.
 
         Create all bullet vectors and pass to self.bullets.
 
         @params:
-            - id (int): id of plane that shot the bullets.
+            - id (np.ndarray): ids of planes that shot the bullets.
+            With a leading world axis, the id is the index in the
+            flattened (world, plane) axes.
         """
+        planes = self.airplanes.fields
+        plane = np.unravel_index(id, planes.pitch.shape)
+        v_uv = planes.v_uv[plane]
         # the `+ 2` is to make sure there is extra distance between the
         # bounding box of the plane and the radius of the bullet, as to
         # prevent the plane from shooting itself
-        pos = self.vectors[id, 3] + self.vectors[id, 4] * \
-            (self.scalars[id, 9][:, None] + self._BULLET_COLL_RADIUS + 2)
-        v = self.vectors[id, 2] + \
-            (self._BULLET_SPEED_SCALER * self.vectors[id, 4])
-        vectors = np.zeros((id.shape[0], self.vectors.shape[1], 2))
-        vectors[:, 3] = pos
-        vectors[:, 2] = v
-        self.n_bullets += id.shape[0]
-        self.n_total += id.shape[0]
-        self.bullets.spawn(vectors)
+        pos = planes.pos[plane] + v_uv * \
+            (planes.coll_radius[plane][:, None] + self._BULLET_COLL_RADIUS + 2)
+        v = planes.v[plane] + (self._BULLET_SPEED_SCALER * v_uv)
+        worlds = np.zeros_like(id) if self.scalars.ndim == SCALARS_NDIM else plane[0]
+        ring_size = self.bullets.ring_size_needed(worlds)
+        if ring_size > self.bullets.ring_size:
+            self._resize(self.n_planes + self.n_targets + ring_size)
+            self._impacts.remap(self.bullets.grow(*self._bullet_views()))
+        self.bullets.spawn(pos, v, worlds)
+
+        if self._collision_mode == "event":
+            worlds, slots = self.bullets.spawned()
+            self._schedule_impacts(
+                worlds,
+                slots,
+                np.full(worlds.shape[0], self._impacts.now),
+                self._target_alive(),
+            )
+
+    def _schedule_impacts(
+        self,
+        worlds: np.ndarray,
+        slots: np.ndarray,
+        spawned: np.ndarray,
+        target_alive: np.ndarray,
+    )-> None:
+        """
+        Schedule the next impact of bullets.
+
+        Only impacts after the current tick and within the lifetime of
+        the bullets are scheduled.
+
+        @params:
+            - worlds (np.ndarray): World of each bullet.
+            - slots (np.ndarray): Slot of each bullet.
+            - spawned (np.ndarray): Tick of the impact schedule in which
+            each bullet was spawned.
+            - target_alive (np.ndarray): Which targets can be hit, per
+            world.
+        """
+        world = self._world
+        n_static = self.n_planes + self.n_targets
+        bullets = slots + n_static
+        first = self._impacts.now - spawned + 1
+        _, dt = self.bullets.clock
+        if self._physics_backend == "numba":
+            ticks, hit = first_impacts(
+                self._scalar_block,
+                self._vector_block,
+                worlds,
+                bullets,
+                first,
+                target_alive,
+                self.n_planes,
+                self._boundaries,
+                dt,
+            )
+        else:
+            targets = np.s_[self.n_planes:n_static]
+            ticks, hit = first_impact(
+                world.spawn_pos[worlds, bullets],
+                world.v[worlds, bullets],
+                world.coll_radius[worlds, bullets],
+                world.pos[worlds, targets],
+                np.where(
+                    target_alive[worlds],
+                    world.coll_radius[worlds, targets],
+                    np.nan,
+                ),
+                self._boundaries,
+                dt,
+                first,
+            )
+
+        scheduled = ticks <= self._BULLET_LIFESPAN
+        self._impacts.push(
+            worlds[scheduled],
+            slots[scheduled],
+            spawned[scheduled],
+            spawned[scheduled] + ticks[scheduled].astype(int),
+            hit[scheduled],
+        )
 
     def entity_collision(self)-> None:
         """
@@ -211,24 +538,398 @@ class Entities:
         the map boundaries are not objects, they will not be killed.
         Instead the source object gets killed.
         """
-        mask = (self.scalars[:, 11] != -1) & (self.scalars[:, 12] == -1)
-        vectors = self.vectors[mask]
-        scalars = self.scalars[mask]
+        n_static = self.n_planes + self.n_targets
+        if self._collision_mode == "event":
+            # found before any flag is set, so all collisions see the
+            # same state
+            bullet_collision = self._collide_bullets()
+            n = n_static
+        else:
+            # slots beyond the last used bullet slot are always empty
+            n = n_static + self.bullets.n_slots
 
-        pos = vectors[:, 3]
-        radii = scalars[:, 9]
+        if self._physics_backend == "numba":
+            tick, dt = self.bullets.clock
+            worlds, slots = collide(
+                self._scalar_block,
+                self._vector_block,
+                self._alive,
+                n,
+                self._boundaries,
+                self.n_planes,
+                self.n_planes + self.n_targets,
+                tick,
+                dt,
+                self._collisions,
+            )
+            dead = (slots,) if self.scalars.ndim == SCALARS_NDIM else (worlds, slots)
+        else:
+            dead = self._collide(n)
 
-        d = np.sum((pos[:, np.newaxis] - pos) ** 2, axis=2)
-        r = (radii[:, np.newaxis] + radii) ** 2
-        np.fill_diagonal(r, -1)
-        collision = np.any(d < r, axis=1)
+        if self._collision_mode == "event":
+            if len(dead) == 1:
+                dead = (np.zeros_like(dead[0]), *dead)
+            bullet_collision[dead] = True
+            self._world.coll_flag[:, :bullet_collision.shape[1]][
+                bullet_collision
+            ] = 1
+            dead = np.nonzero(bullet_collision)
+            if self.scalars.ndim == SCALARS_NDIM:
+                dead = dead[1:]
+
+        self.alive[dead] = False
+        dead_targets = (dead[-1] >= self.n_planes) & (dead[-1] < n_static)
+        if np.any(dead_targets):
+            self.target_index.remove(
+                dead[0][dead_targets] if len(dead) > 1 else 0,
+                dead[-1][dead_targets] - self.n_planes,
+            )
+
+        # bullets that hit something are freed right away
+        dead_bullets = dead[-1] >= n_static
+        if np.any(dead_bullets):
+            self.bullets.free(
+                (
+                    *(index[dead_bullets] for index in dead[:-1]),
+                    dead[-1][dead_bullets] - n_static,
+                ),
+            )
+
+    def _collide_bullets(self)-> np.ndarray:
+        """
+        Check for collisions of bullets, using their impact schedule.
+
+        Bullets are tested against the planes, which do not fly in a
+        straight line, and the impacts that are due are resolved. The
+        collision flags are left untouched.
+
+        @returns:
+            - np.ndarray with a mask of the entities that died, with
+            shape (n_worlds, n), in which n is the number of slots that
+            may contain an entity.
+        """
+        n_planes = self.n_planes
+        n_static = self.n_planes + self.n_targets
+        n = n_static + self.bullets.n_slots
+        world = self._world
+        dead = np.zeros(world.coll_flag[:, :n].shape, dtype=bool)
+
+        if self._collisions[0, 2] and self._physics_backend == "numba":
+            tick, dt = self.bullets.clock
+            worlds, bullets, planes = collide_planes(
+                self._scalar_block,
+                self._vector_block,
+                self._alive,
+                n_planes,
+                n_static,
+                n,
+                tick,
+                dt,
+            )
+        elif self._collisions[0, 2]:
+            worlds, bullets, planes = self._collide_planes(n)
+        else:
+            worlds = bullets = planes = np.zeros(0, dtype=int)
+        dead[worlds, bullets] = True
+        dead[worlds, planes] = True
+
+        worlds, slots, spawned, targets = self._impacts.pop_due()
+        while worlds.shape[0] != 0:
+            # the bullet may have died, or its slot may have been reused
+            # by another bullet since the impact was scheduled
+            bullets = n_static + slots
+            valid = self._alive[worlds, bullets] & (
+                self.bullets.age(world.spawn_tick[worlds, bullets]) ==
+                self._impacts.now - spawned + 1
+            )
+            boundary = targets == BOUNDARY
+            target_alive = self._target_alive()
+            hit = valid & (
+                boundary | target_alive[worlds, np.maximum(targets, 0)]
+            )
+            dead[worlds[hit], bullets[hit]] = True
+            hit &= ~boundary
+            dead[worlds[hit], n_planes + targets[hit]] = True
+
+            # the target died before the bullet reached it, so the
+            # bullet flies on to the next target
+            missed = valid & ~boundary & ~hit
+            if not np.any(missed):
+                break
+            self._schedule_impacts(
+                worlds[missed],
+                slots[missed],
+                spawned[missed],
+                target_alive,
+            )
+            worlds, slots, spawned, targets = self._impacts.pop_due()
+        return dead
+
+    def _collide_planes(self, n: int)-> tuple[np.ndarray, ...]:
+        """
+        Find the bullets that hit a plane, using NumPy.
+
+        The collision flags are left untouched.
+
+        @params:
+            - n (int): Number of slots, counted from the first, that
+            may contain an entity.
+
+        @returns:
+            - np.ndarray with the world of each bullet that hit a plane.
+            - np.ndarray with the slot of the bullet.
+            - np.ndarray with the slot of the plane.
+        """
+        world = self._world
+        n_static = self.n_planes + self.n_targets
+        bullets = np.s_[n_static:n]
+        planes = np.s_[:self.n_planes]
+        alive = self._alive[:, :n]
+
+        # every bullet slot is tested, gathering the alive bullets first
+        # is slower, see Bullets.positions() for their positions. The
+        # axes are handled separately, which is faster than broadcasting
+        # over the trailing axis of size 2
+        tick, dt = self.bullets.clock
+        flight_time = dt * (tick - world.spawn_tick[:, bullets])
+        spawn_pos = world.spawn_pos[:, bullets]
+        v = world.v[:, bullets]
+        plane_pos = world.pos[:, np.newaxis, planes]
+        dx = (spawn_pos[..., 0] + v[..., 0] * flight_time)[..., np.newaxis] - \
+            plane_pos[..., 0]
+        dy = (spawn_pos[..., 1] + v[..., 1] * flight_time)[..., np.newaxis] - \
+            plane_pos[..., 1]
+        radii = world.coll_radius[:, bullets, np.newaxis] + \
+            world.coll_radius[:, np.newaxis, planes]
+        collision = alive[:, bullets, np.newaxis] & \
+            alive[:, np.newaxis, planes] & (dx * dx + dy * dy < radii * radii)
+        worlds, slots, plane = np.nonzero(collision)
+        return worlds, n_static + slots, plane
+
+    def _target_alive(self)-> np.ndarray:
+        """
+        Which targets are alive and can be hit by bullets.
+
+        @returns:
+            - np.ndarray with a mask of the targets, with shape
+            (n_worlds, n_targets).
+        """
+        targets = np.s_[self.n_planes:self.n_planes + self.n_targets]
+        return self._alive[:, targets] & self._collisions[1, 2]
+
+    def _collide(self, n: int)-> tuple[np.ndarray, ...]:
+        """
+        Check for collisions and set the collision flags, using NumPy.
+
+        Every pair of entity types that collide is tested as a block of
+        its own, e.g. all bullets against all targets of every world,
+        see self._collision_pairs.
+
+        @params:
+            - n (int): Number of slots, counted from the first, that
+            may contain an entity.
+
+        @returns:
+            - tuple[np.ndarray, ...] with the index of the entities that
+            died, as returned by np.nonzero().
+        """
+        world = self._world
+        n_static = self.n_planes + self.n_targets
+        alive = self._alive[:, :n]
+
+        # bullets are not moved, their positions follow from the position
+        # and tick they were spawned in, see Bullets.positions(). The axes
+        # are handled separately, which is faster than broadcasting over
+        # the trailing axis of size 2
+        tick, dt = self.bullets.clock
+        flight_time = dt * (tick - world.spawn_tick[:, n_static:n])
+        x = world.pos[:, :n, 0].copy()
+        y = world.pos[:, :n, 1].copy()
+        x[:, n_static:] += world.v[:, n_static:n, 0] * flight_time
+        y[:, n_static:] += world.v[:, n_static:n, 1] * flight_time
+        radii = world.coll_radius[:, :n]
+
+        collision = np.zeros_like(alive)
+        # the slots of each entity type, in the order of their type flag
+        types = (
+            np.s_[0:self.n_planes],
+            np.s_[self.n_planes:n_static],
+            np.s_[n_static:n],
+        )
+        for first_type, second_type in self._collision_pairs:
+            first, second = types[first_type], types[second_type]
+            if EntityType.TARGET in (first_type, second_type) and \
+                    self.n_targets > DENSE_THRESHOLD:
+                # targets never move, they are looked up in the index
+                other = first_type if second_type == EntityType.TARGET else second_type
+                self._query_targets(x, y, alive, types[other], collision)
+                continue
+
+            dx = x[:, first, np.newaxis] - x[:, np.newaxis, second]
+            dy = y[:, first, np.newaxis] - y[:, np.newaxis, second]
+            r = radii[:, first, np.newaxis] + radii[:, np.newaxis, second]
+            hit = alive[:, first, np.newaxis] & alive[:, np.newaxis, second] & \
+                (dx * dx + dy * dy < r * r)
+            if first_type == second_type:
+                hit &= ~np.eye(hit.shape[1], dtype=bool)
+            collision[:, first] |= np.any(hit, axis=2)
+            collision[:, second] |= np.any(hit, axis=1)
 
         bounds = (
-            pos[:, 0] <= self._boundaries[0, 0]) | (
-            pos[:, 0] >= self._boundaries[0, 1]) | (
-            pos[:, 1] <= self._boundaries[1, 0]) | (
-            pos[:, 1] >= self._boundaries[1, 1]
+            x <= self._boundaries[0, 0]) | (
+            x >= self._boundaries[0, 1]) | (
+            y <= self._boundaries[1, 0]) | (
+            y >= self._boundaries[1, 1]
         )
 
         # -1 when no collision, 1 when collision
-        self.scalars[mask, 12] = np.where(collision | bounds, 1, -1)
+        dead = alive & (collision | bounds)
+        world.coll_flag[:, :n][dead] = 1
+        dead = np.nonzero(dead)
+        return dead[1:] if self.scalars.ndim == SCALARS_NDIM else dead
+
+    def _query_targets(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        alive: np.ndarray,
+        slots: slice,
+        collision: np.ndarray,
+    )-> None:
+        """
+        Find the entities that hit a target, using the target index.
+
+        @params:
+            - x (np.ndarray): x position of all entities, per world.
+            - y (np.ndarray): y position of all entities, per world.
+            - alive (np.ndarray): Mask of the alive entities, per world.
+            - slots (slice): Slots of the entities to test, all of the
+            same type.
+            - collision (np.ndarray): Mask of the entities that collide,
+            per world, which is updated in place.
+        """
+        worlds, index = np.nonzero(alive[:, slots])
+        index += slots.start
+        query, target = self.target_index.overlap(
+            worlds,
+            x[worlds, index],
+            y[worlds, index],
+            self._world.coll_radius[worlds, index],
+        )
+        target += self.n_planes
+        # a target does not collide with itself
+        hit = index[query] != target
+        query, target = query[hit], target[hit]
+        collision[worlds[query], index[query]] = True
+        collision[worlds[query], target] = True
+
+    def respawn(
+        self,
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        worlds: np.ndarray|None = None,
+    )-> None:
+        """
+        Respawn planes and targets and remove all bullets in place.
+
+        Overwrites the plane and target rows with freshly spawned ones
+        and kills all bullets, without reallocating the matrices.
+
+        @params:
+            - scalars (np.ndarray): Scalars of the respawned planes and
+            targets, in the same layout as they were first created.
+            - vectors (np.ndarray): Vectors of the respawned planes and
+            targets, in the same layout as they were first created.
+            - worlds (np.ndarray): Index or mask of the worlds to
+            respawn. If None, all worlds are respawned. Ignored when
+            there is no leading world axis.
+        """
+        if self.scalars.ndim == SCALARS_NDIM:
+            spawned = np.s_[:scalars.shape[-2]]
+        else:
+            spawned = np.s_[
+                np.s_[:] if worlds is None else worlds,
+                :scalars.shape[-2],
+            ]
+
+        self.scalars[spawned] = scalars
+        self.vectors[spawned] = vectors
+        self.alive[spawned] = (scalars[..., Scalar.ENTITY_TYPE] != EntityType.NOTHING) & \
+            (scalars[..., Scalar.COLL_FLAG] == -1)
+        self.airplanes.update_gravity()
+
+        self.bullets.clear(worlds)
+        self._impacts.clear(None if self.scalars.ndim == SCALARS_NDIM else worlds)
+        # without bullets in flight the store shrinks to its first size
+        if self.store.scalars.shape[-2] > self._n_entities and \
+                not np.any(self.n_bullets):
+            self.bullets.clear()
+            self._impacts.clear()
+            self._resize(self._n_entities)
+            self.bullets.bind(*self._bullet_views())
+        self._build_target_index(None if self.scalars.ndim == SCALARS_NDIM else worlds)
+
+    def _build_target_index(self, worlds: np.ndarray|None = None)-> None:
+        """
+        Build the target index from the fields of the targets.
+
+        @params:
+            - worlds (np.ndarray): Index or mask of the worlds to build.
+            If None, all worlds are built.
+        """
+        world = self._world
+        targets = np.s_[
+            np.s_[:] if worlds is None else worlds,
+            self.n_planes:self.n_planes + self.n_targets,
+        ]
+        self.target_index.build(
+            world.pos[targets],
+            world.coll_radius[targets],
+            self._alive[targets],
+            worlds,
+        )
+
+    def get_state(self)-> tuple:
+        """
+        Snapshot of all entities.
+
+        Only the slots that may contain an entity are copied, so the
+        snapshot is as small as the number of bullets in flight allows.
+
+        @returns:
+            - tuple with copies of the fields of the used slots, the
+            number of slots of the store, the state of the bullet ring
+            buffers and the impact schedule.
+        """
+        n = self.n_planes + self.n_targets + self.bullets.n_slots
+        return (
+            self.store.copy(n),
+            self.store.scalars.shape[-2],
+            self.bullets.get_state(),
+            self._impacts.get_state(),
+        )
+
+    def set_state(self, state: tuple)-> None:
+        """
+        Restore all entities from a snapshot.
+
+        @params:
+            - state (tuple): Snapshot, as returned by self.get_state().
+        """
+        fields, n_entities, bullet_state, impact_state = state
+        # the rings of the bullets need the size they had in the snapshot
+        if n_entities != self.store.scalars.shape[-2]:
+            self._resize(n_entities)
+            self.bullets.bind(*self._bullet_views())
+        # slots that were taken into use after the snapshot are emptied
+        n_snapshot = fields[0].shape[-1]
+        n = self.n_planes + self.n_targets + self.bullets.n_slots
+        self.store.entity_type[..., n_snapshot:n] = EntityType.NOTHING
+        self.store.coll_flag[..., n_snapshot:n] = -1
+
+        self.store.restore(fields)
+        self.alive[:] = (self.store.entity_type != EntityType.NOTHING) & \
+            (self.store.coll_flag == -1)
+        self.bullets.set_state(bullet_state)
+        self._impacts.set_state(impact_state)
+        self._build_target_index()
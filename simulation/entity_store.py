@@ -0,0 +1,249 @@
+"""
+Entity store module.
+
+This module names the columns of the scalars and vectors matrices that
+describe all entities, the entity types and the actions of the planes,
+and contains the EntityStore class, which keeps every column in its own
+contiguous array.
+"""
+
+from enum import IntEnum
+
+import numpy as np
+
+# number of axes of a scalars and a vectors matrix without a leading
+# world axis
+SCALARS_NDIM = 2
+VECTORS_NDIM = 3
+
+
+class Scalar(IntEnum):
+    """
+    Columns of the scalars matrix.
+
+    Column 2 is used differently per entity type, hence its aliases.
+    """
+
+    MASS = 0
+    CONST_DRAG = 1
+    CONST_LIFT = 2
+    # bullets keep the tick in which they were spawned here
+    SPAWN_TICK = 2
+    CL0 = 3
+    CD_MIN = 4
+    ENGINE_FORCE = 5
+    AGILITY = 6
+    THROTTLE = 7
+    PITCH = 8
+    COLL_RADIUS = 9
+    AOA_DEG = 10
+    # see EntityType
+    ENTITY_TYPE = 11
+    # -1 = alive, 1 if collision
+    COLL_FLAG = 12
+    DEBUG = 13
+
+
+class Vector(IntEnum):
+    """
+    Columns of the vectors matrix.
+
+    Column 3 is used differently per entity type, hence its alias.
+    """
+
+    AOA_CRIT_LOW = 0
+    AOA_CRIT_HIGH = 1
+    V = 2
+    POS = 3
+    # bullets are not moved, they keep the position in which they were
+    # spawned here
+    SPAWN_POS = 3
+    V_UV = 4
+    F_GRAVITY = 5
+    F_ENGINE = 6
+    F_DRAG = 7
+    F_LIFT = 8
+    PITCH_UV = 9
+
+
+class EntityType(IntEnum):
+    """Values of the entity_type column."""
+
+    NOTHING = -1
+    PLANE = 0
+    TARGET = 1
+    BULLET = 2
+    ENVIRONMENT = 3
+
+
+class Action(IntEnum):
+    """Actions of the planes."""
+
+    NOTHING = 0
+    PITCH_UP = 1
+    PITCH_DOWN = 2
+    THROTTLE_UP = 3
+    THROTTLE_DOWN = 4
+    SHOOT = 5
+
+
+class Fields:
+    """
+    Named views on the columns of a scalars and vectors matrix.
+
+    Every column of Scalar and Vector, aliases included, is a public
+    member variable named after its lowercase name, e.g. fields.pitch,
+    fields.spawn_tick or fields.pos. Scalar fields have the shape of
+    the matrix without its last axis, vector fields have a trailing
+    axis of size 2. Since they are views, writing to a field writes to
+    the matrix.
+
+    @public member variables:
+    + mass, const_drag, const_lift, spawn_tick, cl0, cd_min,
+    engine_force, agility, throttle, pitch, coll_radius, aoa_deg,
+    entity_type, coll_flag, debug (np.ndarray): Scalar fields.
+    + aoa_crit_low, aoa_crit_high, v, pos, spawn_pos, v_uv, f_gravity,
+    f_engine, f_drag, f_lift, pitch_uv (np.ndarray): Vector fields.
+    """
+
+    def __init__(self, scalars: np.ndarray, vectors: np.ndarray)-> None:
+        """
+        Initialize the Fields class.
+
+        @params:
+            - scalars (np.ndarray): Scalars matrix, columns as in Scalar.
+            - vectors (np.ndarray): Vectors matrix, columns as in Vector.
+        """
+        for name, column in Scalar.__members__.items():
+            setattr(self, name.lower(), scalars[..., column])
+        for name, column in Vector.__members__.items():
+            setattr(self, name.lower(), vectors[..., column, :])
+
+
+class EntityStore(Fields):
+    """
+    Struct of arrays entity store.
+
+    Every field of the entities is kept in its own contiguous array, so
+    reading or writing a field of all entities never touches any of the
+    other fields. The scalars and vectors matrices are strided views on
+    these arrays, for code that works with whole entities.
+
+    @public member variables:
+    + scalars (np.ndarray): View with the Scalar fields as columns,
+    shape (..., n_entities, 14).
+    + vectors (np.ndarray): View with the Vector fields as columns,
+    shape (..., n_entities, 10, 2).
+    + nbytes (int): Number of bytes used by all fields.
+    + All fields, see Fields.
+
+    @public methods:
+    + copy(n: int)-> tuple[np.ndarray, np.ndarray]
+        Copy the fields of the first n entities.
+    + restore(fields: tuple[np.ndarray, np.ndarray])-> None
+        Overwrite the fields of the first entities with a copy.
+    + resize(n: int)-> None
+        Reallocate all fields for n entities.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        dtype: type = np.float64,
+    )-> None:
+        """
+        Initialize the EntityStore class.
+
+        All fields are zero.
+
+        @params:
+            - shape (tuple[int, ...]): Shape of a scalar field, e.g.
+            (n_entities,) or (n_worlds, n_entities).
+            - dtype (type): Data type of all fields, np.float32 halves
+            the memory used.
+        """
+        self._set_fields(
+            np.zeros((len(Scalar), *shape), dtype=dtype),
+            np.zeros((len(Vector), *shape, 2), dtype=dtype),
+        )
+
+    def _set_fields(
+        self,
+        scalar_fields: np.ndarray,
+        vector_fields: np.ndarray,
+    )-> None:
+        """
+        Use new arrays for all fields and renew all views on them.
+
+        @params:
+            - scalar_fields (np.ndarray): Scalar fields, one per row.
+            - vector_fields (np.ndarray): Vector fields, one per row.
+        """
+        self._scalar_fields = scalar_fields
+        self._vector_fields = vector_fields
+        self.scalars = np.moveaxis(self._scalar_fields, 0, -1)
+        self.vectors = np.moveaxis(self._vector_fields, 0, -2)
+        super().__init__(self.scalars, self.vectors)
+
+    @property
+    def nbytes(self)-> int:
+        """
+        Number of bytes used by all fields.
+
+        @returns:
+            - int with the number of bytes.
+        """
+        return self._scalar_fields.nbytes + self._vector_fields.nbytes
+
+    def copy(self, n: int)-> tuple[np.ndarray, np.ndarray]:
+        """
+        Copy the fields of the first n entities.
+
+        @params:
+            - n (int): Number of entities, counted from the first.
+
+        @returns:
+            - np.ndarray with a copy of the scalar fields.
+            - np.ndarray with a copy of the vector fields.
+        """
+        return (
+            self._scalar_fields[..., :n].copy(),
+            self._vector_fields[..., :n, :].copy(),
+        )
+
+    def restore(self, fields: tuple[np.ndarray, np.ndarray])-> None:
+        """
+        Overwrite the fields of the first entities with a copy.
+
+        @params:
+            - fields (tuple[np.ndarray, np.ndarray]): Copy of the
+            fields, as returned by self.copy().
+        """
+        scalar_fields, vector_fields = fields
+        n = scalar_fields.shape[-1]
+        self._scalar_fields[..., :n] = scalar_fields
+        self._vector_fields[..., :n, :] = vector_fields
+
+    def resize(self, n: int)-> None:
+        """
+        Reallocate all fields for n entities.
+
+        The fields of the first entities are kept and those of new
+        entities are zero. All views are renewed, views that were taken
+        before keep pointing to the old fields.
+
+        @params:
+            - n (int): New number of entities, per world.
+        """
+        scalar_fields = np.zeros(
+            (*self._scalar_fields.shape[:-1], n),
+            dtype=self._scalar_fields.dtype,
+        )
+        vector_fields = np.zeros(
+            (*self._vector_fields.shape[:-2], n, 2),
+            dtype=self._vector_fields.dtype,
+        )
+        kept = min(n, self._scalar_fields.shape[-1])
+        scalar_fields[..., :kept] = self._scalar_fields[..., :kept]
+        vector_fields[..., :kept, :] = self._vector_fields[..., :kept, :]
+        self._set_fields(scalar_fields, vector_fields)
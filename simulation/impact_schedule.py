@@ -0,0 +1,278 @@
+"""
+Impact schedule module.
+
+This module contains the ImpactSchedule class, a priority queue of the
+ticks in which bullets hit a target or leave the simulation boundaries,
+and the first_impact() function that predicts these ticks.
+"""
+
+import heapq
+
+import numpy as np
+
+# target of an impact with the simulation boundaries
+BOUNDARY = -1
+
+
+def first_impact(
+    pos: np.ndarray,
+    v: np.ndarray,
+    radii: np.ndarray,
+    target_pos: np.ndarray,
+    target_radii: np.ndarray,
+    boundaries: np.ndarray,
+    dt: float,
+    first: np.ndarray,
+)-> tuple[np.ndarray, np.ndarray]:
+    """
+    Predict the first impact of bullets that fly in a straight line.
+
+    The position of a bullet k ticks after it was spawned is
+    pos + v * dt * k. A bullet hits a target in tick k if its path
+    overlaps the target at any time between tick k - 1 and tick k, so
+    bullets can not pass through a target in between two ticks. Only
+    impacts from tick `first` on are considered.
+
+    @params:
+        - pos (np.ndarray): Spawn positions of the bullets, shape (n, 2).
+        - v (np.ndarray): Velocities of the bullets, shape (n, 2).
+        - radii (np.ndarray): Collision radii of the bullets, shape (n,).
+        - target_pos (np.ndarray): Positions of the targets each bullet
+        can hit, shape (n, n_targets, 2).
+        - target_radii (np.ndarray): Collision radii of these targets,
+        shape (n, n_targets). Targets that can not be hit have a radius
+        of np.nan.
+        - boundaries (np.ndarray): Simulation boundaries with
+        shape[[domain_x],[domain_y]].
+        - dt (float): Delta time.
+        - first (np.ndarray): First tick in which an impact counts,
+        counted from the spawn tick, shape (n,).
+
+    @returns:
+        - np.ndarray with the tick of the impact, counted from the
+        spawn tick, as floats.
+        - np.ndarray with the index of the target that is hit, or
+        BOUNDARY if the bullet leaves the boundaries first.
+    """
+    start = (first - 1) * dt
+    to_bullet_x = pos[:, 0, np.newaxis] - target_pos[..., 0]
+    to_bullet_y = pos[:, 1, np.newaxis] - target_pos[..., 1]
+    v_x = v[:, 0, np.newaxis]
+    v_y = v[:, 1, np.newaxis]
+    # the path overlaps a target between the two roots of
+    # |pos + v * t - target_pos| = radius, which are nan if it never does
+    a = v_x * v_x + v_y * v_y
+    half_b = to_bullet_x * v_x + to_bullet_y * v_y
+    c = to_bullet_x * to_bullet_x + to_bullet_y * to_bullet_y - \
+        (radii[:, np.newaxis] + target_radii) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        root = np.sqrt(half_b * half_b - a * c)
+        enter = (-half_b - root) / a
+        leave = (-half_b + root) / a
+        # the bullet is within the boundaries in between entering and
+        # leaving them on both axes
+        low = (boundaries[:, 0] - pos) / v
+        high = (boundaries[:, 1] - pos) / v
+
+    # nan compares False, so targets that are never hit drop out here
+    ticks = np.where(
+        leave > start[:, np.newaxis],
+        np.maximum(np.ceil(enter / dt), first[:, np.newaxis]),
+        np.inf,
+    )
+
+    # the boundaries are tested in every tick only, like in the pairwise
+    # collision check, as a bullet that left them never returns. A
+    # bullet on a boundary is out of it
+    inside = (pos > boundaries[:, 0]) & (pos < boundaries[:, 1])
+    enter_axis = np.where(
+        v == 0,
+        np.where(inside, -np.inf, np.inf),
+        np.minimum(low, high),
+    )
+    leave_axis = np.where(v == 0, np.inf, np.maximum(low, high))
+    exit_tick = np.where(
+        first * dt > np.maximum(enter_axis[:, 0], enter_axis[:, 1]),
+        np.maximum(
+            np.ceil(np.minimum(leave_axis[:, 0], leave_axis[:, 1]) / dt),
+            first,
+        ),
+        first,
+    )
+
+    # on a tie the target is hit, as both happen in the same tick
+    ticks = np.concatenate((ticks, exit_tick[:, np.newaxis]), axis=1)
+    target = np.argmin(ticks, axis=1)
+    return (
+        ticks[np.arange(ticks.shape[0]), target],
+        np.where(target == target_pos.shape[1], BOUNDARY, target),
+    )
+
+
+class ImpactSchedule:
+    """
+    Impact schedule container class.
+
+    This class keeps the impacts of all bullets in a heap, ordered by
+    the tick in which they happen, so only the impacts that are due
+    have to be looked at. The schedule keeps its own tick counter,
+    which the owner advances every tick.
+
+    Every impact is stored with the tick in which its bullet was
+    spawned, as the slot of the bullet may have been reused for another
+    bullet by the time the impact is due.
+
+    @public member variables:
+    + now (int): Current tick.
+
+    @public methods:
+    + tick(frozen: np.ndarray=None)-> None
+        Advance the current tick.
+    + push(
+        worlds: np.ndarray,
+        slots: np.ndarray,
+        spawned: np.ndarray,
+        due: np.ndarray,
+        targets: np.ndarray,
+      )-> None
+        Schedule impacts.
+    + pop_due()-> tuple[np.ndarray, ...]
+        Remove and return all impacts that are due.
+    + clear(worlds: np.ndarray=None)-> None
+        Remove all impacts.
+    + remap(slots: np.ndarray)-> None
+        Move the impacts of bullets that moved to another slot.
+    + get_state()-> tuple
+        Snapshot of the schedule.
+    + set_state(state: tuple)-> None
+        Restore the schedule from a snapshot.
+    """
+
+    def __init__(self, n_worlds: int = 1)-> None:
+        """
+        Initialize the ImpactSchedule class.
+
+        @params:
+            - n_worlds (int): Number of worlds, impacts are given per
+            world.
+        """
+        self._n_worlds = n_worlds
+        self.now = 0
+        # (due tick, world, slot, spawn tick, target) per impact
+        self._heap = []
+
+    def tick(self, frozen: np.ndarray|None = None)-> None:
+        """
+        Advance the current tick.
+
+        @params:
+            - frozen (np.ndarray): Mask of the worlds whose impacts are
+            delayed by the tick, as their bullets keep their age. If
+            None, no impacts are delayed.
+        """
+        self.now += 1
+        if frozen is None:
+            return
+        # the spawn tick moves along, so the age of the bullet at the
+        # impact stays the same
+        self._heap = [
+            (due + 1, world, slot, spawned + 1, target) if frozen[world]
+            else (due, world, slot, spawned, target)
+            for due, world, slot, spawned, target in self._heap
+        ]
+        heapq.heapify(self._heap)
+
+    def push(
+        self,
+        worlds: np.ndarray,
+        slots: np.ndarray,
+        spawned: np.ndarray,
+        due: np.ndarray,
+        targets: np.ndarray,
+    )-> None:
+        """
+        Schedule impacts.
+
+        @params:
+            - worlds (np.ndarray): World of the bullet of each impact.
+            - slots (np.ndarray): Slot of the bullet of each impact.
+            - spawned (np.ndarray): Tick the bullet was spawned in.
+            - due (np.ndarray): Tick of each impact.
+            - targets (np.ndarray): Index of the target that is hit, or
+            BOUNDARY.
+        """
+        for impact in zip(
+            due.tolist(),
+            worlds.tolist(),
+            slots.tolist(),
+            spawned.tolist(),
+            targets.tolist(),
+            strict=True,
+        ):
+            heapq.heappush(self._heap, impact)
+
+    def pop_due(self)-> tuple[np.ndarray, ...]:
+        """
+        Remove and return all impacts that are due.
+
+        @returns:
+            - np.ndarray with the world of the bullet of each impact.
+            - np.ndarray with the slot of the bullet.
+            - np.ndarray with the tick the bullet was spawned in.
+            - np.ndarray with the index of the target that is hit, or
+            BOUNDARY.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= self.now:
+            due.append(heapq.heappop(self._heap)[1:])
+        impacts = np.array(due, dtype=int).reshape(-1, 4)
+        return tuple(impacts.T)
+
+    def clear(self, worlds: np.ndarray|None = None)-> None:
+        """
+        Remove all impacts.
+
+        @params:
+            - worlds (np.ndarray): Index or mask of the worlds to clear.
+            If None, all worlds are cleared.
+        """
+        if worlds is None:
+            self._heap = []
+            return
+        cleared = np.zeros(self._n_worlds, dtype=bool)
+        cleared[worlds] = True
+        self._heap = [impact for impact in self._heap if not cleared[impact[1]]]
+        heapq.heapify(self._heap)
+
+    def remap(self, slots: np.ndarray)-> None:
+        """
+        Move the impacts of bullets that moved to another slot.
+
+        @params:
+            - slots (np.ndarray): New slot of every old slot, with shape
+            (n_worlds, n_slots).
+        """
+        self._heap = [
+            (due, world, int(slots[world, slot]), spawned, target)
+            for due, world, slot, spawned, target in self._heap
+        ]
+        heapq.heapify(self._heap)
+
+    def get_state(self)-> tuple:
+        """
+        Snapshot of the schedule.
+
+        @returns:
+            - tuple with the current tick and a copy of the heap.
+        """
+        return self.now, list(self._heap)
+
+    def set_state(self, state: tuple)-> None:
+        """
+        Restore the schedule from a snapshot.
+
+        @params:
+            - state (tuple): Snapshot, as returned by self.get_state().
+        """
+        self.now, heap = state
+        self._heap = list(heap)
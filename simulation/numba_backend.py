@@ -0,0 +1,848 @@
+"""
+Numba physics backend module.
+
+This module contains compiled kernels for the hot parts of a tick: the
+airplane physics, bullet trajectories, collision detection, impact
+prediction and despawning.
+Each kernel is a single loop over all entities, instead of the dozens
+of vectorized calls of the NumPy backend, which mostly pay off for the
+small number of entities of a single environment.
+
+The kernels work on (column, world, entity) views of the scalars and
+vectors matrices, see scalar_block() and vector_block(). Numba is an
+optional dependency, use resolve_backend() to check if it can be used.
+"""
+
+import math
+import warnings
+
+import numpy as np
+
+from simulation.entity_store import (
+    SCALARS_NDIM,
+    VECTORS_NDIM,
+    Action,
+    EntityType,
+    Scalar,
+    Vector,
+)
+
+try:
+    from numba import njit
+except ImportError:
+    NUMBA_AVAILABLE = False
+else:
+    NUMBA_AVAILABLE = True
+
+PHYSICS_BACKENDS = ("numpy", "numba")
+
+# plain ints, which numba freezes into the kernels as constants
+MASS = int(Scalar.MASS)
+CONST_DRAG = int(Scalar.CONST_DRAG)
+CONST_LIFT = int(Scalar.CONST_LIFT)
+SPAWN_TICK = int(Scalar.SPAWN_TICK)
+CL0 = int(Scalar.CL0)
+CD_MIN = int(Scalar.CD_MIN)
+ENGINE_FORCE = int(Scalar.ENGINE_FORCE)
+AGILITY = int(Scalar.AGILITY)
+THROTTLE = int(Scalar.THROTTLE)
+PITCH = int(Scalar.PITCH)
+COLL_RADIUS = int(Scalar.COLL_RADIUS)
+AOA_DEG = int(Scalar.AOA_DEG)
+ENTITY_TYPE = int(Scalar.ENTITY_TYPE)
+COLL_FLAG = int(Scalar.COLL_FLAG)
+AOA_CRIT_LOW = int(Vector.AOA_CRIT_LOW)
+AOA_CRIT_HIGH = int(Vector.AOA_CRIT_HIGH)
+V = int(Vector.V)
+POS = int(Vector.POS)
+SPAWN_POS = int(Vector.SPAWN_POS)
+V_UV = int(Vector.V_UV)
+F_GRAVITY = int(Vector.F_GRAVITY)
+F_ENGINE = int(Vector.F_ENGINE)
+F_DRAG = int(Vector.F_DRAG)
+F_LIFT = int(Vector.F_LIFT)
+PITCH_UV = int(Vector.PITCH_UV)
+NOTHING = int(EntityType.NOTHING)
+BULLET = int(EntityType.BULLET)
+PITCH_UP = int(Action.PITCH_UP)
+PITCH_DOWN = int(Action.PITCH_DOWN)
+THROTTLE_UP = int(Action.THROTTLE_UP)
+THROTTLE_DOWN = int(Action.THROTTLE_DOWN)
+
+
+def _jit(function: object)-> object:
+    """
+    Compile function with numba, if it is available.
+
+    Without numba the function is returned as is, it is never called
+    then, as resolve_backend() falls back to NumPy.
+
+    @params:
+        - function (object): Function to compile.
+
+    @returns:
+        - object with the compiled function.
+    """
+    if NUMBA_AVAILABLE:
+        return njit(cache=True)(function)
+    return function
+
+
+def resolve_backend(physics_backend: str)-> str:
+    """
+    Check the physics backend and fall back to NumPy if needed.
+
+    @params:
+        - physics_backend (str): One of PHYSICS_BACKENDS.
+
+    @returns:
+        - str with the backend to use, "numpy" if numba was asked for
+        but is not installed.
+    """
+    if physics_backend not in PHYSICS_BACKENDS:
+        raise ValueError(
+            f"`physics_backend` must be one of {PHYSICS_BACKENDS}.",
+        )
+    if physics_backend == "numba" and not NUMBA_AVAILABLE:
+        warnings.warn(
+            "numba is not installed, falling back to the numpy physics backend.",
+            stacklevel=2,
+        )
+        return "numpy"
+    return physics_backend
+
+
+def scalar_block(scalars: np.ndarray)-> np.ndarray:
+    """
+    View a scalars matrix as a (column, world, entity) block.
+
+    @params:
+        - scalars (np.ndarray): Scalars matrix, with or without a
+        leading world axis.
+
+    @returns:
+        - np.ndarray view with shape (14, n_worlds, n_entities).
+    """
+    block = np.moveaxis(scalars, -1, 0)
+    return block[:, np.newaxis] if scalars.ndim == SCALARS_NDIM else block
+
+
+def vector_block(vectors: np.ndarray)-> np.ndarray:
+    """
+    View a vectors matrix as a (column, world, entity, axis) block.
+
+    @params:
+        - vectors (np.ndarray): Vectors matrix, with or without a
+        leading world axis.
+
+    @returns:
+        - np.ndarray view with shape (10, n_worlds, n_entities, 2).
+    """
+    block = np.moveaxis(vectors, -2, 0)
+    return block[:, np.newaxis] if vectors.ndim == VECTORS_NDIM else block
+
+
+@_jit
+def _plane_forces(
+    s: np.ndarray,
+    v: np.ndarray,
+    w: int,
+    i: int,
+)-> tuple[float, float, float, float]:
+    """
+    Calculate all forces on a plane at its current velocity.
+
+    Writes the velocity unit vector, AoA and forces of the plane to the
+    blocks, like Airplanes._calculate_forces(). Expects an up-to-date
+    pitch unit vector.
+
+    @params:
+        - s (np.ndarray): Scalar block of the planes.
+        - v (np.ndarray): Vector block of the planes.
+        - w (int): World of the plane.
+        - i (int): Index of the plane in its world.
+
+    @returns:
+        - float with the resulting force along x.
+        - float with the resulting force along y.
+        - float with the AoA.
+        - float with the norm of the drag.
+    """
+    pitch_uv_x, pitch_uv_y = v[PITCH_UV, w, i, 0], v[PITCH_UV, w, i, 1]
+
+    # update velocity unit vector, which stays zero for zero speed
+    v_x, v_y = v[V, w, i, 0], v[V, w, i, 1]
+    speed = math.sqrt(v_x * v_x + v_y * v_y)
+    speed_squared = speed * speed
+    temp = 1.0 if speed == 0 else speed
+    v_uv_x = v_x / temp
+    v_uv_y = v_y / temp
+    v[V_UV, w, i, 0] = v_uv_x
+    v[V_UV, w, i, 1] = v_uv_y
+
+    # update AoA
+    aoa = math.atan2(pitch_uv_x, pitch_uv_y) - math.atan2(v_x, v_y)
+    aoa = (aoa * 180 / math.pi + 180) % 360 - 180
+    s[AOA_DEG, w, i] = aoa
+
+    # engine force vector
+    temp = s[THROTTLE, w, i] * 0.1 * s[ENGINE_FORCE, w, i]
+    v[F_ENGINE, w, i, 0] = temp * pitch_uv_x
+    v[F_ENGINE, w, i, 1] = temp * pitch_uv_y
+
+    # lift force vector, see Airplanes._lift_curve()
+    aoa_crit_low = v[AOA_CRIT_LOW, w, i, 0]
+    aoa_crit_high = v[AOA_CRIT_HIGH, w, i, 0]
+    if aoa < 0:
+        crit, coef = aoa_crit_low, v[AOA_CRIT_LOW, w, i, 1]
+    else:
+        crit, coef = aoa_crit_high, v[AOA_CRIT_HIGH, w, i, 1]
+    cl0 = s[CL0, w, i]
+    if aoa < aoa_crit_low - 1 or aoa >= aoa_crit_high + 1:
+        coef_lift = 0.0
+    elif aoa < aoa_crit_low or aoa >= aoa_crit_high:
+        coef_lift = coef * abs(crit - 1 - aoa)
+    else:
+        coef_lift = cl0 + (coef - cl0) * (aoa / crit)
+    temp = s[CONST_LIFT, w, i] * coef_lift * speed_squared
+    v[F_LIFT, w, i, 0] = temp * v_uv_y
+    v[F_LIFT, w, i, 1] = -(temp * v_uv_x)
+
+    # drag force vector
+    temp = aoa / math.sqrt(40)
+    norm_drag = s[CONST_DRAG, w, i] * (temp * temp + s[CD_MIN, w, i]) * \
+        speed_squared
+    v[F_DRAG, w, i, 0] = -norm_drag * v_uv_x
+    v[F_DRAG, w, i, 1] = -norm_drag * v_uv_y
+
+    f_res_x = v[F_GRAVITY, w, i, 0] + v[F_ENGINE, w, i, 0] + \
+        v[F_DRAG, w, i, 0] + v[F_LIFT, w, i, 0]
+    f_res_y = v[F_GRAVITY, w, i, 1] + v[F_ENGINE, w, i, 1] + \
+        v[F_DRAG, w, i, 1] + v[F_LIFT, w, i, 1]
+    return f_res_x, f_res_y, aoa, norm_drag
+
+
+@_jit
+def _torque_direction(
+    v: np.ndarray,
+    w: int,
+    i: int,
+    aoa: float,
+)-> float:
+    """
+    Direction of the induced torque, which pitches towards the critical AoA.
+
+    @params:
+        - v (np.ndarray): Vector block of the planes.
+        - w (int): World of the plane.
+        - i (int): Index of the plane in its world.
+        - aoa (float): AoA of the plane.
+
+    @returns:
+        - float with 1 below the low critical AoA, -1 above the high
+        critical AoA and 0 in between.
+    """
+    torque = 0.0
+    if aoa < v[AOA_CRIT_LOW, w, i, 0]:
+        torque = 1.0
+    if aoa > v[AOA_CRIT_HIGH, w, i, 0]:
+        torque = -1.0
+    return torque
+
+
+@_jit
+def _action_rates(
+    s: np.ndarray,
+    action: np.ndarray,
+    w: int,
+    i: int,
+)-> tuple[float, float]:
+    """
+    Rates of the action of a plane.
+
+    @params:
+        - s (np.ndarray): Scalar block of the planes.
+        - action (np.ndarray): Action per plane.
+        - w (int): World of the plane.
+        - i (int): Index of the plane in its world.
+
+    @returns:
+        - float with the turn rate, by action 1 pitch up and 2 pitch
+        down.
+        - float with the throttle rate, by action 3 throttle up and 4
+        throttle down.
+    """
+    turn_rate = 0.0
+    if action[w, i] == PITCH_UP:
+        turn_rate = s[AGILITY, w, i]
+    elif action[w, i] == PITCH_DOWN:
+        turn_rate = -s[AGILITY, w, i]
+    throttle_rate = 0.0
+    if action[w, i] == THROTTLE_UP:
+        throttle_rate = 100.0
+    elif action[w, i] == THROTTLE_DOWN:
+        throttle_rate = -100.0
+    return turn_rate, throttle_rate
+
+
+@_jit
+def _euler_plane(
+    s: np.ndarray,
+    v: np.ndarray,
+    action: np.ndarray,
+    w: int,
+    i: int,
+    dt: float,
+    forces: tuple[float, float, float, float],
+)-> None:
+    """
+    Move a plane with semi-implicit Euler and perform its action.
+
+    @params:
+        - s (np.ndarray): Scalar block of the planes.
+        - v (np.ndarray): Vector block of the planes.
+        - action (np.ndarray): Action per plane.
+        - w (int): World of the plane.
+        - i (int): Index of the plane in its world.
+        - dt (float): Delta time.
+        - forces (tuple): Forces at the start of the tick, see
+        _plane_forces().
+    """
+    f_res_x, f_res_y, aoa, norm_drag = forces
+    mass = s[MASS, w, i]
+
+    # update v, pos with semi-implicit euler
+    v[V, w, i, 0] += f_res_x * dt / mass
+    v[POS, w, i, 0] += v[V, w, i, 0] * dt
+    v[V, w, i, 1] += f_res_y * dt / mass
+    v[POS, w, i, 1] += v[V, w, i, 1] * dt
+
+    # induced torque, which pitches towards the critical AoA
+    torque = _torque_direction(v, w, i, aoa)
+    pitch = (s[PITCH, w, i] + torque * dt * norm_drag * 0.01) % 360
+
+    # action 1 pitch up, action 2 pitch down
+    if action[w, i] == PITCH_UP:
+        pitch = (pitch + dt * s[AGILITY, w, i]) % 360
+    elif action[w, i] == PITCH_DOWN:
+        pitch = (pitch - dt * s[AGILITY, w, i]) % 360
+    s[PITCH, w, i] = pitch
+
+    # action 3 throttle up, action 4 throttle down
+    if action[w, i] == THROTTLE_UP:
+        s[THROTTLE, w, i] = min(s[THROTTLE, w, i] + dt * 100, 100)
+    elif action[w, i] == THROTTLE_DOWN:
+        s[THROTTLE, w, i] = max(s[THROTTLE, w, i] - dt * 100, 0)
+
+
+@_jit
+def _runge_kutta_plane(
+    s: np.ndarray,
+    v: np.ndarray,
+    action: np.ndarray,
+    w: int,
+    i: int,
+    dt: float,
+    forces: tuple[float, float, float, float],
+    stages: tuple[np.ndarray, np.ndarray],
+)-> None:
+    """
+    Move a plane and its pitch and throttle with a Runge-Kutta method.
+
+    @params:
+        - s (np.ndarray): Scalar block of the planes.
+        - v (np.ndarray): Vector block of the planes.
+        - action (np.ndarray): Action per plane.
+        - w (int): World of the plane.
+        - i (int): Index of the plane in its world.
+        - dt (float): Delta time.
+        - forces (tuple): Forces at the start of the tick, see
+        _plane_forces().
+        - stages (tuple): Fraction of dt and weight per stage.
+    """
+    f_res_x, f_res_y, aoa, norm_drag = forces
+    stage_time, stage_weight = stages
+    mass = s[MASS, w, i]
+    turn_rate, throttle_rate = _action_rates(s, action, w, i)
+
+    v0_x, v0_y = v[V, w, i, 0], v[V, w, i, 1]
+    pitch0, throttle0 = s[PITCH, w, i], s[THROTTLE, w, i]
+    dv_x = 0.0
+    dv_y = 0.0
+    d_pitch = 0.0
+    accel_x = 0.0
+    accel_y = 0.0
+    pitch_rate = 0.0
+    for stage in range(stage_time.shape[0]):
+        if stage > 0:
+            # state of this stage, from the previous derivative
+            h = stage_time[stage] * dt
+            v[V, w, i, 0] = v0_x + accel_x * h
+            v[V, w, i, 1] = v0_y + accel_y * h
+            s[THROTTLE, w, i] = min(max(throttle0 + throttle_rate * h, 0), 100)
+            temp = (pitch0 + pitch_rate * h) * (-math.pi / 180)
+            v[PITCH_UV, w, i, 0] = math.cos(temp)
+            v[PITCH_UV, w, i, 1] = math.sin(temp)
+            f_res_x, f_res_y, aoa, norm_drag = _plane_forces(s, v, w, i)
+        accel_x = f_res_x / mass
+        accel_y = f_res_y / mass
+        pitch_rate = _torque_direction(v, w, i, aoa) * norm_drag * \
+            0.01 + turn_rate
+
+        # weighted sum of the derivatives
+        weight = stage_weight[stage] * dt
+        dv_x += accel_x * weight
+        dv_y += accel_y * weight
+        d_pitch += pitch_rate * weight
+        v[POS, w, i, 0] += v[V, w, i, 0] * weight
+        v[POS, w, i, 1] += v[V, w, i, 1] * weight
+    v[V, w, i, 0] = v0_x + dv_x
+    v[V, w, i, 1] = v0_y + dv_y
+    s[PITCH, w, i] = (pitch0 + d_pitch) % 360
+    s[THROTTLE, w, i] = min(max(throttle0 + throttle_rate * dt, 0), 100)
+
+
+@_jit
+def tick_airplanes(
+    s: np.ndarray,
+    v: np.ndarray,
+    action: np.ndarray,
+    dt: float,
+    stage_time: np.ndarray,
+    stage_weight: np.ndarray,
+)-> None:
+    """
+    Move all airplanes and perform their actions.
+
+    Follows the same steps as the NumPy Airplanes.tick(), one plane at
+    a time.
+
+    @params:
+        - s (np.ndarray): Scalar block of the planes.
+        - v (np.ndarray): Vector block of the planes.
+        - action (np.ndarray): Action per plane, shape
+        (n_worlds, n_planes).
+        - dt (float): Delta time.
+        - stage_time (np.ndarray): Fraction of dt per Runge-Kutta
+        stage, empty for semi-implicit Euler, see
+        simulation.airplanes.INTEGRATORS.
+        - stage_weight (np.ndarray): Weight per Runge-Kutta stage.
+    """
+    for w in range(s.shape[1]):
+        for i in range(s.shape[2]):
+            # update pitch unit vector
+            temp = s[PITCH, w, i] * (-math.pi / 180)
+            v[PITCH_UV, w, i, 0] = math.cos(temp)
+            v[PITCH_UV, w, i, 1] = math.sin(temp)
+
+            forces = _plane_forces(s, v, w, i)
+            if stage_time.shape[0] == 0:
+                _euler_plane(s, v, action, w, i, dt, forces)
+            else:
+                _runge_kutta_plane(
+                    s, v, action, w, i, dt, forces, (stage_time, stage_weight),
+                )
+
+
+@_jit
+def _alive_positions(
+    s: np.ndarray,
+    v: np.ndarray,
+    alive: np.ndarray,
+    w: int,
+    counts: tuple[int, int, int],
+    tick: int,
+    dt: float,
+    out: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+)-> int:
+    """
+    Gather the slots and positions of the alive entities of a world.
+
+    @params:
+        - s (np.ndarray): Scalar block of all entities.
+        - v (np.ndarray): Vector block of all entities.
+        - alive (np.ndarray): Mask of the alive entities of the world.
+        - w (int): World of the entities.
+        - counts (tuple): Number of planes, of slots before the first
+        bullet slot and of slots that may contain an entity.
+        - tick (int): Current tick of the bullets.
+        - dt (float): Delta time.
+        - out (tuple): Buffers for the slot, x and y of every alive
+        entity, and for the index in them of the first entity of each
+        type, see collide().
+
+    @returns:
+        - int with the number of alive entities.
+    """
+    n_planes, n_static, n = counts
+    slots, x, y, first = out
+    n_alive = 0
+    first[0] = 0
+    for i in range(n):
+        if i == n_planes:
+            first[1] = n_alive
+        if i == n_static:
+            first[2] = n_alive
+        if alive[i]:
+            slots[n_alive] = i
+            x[n_alive] = v[POS, w, i, 0]
+            y[n_alive] = v[POS, w, i, 1]
+            if i >= n_static:
+                age = dt * (tick - s[SPAWN_TICK, w, i])
+                x[n_alive] += v[V, w, i, 0] * age
+                y[n_alive] += v[V, w, i, 1] * age
+            n_alive += 1
+    if n <= n_planes:
+        first[1] = n_alive
+    if n <= n_static:
+        first[2] = n_alive
+    first[3] = n_alive
+    return n_alive
+
+
+@_jit
+def _overlaps(
+    s: np.ndarray,
+    w: int,
+    type_a: int,
+    type_b: int,
+    entities: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    dead: np.ndarray,
+)-> None:
+    """
+    Mark the pairs of two entity types of a world that overlap.
+
+    @params:
+        - s (np.ndarray): Scalar block of all entities.
+        - w (int): World of the entities.
+        - type_a (int): First entity type.
+        - type_b (int): Second entity type, not lower than type_a.
+        - entities (tuple): Slots, x and y of the alive entities and
+        the index of the first entity of each type, see
+        _alive_positions().
+        - dead (np.ndarray): Mask of the alive entities that died, which
+        is set for both entities of every overlapping pair.
+    """
+    slots, x, y, first = entities
+    for a in range(first[type_a], first[type_a + 1]):
+        i = slots[a]
+        for b in range(max(a + 1, first[type_b]), first[type_b + 1]):
+            j = slots[b]
+            dx = x[a] - x[b]
+            dy = y[a] - y[b]
+            radii = s[COLL_RADIUS, w, i] + s[COLL_RADIUS, w, j]
+            if dx * dx + dy * dy < radii * radii:
+                dead[a] = True
+                dead[b] = True
+
+
+@_jit
+def collide(
+    s: np.ndarray,
+    v: np.ndarray,
+    alive: np.ndarray,
+    n: int,
+    boundaries: np.ndarray,
+    n_planes: int,
+    n_static: int,
+    tick: int,
+    dt: float,
+    collisions: np.ndarray,
+)-> tuple[np.ndarray, np.ndarray]:
+    """
+    Check for collisions and set the collision flags.
+
+    Tests every pair of alive entities within a world whose types
+    collide, which for the few entities per world is cheaper than any
+    broad phase. The entities are in the order of their type, so the
+    pairs of two types form a block. Bullets are not moved, their
+    positions are computed from the position and tick they were
+    spawned in, see Bullets.positions().
+
+    @params:
+        - s (np.ndarray): Scalar block of all entities.
+        - v (np.ndarray): Vector block of all entities.
+        - alive (np.ndarray): Mask of the alive entities, per world.
+        - n (int): Number of slots, counted from the first, that may
+        contain an entity.
+        - boundaries (np.ndarray): Simulation boundaries with
+        shape[[domain_x],[domain_y]].
+        - n_planes (int): Number of planes, which come first.
+        - n_static (int): Number of slots before the first bullet slot.
+        - tick (int): Current tick of the bullets.
+        - dt (float): Delta time.
+        - collisions (np.ndarray): Which entity types collide, indexed
+        by the entity type flags of a pair.
+
+    @returns:
+        - np.ndarray with the world of each entity that died.
+        - np.ndarray with the slot of each entity that died.
+    """
+    n_worlds = s.shape[1]
+    n_types = collisions.shape[0]
+    # slots of the alive entities of a world
+    slots = np.empty(n, dtype=np.int64)
+    dead = np.empty(n, dtype=np.bool_)
+    x = np.empty(n)
+    y = np.empty(n)
+    # index in slots of the first entity of each type
+    first = np.empty(n_types + 1, dtype=np.int64)
+    dead_worlds = np.empty(n_worlds * n, dtype=np.int64)
+    dead_slots = np.empty(n_worlds * n, dtype=np.int64)
+    k = 0
+    for w in range(n_worlds):
+        n_alive = _alive_positions(
+            s, v, alive[w], w, (n_planes, n_static, n), tick, dt, (slots, x, y, first),
+        )
+
+        # all flags are set afterwards, so every pair sees the same state
+        for a in range(n_alive):
+            dead[a] = x[a] <= boundaries[0, 0] or x[a] >= boundaries[0, 1] or \
+                y[a] <= boundaries[1, 0] or y[a] >= boundaries[1, 1]
+        for type_a in range(n_types):
+            for type_b in range(type_a, n_types):
+                if collisions[type_a, type_b]:
+                    _overlaps(s, w, type_a, type_b, (slots, x, y, first), dead)
+
+        for a in range(n_alive):
+            if dead[a]:
+                s[COLL_FLAG, w, slots[a]] = 1
+                dead_worlds[k] = w
+                dead_slots[k] = slots[a]
+                k += 1
+    return dead_worlds[:k], dead_slots[:k]
+
+
+@_jit
+def collide_planes(
+    s: np.ndarray,
+    v: np.ndarray,
+    alive: np.ndarray,
+    n_planes: int,
+    n_static: int,
+    n: int,
+    tick: int,
+    dt: float,
+)-> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the bullets that hit a plane.
+
+    Follows the same steps as the NumPy Entities._collide_planes(). The
+    collision flags are left untouched.
+
+    @params:
+        - s (np.ndarray): Scalar block of all entities.
+        - v (np.ndarray): Vector block of all entities.
+        - alive (np.ndarray): Mask of the alive entities, per world.
+        - n_planes (int): Number of planes, which come first.
+        - n_static (int): Number of slots before the first bullet slot.
+        - n (int): Number of slots, counted from the first, that may
+        contain an entity.
+        - tick (int): Current tick of the bullets.
+        - dt (float): Delta time.
+
+    @returns:
+        - np.ndarray with the world of each bullet that hit a plane.
+        - np.ndarray with the slot of the bullet.
+        - np.ndarray with the slot of the plane.
+    """
+    n_worlds = s.shape[1]
+    size = n_worlds * max(n - n_static, 0) * n_planes
+    hit_worlds = np.empty(size, dtype=np.int64)
+    hit_bullets = np.empty(size, dtype=np.int64)
+    hit_planes = np.empty(size, dtype=np.int64)
+    k = 0
+    for w in range(n_worlds):
+        for i in range(n_static, n):
+            if not alive[w, i]:
+                continue
+            age = dt * (tick - s[SPAWN_TICK, w, i])
+            x = v[SPAWN_POS, w, i, 0] + v[V, w, i, 0] * age
+            y = v[SPAWN_POS, w, i, 1] + v[V, w, i, 1] * age
+            for j in range(n_planes):
+                if not alive[w, j]:
+                    continue
+                dx = x - v[POS, w, j, 0]
+                dy = y - v[POS, w, j, 1]
+                radii = s[COLL_RADIUS, w, i] + s[COLL_RADIUS, w, j]
+                if dx * dx + dy * dy < radii * radii:
+                    hit_worlds[k] = w
+                    hit_bullets[k] = i
+                    hit_planes[k] = j
+                    k += 1
+    return hit_worlds[:k], hit_bullets[:k], hit_planes[:k]
+
+
+@_jit
+def _leave_tick(
+    x: float,
+    y: float,
+    v_x: float,
+    v_y: float,
+    first: int,
+    boundaries: np.ndarray,
+    dt: float,
+)-> float:
+    """
+    Tick in which a bullet is outside the boundaries.
+
+    The boundaries are tested in every tick only.
+
+    @params:
+        - x (float): Spawn position of the bullet along x.
+        - y (float): Spawn position of the bullet along y.
+        - v_x (float): Velocity of the bullet along x.
+        - v_y (float): Velocity of the bullet along y.
+        - first (int): First tick in which an impact counts.
+        - boundaries (np.ndarray): Simulation boundaries with
+        shape[[domain_x],[domain_y]].
+        - dt (float): Delta time.
+
+    @returns:
+        - float with the tick, counted from the spawn tick, no earlier
+        than first.
+    """
+    enter_time = -math.inf
+    leave_time = math.inf
+    for axis in range(2):
+        pos = x if axis == 0 else y
+        vel = v_x if axis == 0 else v_y
+        if vel == 0:
+            if pos <= boundaries[axis, 0] or pos >= boundaries[axis, 1]:
+                enter_time = math.inf
+            continue
+        low = (boundaries[axis, 0] - pos) / vel
+        high = (boundaries[axis, 1] - pos) / vel
+        enter_time = max(enter_time, min(low, high))
+        leave_time = min(leave_time, max(low, high))
+    if first * dt > enter_time:
+        return max(math.ceil(leave_time / dt), first)
+    return first
+
+
+@_jit
+def first_impacts(
+    s: np.ndarray,
+    v: np.ndarray,
+    worlds: np.ndarray,
+    bullets: np.ndarray,
+    first: np.ndarray,
+    target_alive: np.ndarray,
+    n_planes: int,
+    boundaries: np.ndarray,
+    dt: float,
+)-> tuple[np.ndarray, np.ndarray]:
+    """
+    Predict the first impact of bullets that fly in a straight line.
+
+    Follows the same steps as simulation.impact_schedule.first_impact(),
+    one bullet at a time.
+
+    @params:
+        - s (np.ndarray): Scalar block of all entities.
+        - v (np.ndarray): Vector block of all entities.
+        - worlds (np.ndarray): World of each bullet.
+        - bullets (np.ndarray): Slot of each bullet.
+        - first (np.ndarray): First tick in which an impact counts,
+        counted from the spawn tick.
+        - target_alive (np.ndarray): Which targets can be hit, per
+        world.
+        - n_planes (int): Number of planes, which come before the
+        targets.
+        - boundaries (np.ndarray): Simulation boundaries with
+        shape[[domain_x],[domain_y]].
+        - dt (float): Delta time.
+
+    @returns:
+        - np.ndarray with the tick of the impact, counted from the
+        spawn tick.
+        - np.ndarray with the index of the target that is hit, or -1
+        if the bullet leaves the boundaries first.
+    """
+    n_targets = target_alive.shape[1]
+    ticks = np.empty(bullets.shape[0])
+    targets = np.empty(bullets.shape[0], dtype=np.int64)
+    for b in range(bullets.shape[0]):
+        w, i = worlds[b], bullets[b]
+        x, y = v[SPAWN_POS, w, i, 0], v[SPAWN_POS, w, i, 1]
+        v_x, v_y = v[V, w, i, 0], v[V, w, i, 1]
+        start = (first[b] - 1) * dt
+
+        ticks[b] = _leave_tick(x, y, v_x, v_y, first[b], boundaries, dt)
+        targets[b] = -1
+
+        a = v_x * v_x + v_y * v_y
+        # on a tie the target is hit, so they are checked last
+        for t in range(n_targets - 1, -1, -1):
+            if not target_alive[w, t]:
+                continue
+            j = n_planes + t
+            to_bullet_x = x - v[POS, w, j, 0]
+            to_bullet_y = y - v[POS, w, j, 1]
+            half_b = to_bullet_x * v_x + to_bullet_y * v_y
+            radii = s[COLL_RADIUS, w, i] + s[COLL_RADIUS, w, j]
+            c = to_bullet_x * to_bullet_x + to_bullet_y * to_bullet_y - \
+                radii * radii
+            discriminant = half_b * half_b - a * c
+            if a == 0 or discriminant < 0:
+                continue
+            root = math.sqrt(discriminant)
+            if (-half_b + root) / a <= start:
+                continue
+            tick = max(math.ceil((-half_b - root) / a / dt), first[b])
+            if tick <= ticks[b]:
+                ticks[b] = tick
+                targets[b] = t
+    return ticks, targets
+
+
+@_jit
+def despawn_bullets(
+    s: np.ndarray,
+    alive: np.ndarray,
+    head: np.ndarray,
+    span: np.ndarray,
+    n_alive: np.ndarray,
+    ring_size: int,
+    max_spawned: int,
+    tick: int,
+    lifespan: float,
+)-> np.ndarray:
+    """
+    Despawn the bullets whose lifetime has expired.
+
+    Follows the same steps as the NumPy Bullets.despawn(), one world at
+    a time. Updates the ring buffers in place.
+
+    @params:
+        - s (np.ndarray): Scalar block of the bullets.
+        - alive (np.ndarray): Mask of the alive bullets, per world.
+        - head (np.ndarray): Next slot to write to, per world.
+        - span (np.ndarray): Number of slots behind the head that may
+        still hold a bullet, per world.
+        - n_alive (np.ndarray): Number of bullets alive, per world.
+        - ring_size (int): Number of slots of a ring.
+        - max_spawned (int): The most bullets one world has spawned in
+        a single tick.
+        - tick (int): Current tick.
+        - lifespan (float): Lifespan of a bullet in ticks.
+
+    @returns:
+        - np.ndarray with the number of despawned bullets per world.
+    """
+    n_expired = np.zeros(s.shape[1], dtype=np.int64)
+    for w in range(s.shape[1]):
+        tail = (head[w] - span[w]) % ring_size
+        n_passed = 0
+        for i in range(min(max_spawned, span[w])):
+            slot = (tail + i) % ring_size
+            if tick - s[SPAWN_TICK, w, slot] + 1 > lifespan:
+                n_passed += 1
+                # bullets that were freed before are passed over as well
+                if s[ENTITY_TYPE, w, slot] == BULLET:
+                    s[ENTITY_TYPE, w, slot] = NOTHING
+                    alive[w, slot] = False
+                    n_expired[w] += 1
+        n_alive[w] -= n_expired[w]
+        span[w] -= n_passed
+    return n_expired
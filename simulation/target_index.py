@@ -0,0 +1,312 @@
+"""
+Target index module.
+
+This module contains the TargetIndex class, a static search structure
+over the targets of every world, which is built when the targets are
+respawned.
+"""
+
+import numpy as np
+
+# Up to this number of targets per world, testing every target is
+# cheaper than searching the sorted targets first.
+DENSE_THRESHOLD = 16
+
+
+class TargetIndex:
+    """
+    Target index container class.
+
+    Targets never move, so their positions are sorted along the x axis
+    once per respawn. Every query then finds the targets that can be
+    within reach with a binary search over these sorted positions, which
+    takes O(log T) steps for T targets, and only tests those. Dead
+    targets stay in the sorted order, they are removed from the alive
+    mask as they die. With at most DENSE_THRESHOLD targets per world
+    the targets are not sorted and every target is tested instead.
+
+    All queries are batched, every query point is given together with
+    the world it is in.
+
+    This class has no public member variables.
+
+    @public methods:
+    + build(
+        pos: np.ndarray,
+        radii: np.ndarray,
+        alive: np.ndarray,
+        worlds: np.ndarray=None,
+      )-> None
+        Sort the targets of worlds by their x position.
+    + remove(worlds: np.ndarray, targets: np.ndarray)-> None
+        Remove dead targets.
+    + overlap(
+        worlds: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        radii: np.ndarray,
+      )-> tuple[np.ndarray, np.ndarray]
+        Find all pairs of query circles and alive targets that overlap.
+    + nearest(worlds: np.ndarray, x: np.ndarray, y: np.ndarray)-> np.ndarray
+        Find the nearest alive target of each query point.
+    """
+
+    def __init__(self, n_worlds: int, n_targets: int)-> None:
+        """
+        Initialize the TargetIndex class.
+
+        The index is empty until it is built.
+
+        @params:
+            - n_worlds (int): Number of worlds.
+            - n_targets (int): Number of targets per world.
+        """
+        self._n_targets = n_targets
+        self._dense = n_targets <= DENSE_THRESHOLD
+        shape = (n_worlds, n_targets)
+        # the targets of each world in the order of their x position
+        self._order = np.zeros(shape, dtype=int)
+        self._x = np.zeros(shape)
+        self._y = np.zeros(shape)
+        self._radii = np.zeros(shape)
+        self._max_radius = np.zeros(n_worlds)
+        self._alive = np.zeros(shape, dtype=bool)
+        # sorted position of each target
+        self._rank = np.zeros(shape, dtype=int)
+        # complex numbers are ordered by their real part first, so with
+        # the world as real part all sorted targets form one sorted array
+        self._keys = np.zeros(shape, dtype=complex)
+        self._keys.real = np.arange(n_worlds)[:, np.newaxis]
+
+    def build(
+        self,
+        pos: np.ndarray,
+        radii: np.ndarray,
+        alive: np.ndarray,
+        worlds: np.ndarray|None = None,
+    )-> None:
+        """
+        Sort the targets of worlds by their x position.
+
+        @params:
+            - pos (np.ndarray): Positions of the targets of these worlds,
+            shape (n_worlds, n_targets, 2).
+            - radii (np.ndarray): Collision radii of these targets, shape
+            (n_worlds, n_targets).
+            - alive (np.ndarray): Mask of the alive targets of these
+            worlds, shape (n_worlds, n_targets).
+            - worlds (np.ndarray): Index or mask of the worlds to build.
+            If None, all worlds are built.
+        """
+        if worlds is None:
+            worlds = np.s_[:]
+        if self._dense:
+            order = np.broadcast_to(np.arange(self._n_targets), radii.shape)
+        else:
+            order = np.argsort(pos[..., 0], axis=-1, kind="stable")
+        self._order[worlds] = order
+        self._x[worlds] = np.take_along_axis(pos[..., 0], order, axis=-1)
+        self._y[worlds] = np.take_along_axis(pos[..., 1], order, axis=-1)
+        self._keys.imag[worlds] = self._x[worlds]
+        self._radii[worlds] = np.take_along_axis(radii, order, axis=-1)
+        self._max_radius[worlds] = np.max(radii, axis=-1, initial=0)
+        self._alive[worlds] = np.take_along_axis(alive, order, axis=-1)
+        rank = np.empty_like(order)
+        np.put_along_axis(
+            rank,
+            order,
+            np.broadcast_to(np.arange(self._n_targets), order.shape),
+            axis=-1,
+        )
+        self._rank[worlds] = rank
+
+    def remove(self, worlds: np.ndarray, targets: np.ndarray)-> None:
+        """
+        Remove dead targets.
+
+        @params:
+            - worlds (np.ndarray): World of each dead target.
+            - targets (np.ndarray): Index of each dead target.
+        """
+        self._alive[worlds, self._rank[worlds, targets]] = False
+
+    def _search(
+        self,
+        worlds: np.ndarray,
+        keys: np.ndarray,
+        side: str,
+    )-> np.ndarray:
+        """
+        Binary search in the sorted x positions of a world per key.
+
+        All worlds are searched at once, see self._keys.
+
+        @params:
+            - worlds (np.ndarray): World of each key.
+            - keys (np.ndarray): x positions to search for.
+            - side (str): "left" for the number of targets with an x
+            position below the key, "right" for the number up to and
+            including it, as in np.searchsorted().
+
+        @returns:
+            - np.ndarray with the number of targets per key.
+        """
+        # keys of +-inf are allowed, which 1j * keys does not keep
+        world_keys = np.empty(keys.shape[0], dtype=complex)
+        world_keys.real = worlds
+        world_keys.imag = keys
+        return np.searchsorted(
+            self._keys.reshape(-1),
+            world_keys,
+            side=side,
+        ) - worlds * self._n_targets
+
+    def _range(
+        self,
+        worlds: np.ndarray,
+        low: np.ndarray,
+        high: np.ndarray,
+    )-> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the targets whose x position is within a range.
+
+        Without searching, every target of the world is returned.
+
+        @params:
+            - worlds (np.ndarray): World of each query.
+            - low (np.ndarray): Lower bound of the x range of each query.
+            - high (np.ndarray): Upper bound of the x range, inclusive.
+
+        @returns:
+            - np.ndarray with the index of the query per pair.
+            - np.ndarray with the sorted position of the target per
+            pair.
+        """
+        if self._dense:
+            return (
+                np.repeat(np.arange(worlds.shape[0]), self._n_targets),
+                np.tile(np.arange(self._n_targets), worlds.shape[0]),
+            )
+        first = self._search(worlds, low, "left")
+        counts = np.maximum(self._search(worlds, high, "right") - first, 0)
+        query = np.repeat(np.arange(worlds.shape[0]), counts)
+        # every query is a contiguous range of the sorted targets
+        rank = np.repeat(first - np.cumsum(counts) + counts, counts) + \
+            np.arange(query.shape[0])
+        return query, rank
+
+    def _candidates(
+        self,
+        worlds: np.ndarray,
+        low: np.ndarray,
+        high: np.ndarray,
+    )-> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the targets that may reach into a range along the x axis.
+
+        These are the targets whose x position is within the range
+        widened by the largest target radius of the world, which
+        includes every target whose circle reaches into it. Dead
+        targets are included, as they are still sorted.
+
+        @params:
+            - worlds (np.ndarray): World of each query.
+            - low (np.ndarray): Lower bound of the x range of each query.
+            - high (np.ndarray): Upper bound of the x range, inclusive.
+
+        @returns:
+            - np.ndarray with the index of the query per pair.
+            - np.ndarray with the sorted position of the target per
+            pair.
+        """
+        reach = self._max_radius[worlds]
+        return self._range(worlds, low - reach, high + reach)
+
+    def overlap(
+        self,
+        worlds: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        radii: np.ndarray,
+    )-> tuple[np.ndarray, np.ndarray]:
+        """
+        Find all pairs of query circles and alive targets that overlap.
+
+        Circles overlap if the distance between their centers is
+        smaller than the sum of their radii.
+
+        @params:
+            - worlds (np.ndarray): World of each query circle.
+            - x (np.ndarray): x position of each query circle.
+            - y (np.ndarray): y position of each query circle.
+            - radii (np.ndarray): Radius of each query circle.
+
+        @returns:
+            - np.ndarray with the index of the query circle per pair.
+            - np.ndarray with the index of the target per pair.
+        """
+        query, rank = self._candidates(worlds, x - radii, x + radii)
+        worlds = worlds[query]
+        dx = x[query] - self._x[worlds, rank]
+        dy = y[query] - self._y[worlds, rank]
+        r = radii[query] + self._radii[worlds, rank]
+        overlap = self._alive[worlds, rank] & (dx * dx + dy * dy < r * r)
+        return query[overlap], self._order[worlds[overlap], rank[overlap]]
+
+    def nearest(
+        self,
+        worlds: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+    )-> np.ndarray:
+        """
+        Find the nearest alive target of each query point.
+
+        The nearer of the two targets next to a point along the x axis
+        bounds the distance to the nearest target, so only the targets
+        within that distance along the x axis are tested. Of targets at
+        the same distance, the one with the lowest index is taken.
+
+        @params:
+            - worlds (np.ndarray): World of each query point.
+            - x (np.ndarray): x position of each query point.
+            - y (np.ndarray): y position of each query point.
+
+        @returns:
+            - np.ndarray with the index of the nearest alive target, -1
+            if there is no alive target in its world.
+        """
+        if self._dense:
+            # the targets are not sorted, so the first is the lowest index
+            dx = self._x[worlds] - x[:, np.newaxis]
+            dy = self._y[worlds] - y[:, np.newaxis]
+            distance = np.where(self._alive[worlds], dx * dx + dy * dy, np.inf)
+            nearest = np.argmin(distance, axis=1)
+            return np.where(np.any(self._alive[worlds], axis=1), nearest, -1)
+
+        # without an alive neighbour every target is tested
+        bound = np.full(x.shape[0], np.inf)
+        right = self._search(worlds, x, "left")
+        for rank in (right - 1, right):
+            valid = (rank >= 0) & (rank < self._n_targets)
+            clipped = np.clip(rank, 0, self._n_targets - 1)
+            dx = self._x[worlds, clipped] - x
+            dy = self._y[worlds, clipped] - y
+            valid &= self._alive[worlds, clipped]
+            bound = np.where(valid, np.minimum(bound, dx * dx + dy * dy), bound)
+        reach = np.sqrt(bound)
+        query, rank = self._range(worlds, x - reach, x + reach)
+
+        pair_worlds = worlds[query]
+        alive = self._alive[pair_worlds, rank]
+        query, pair_worlds, rank = query[alive], pair_worlds[alive], rank[alive]
+        dx = self._x[pair_worlds, rank] - x[query]
+        dy = self._y[pair_worlds, rank] - y[query]
+        target = self._order[pair_worlds, rank]
+        # the first pair of each query is the one with its nearest target
+        first = np.lexsort((target, dx * dx + dy * dy, query))
+        if first.shape[0] != 0:
+            first = first[np.r_[True, query[first][1:] != query[first][:-1]]]
+        nearest = np.full(x.shape[0], -1)
+        nearest[query[first]] = target[first]
+        return nearest
@@ -5,6 +5,8 @@ This module defines the Targets class which represents targetable entities in th
 """
 import numpy as np
 
+from simulation.entity_store import EntityType, Fields
+
 
 class Targets:
     """
@@ -46,13 +48,20 @@ class Targets:
         7 - f_drag
         8 - f_lift
         9 - pitch_uv
+    + fields (Fields): Named views on the columns of the matrices.
+    + alive (np.ndarray): Mask of the alive targets.
     
     @public methods:
     + tick())-> None:
         Tick function that currently does nothing.
     """
 
-    def __init__(self, scalars: np.ndarray, vectors: np.ndarray)-> None:
+    def __init__(
+        self,
+        scalars: np.ndarray,
+        vectors: np.ndarray,
+        alive: np.ndarray|None = None,
+    )-> None:
         """
         Initialize Targets class.
 
@@ -92,9 +101,16 @@ class Targets:
             7 - f_drag
             8 - f_lift
             9 - pitch_uv
+            - alive (np.ndarray): Mask of the alive targets, which the
+            owner keeps up to date. If None, it is derived from the
+            flags once.
         """
         self.scalars = scalars
         self.vectors = vectors
+        self.fields = Fields(scalars, vectors)
+        self.alive = alive if alive is not None else \
+            (self.fields.entity_type != EntityType.NOTHING) & \
+            (self.fields.coll_flag == -1)
 
     def tick(self)-> None:
         """
@@ -0,0 +1,50 @@
+"""
+Shared fixtures of the tests.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+
+def make_episode(iteration: int, n_steps: int, n_planes: int|None = None)-> list:
+    """
+    Make the observations of an episode.
+
+    The steps alternate between running and terminated and the last one
+    is truncated.
+
+    @params:
+        - iteration (int): Iteration of the episode, put in the states.
+        - n_steps (int): Number of steps.
+        - n_planes (int): Number of planes, if the states have a plane
+        axis.
+
+    @returns:
+        - list with an observation tuple per step.
+    """
+    observations = []
+    for step in range(n_steps):
+        state = np.array([iteration, step, 0.5, -0.5, 3.0])
+        observation = (
+            state,
+            np.float64(step / 10),
+            np.bool_(step % 2),
+            np.bool_(step == n_steps - 1),
+        )
+        if n_planes is not None:
+            observation = tuple(np.stack([value] * n_planes) for value in observation)
+        observations.append((*observation, {}))
+    return observations
+
+
+@pytest.fixture
+def episode()-> Callable[..., list]:
+    """
+    Give the factory for the observations of an episode.
+
+    @returns:
+        - Callable that makes the observations of an episode.
+    """
+    return make_episode
@@ -0,0 +1,223 @@
+"""
+Tests for the bullet ring buffers.
+
+The bullets in the rings are compared with a list of bullets that are
+moved every tick and removed by shifting the list, the way the bullets
+were kept before the rings. The planes shoot past the first size of the
+rings, so the rings grow and wrap around, and the clock of the bullets
+is rebased in between.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from environment.vector_env import VectorEnv
+from simulation.bullets import GROWTH_FACTOR, MAX_TICK
+
+N_WORLDS = 2
+
+# only the boundaries and the lifetime end a bullet
+ENV_CONFIG = """
+window_dimensions: [1280, 720]
+tps: 200
+background:
+  sprite: "assets/background_C_Lelant.png"
+collisions: []
+"""
+
+
+class ShiftedBullets:
+    """
+    Reference of the bullets of a world, kept in a list.
+
+    Every tick the positions are moved, and the bullets that left the
+    boundaries or outlived their lifetime are removed from the list.
+
+    @public member variables:
+    + pos (list[np.ndarray]): Position of every bullet, oldest first.
+
+    @public methods:
+    + tick(dt: float)-> None
+        Move the bullets and remove the ones that left the boundaries.
+    + spawn(pos: np.ndarray, v: np.ndarray)-> None
+        Append a new bullet.
+    + despawn()-> None
+        Remove the bullets that outlived their lifetime.
+    """
+
+    def __init__(self, boundaries: np.ndarray, lifespan: int)-> None:
+        """
+        Initialize the ShiftedBullets class.
+
+        @params:
+            - boundaries (np.ndarray): Simulation boundaries with
+            shape[[domain_x],[domain_y]].
+            - lifespan (int): Number of ticks a bullet lives.
+        """
+        self._boundaries = boundaries
+        self._lifespan = lifespan
+        self.pos = []
+        self._v = []
+        self._age = []
+
+    def tick(self, dt: float)-> None:
+        """
+        Move the bullets and remove the ones that left the boundaries.
+
+        @params:
+            - dt (float): Delta time.
+        """
+        self.pos = [pos + v * dt for pos, v in zip(self.pos, self._v, strict=True)]
+        self._age = [age + 1 for age in self._age]
+        inside = [
+            bool(np.all((pos > self._boundaries[:, 0]) & (pos < self._boundaries[:, 1])))
+            for pos in self.pos
+        ]
+        self._keep(inside)
+
+    def spawn(self, pos: np.ndarray, v: np.ndarray)-> None:
+        """
+        Append a new bullet.
+
+        @params:
+            - pos (np.ndarray): Position of the bullet.
+            - v (np.ndarray): Velocity of the bullet.
+        """
+        self.pos.append(pos.copy())
+        self._v.append(v.copy())
+        self._age.append(1)
+
+    def despawn(self)-> None:
+        """Remove the bullets that outlived their lifetime."""
+        self._keep([age <= self._lifespan for age in self._age])
+
+    def _keep(self, kept: list[bool])-> None:
+        """
+        Remove bullets by shifting the lists.
+
+        @params:
+            - kept (list[bool]): Whether each bullet is kept.
+        """
+        self.pos = [value for value, keep in zip(self.pos, kept, strict=True) if keep]
+        self._v = [value for value, keep in zip(self._v, kept, strict=True) if keep]
+        self._age = [value for value, keep in zip(self._age, kept, strict=True) if keep]
+
+
+def ring_positions(env: VectorEnv, world: int)-> np.ndarray:
+    """
+    Positions of the bullets of a world in the rings, oldest first.
+
+    @params:
+        - env (VectorEnv): Environment to read.
+        - world (int): Index of the world.
+
+    @returns:
+        - np.ndarray with the position of every alive bullet.
+    """
+    bullets = env._entities.bullets  # noqa: SLF001
+    slots = np.flatnonzero(bullets.alive[world])
+    order = np.argsort(bullets.fields.spawn_tick[world, slots], kind="stable")
+    index = (np.full(slots.shape[0], world), slots[order])
+    return bullets.positions(index)
+
+
+def shoot(
+    env: VectorEnv,
+    references: list[ShiftedBullets],
+    actions: np.ndarray,
+)-> None:
+    """
+    Step the environment and its reference bullets.
+
+    @params:
+        - env (VectorEnv): Environment to step.
+        - references (list[ShiftedBullets]): Reference per world.
+        - actions (np.ndarray): Action per world.
+    """
+    env.step(actions)
+    planes = env._entities.airplanes.fields  # noqa: SLF001
+    bullet_config = env._plane_data["bullet_config"]  # noqa: SLF001
+    for world, reference in enumerate(references):
+        reference.tick(env._dt)  # noqa: SLF001
+        if actions[world] == 5:
+            v_uv = planes.v_uv[world, 0]
+            distance = planes.coll_radius[world, 0] + bullet_config["coll_radius"] + 2
+            reference.spawn(
+                planes.pos[world, 0] + v_uv * distance,
+                planes.v[world, 0] + bullet_config["speed"] * v_uv,
+            )
+        reference.despawn()
+
+
+@pytest.mark.parametrize("physics_backend", ["numpy", "numba"])
+def test_ring_matches_shifted_list(tmp_path: Path, physics_backend: str)-> None:
+    """The rings grow, wrap around and rebase like the shifted list."""
+    env_config = tmp_path / "env.yaml"
+    env_config.write_text(ENV_CONFIG)
+    env = VectorEnv(
+        env_config=str(env_config),
+        seed=0,
+        num_envs=N_WORLDS,
+        autoreset=False,
+        physics_backend=physics_backend,
+        history_level="off",
+    )
+    entities = env._entities  # noqa: SLF001
+    bullets = entities.bullets
+    first_ring_size = bullets.ring_size
+    # the clock is rebased while bullets are in flight
+    bullets._tick = MAX_TICK - 100  # noqa: SLF001
+    references = [
+        ShiftedBullets(entities._boundaries, entities._BULLET_LIFESPAN)  # noqa: SLF001
+        for _ in range(N_WORLDS)
+    ]
+
+    rng = np.random.default_rng(3)
+    n_shots = 0
+    for tick in range(400):
+        # the first world shoots every tick, the second one at random
+        actions = np.array([5, rng.choice([0, 1, 2, 5])])
+        shoot(env, references, actions)
+        n_shots += 1
+        for world, reference in enumerate(references):
+            positions = ring_positions(env, world)
+            assert positions.shape[0] == len(reference.pos), tick
+            np.testing.assert_allclose(positions, np.reshape(reference.pos, (-1, 2)))
+
+    assert bullets.clock[0] < 400
+    assert bullets.ring_size > first_ring_size
+    # the rings wrapped around
+    assert n_shots > bullets.ring_size
+
+
+def test_respawn_shrinks_rings()-> None:
+    """The rings shrink back to their first size once all bullets are gone."""
+    env = VectorEnv(seed=0, num_envs=N_WORLDS, autoreset=False, history_level="off")
+    entities = env._entities  # noqa: SLF001
+    bullets = entities.bullets
+    first_ring_size = bullets.ring_size
+    first_n_entities = entities.store.scalars.shape[-2]
+    for _ in range(3 * first_ring_size):
+        env.step(np.full(N_WORLDS, 5))
+    ring_size = bullets.ring_size
+    assert ring_size > first_ring_size
+    assert entities.store.scalars.shape[-2] == first_n_entities - first_ring_size + ring_size
+
+    needed = bullets.ring_size_needed(np.zeros(ring_size + 1, dtype=int))
+    assert needed == min(
+        max(ring_size + 1 + np.max(bullets._span), GROWTH_FACTOR * ring_size),  # noqa: SLF001
+        bullets._MAX_RING_SIZE,  # noqa: SLF001
+    )
+
+    # the other world still has bullets in flight
+    env.reset(mask=np.array([True, False]))
+    assert bullets.ring_size == ring_size
+    assert np.array_equal(bullets.n_bullets == 0, [True, False])
+
+    env.reset()
+    assert bullets.ring_size == first_ring_size
+    assert entities.store.scalars.shape[-2] == first_n_entities
+    assert not np.any(entities.alive[:, entities.n_planes + entities.n_targets:])
+    assert bullets.ring_size_needed(np.zeros(1, dtype=int)) == first_ring_size
@@ -0,0 +1,121 @@
+"""
+Tests for the trajectory heatmaps.
+
+The visits and rewards per cell are compared with np.histogram2d() of
+the same steps, and the windows with the episodes that were added.
+"""
+
+import itertools
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.create_heatmaps import BLOCKS_PER_WINDOW, TrajectoryHeatmaps
+
+ENV_DATA = {"window_dimensions": [1280, 720]}
+BINS = (64, 36)
+
+
+def random_episode(rng: np.random.Generator, n_steps: int, n_planes: int = 1)-> tuple:
+    """
+    Make the states and rewards of an episode with random positions.
+
+    Some of the positions are outside the window.
+
+    @params:
+        - rng (np.random.Generator): Random generator.
+        - n_steps (int): Number of steps.
+        - n_planes (int): Number of planes.
+
+    @returns:
+        - np.ndarray with the states per step and plane.
+        - np.ndarray with the rewards per step and plane.
+    """
+    states = rng.uniform(-100, 1400, (n_steps, n_planes, 5))
+    return states, rng.normal(size=(n_steps, n_planes))
+
+
+def histogram(states: np.ndarray, weights: np.ndarray|None = None)-> np.ndarray:
+    """
+    Count the steps per cell with np.histogram2d().
+
+    @params:
+        - states (np.ndarray): States per step and plane.
+        - weights (np.ndarray): Weight of every step, e.g. its reward.
+
+    @returns:
+        - np.ndarray with the count or summed weight per cell, with the
+        rows along y.
+    """
+    counts, _, _ = np.histogram2d(
+        states[..., 0].ravel(),
+        states[..., 1].ravel(),
+        bins=BINS,
+        range=[[0, ENV_DATA["window_dimensions"][0]], [0, ENV_DATA["window_dimensions"][1]]],
+        weights=None if weights is None else weights.ravel(),
+    )
+    return counts.T
+
+
+@pytest.mark.parametrize("n_planes", [1, 3])
+def test_binning_matches_histogram2d(n_planes: int)-> None:
+    """The visits and summed rewards of all windows match np.histogram2d()."""
+    rng = np.random.default_rng(0)
+    heatmaps = TrajectoryHeatmaps(ENV_DATA, n_windows=2, bins=BINS)
+    episodes = [random_episode(rng, 200, n_planes) for _ in range(5)]
+    for iteration, (states, rewards) in enumerate(episodes):
+        heatmaps.add(iteration, states, rewards)
+
+    states = np.concatenate([states for states, _ in episodes])
+    rewards = np.concatenate([rewards for _, rewards in episodes])
+    windows = heatmaps._windows()  # noqa: SLF001
+    visits = sum(window[3] for window in windows)
+    summed_rewards = sum(window[4] for window in windows)
+
+    np.testing.assert_array_equal(visits, histogram(states))
+    np.testing.assert_allclose(summed_rewards, histogram(states, rewards), atol=1e-9)
+    # the steps outside the window are not counted
+    assert visits.sum() < states.shape[0] * n_planes
+
+
+@pytest.mark.parametrize("n_episodes", [1, 3, 8, 33, 100])
+@pytest.mark.parametrize("n_windows", [1, 4])
+def test_windows_are_balanced(n_episodes: int, n_windows: int)-> None:
+    """The windows cover all episodes in order, in about equal parts."""
+    rng = np.random.default_rng(1)
+    heatmaps = TrajectoryHeatmaps(ENV_DATA, n_windows=n_windows, bins=BINS)
+    for iteration in range(n_episodes):
+        heatmaps.add(iteration, *random_episode(rng, 5))
+
+    assert len(heatmaps._blocks) <= BLOCKS_PER_WINDOW * n_windows  # noqa: SLF001
+    windows = heatmaps._windows()  # noqa: SLF001
+    assert len(windows) == min(n_windows, n_episodes)
+    assert windows[0][0] == 0
+    assert windows[-1][1] == n_episodes - 1
+    for previous, window in itertools.pairwise(windows):
+        assert window[0] == previous[1] + 1
+    sizes = [window[2] for window in windows]
+    assert sum(sizes) == n_episodes
+    # every window gains or loses at most one block of episodes
+    block_size = heatmaps._block_size  # noqa: SLF001
+    assert max(sizes) - min(sizes) <= 2 * block_size
+
+
+def test_save(tmp_path: Path)-> None:
+    """A figure is saved for the whole history and for every window."""
+    rng = np.random.default_rng(2)
+    heatmaps = TrajectoryHeatmaps(ENV_DATA, n_windows=3, bins=(16, 9))
+    heatmaps.save(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+    for iteration in range(6):
+        heatmaps.add(iteration, *random_episode(rng, 20))
+    heatmaps.save(tmp_path)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "heatmaps_all.png",
+        "heatmaps_window-0.png",
+        "heatmaps_window-1.png",
+        "heatmaps_window-2.png",
+    ]
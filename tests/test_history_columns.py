@@ -0,0 +1,113 @@
+"""
+Tests for the columnar history.
+
+The episodes are written by ColumnarSpill, read back by ColumnarHistory
+and converted from json by convert_json(), and compared with the
+observations they were made from.
+"""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.history_columns import (
+    FIELDS,
+    TERMINATED,
+    TRUNCATED,
+    ColumnarHistory,
+    ColumnarSpill,
+    convert_json,
+)
+from utils.numpy_encoder import NumpyEncoder
+
+
+def assert_same(observations: list, expected: list)-> None:
+    """
+    Assert that observations equal the observations they were made from.
+
+    @params:
+        - observations (list): Observations that were read back.
+        - expected (list): Observations that were written.
+    """
+    assert len(observations) == len(expected)
+    for observation, step in zip(observations, expected, strict=True):
+        for value, expected_value in zip(observation[:4], step[:4], strict=True):
+            np.testing.assert_array_equal(value, expected_value)
+        assert observation[4] == {}
+
+
+@pytest.mark.parametrize("n_planes", [None, 2])
+def test_columns_and_index(
+    tmp_path: Path, n_planes: int|None, episode: Callable[..., list],
+)-> None:
+    """Every field is one array, sliced per episode by the offsets."""
+    history = {iteration: episode(iteration, iteration % 4, n_planes) for iteration in range(6)}
+    spill = ColumnarSpill(tmp_path)
+    spill.write(list(history.items())[:4])
+    spill.write(list(history.items())[4:])
+    spill.finalize(tmp_path)
+
+    columns = ColumnarHistory(tmp_path / "_observation_history")
+    lengths = [len(observations) for observations in history.values()]
+    np.testing.assert_array_equal(columns.offsets, np.cumsum([0, *lengths]))
+    np.testing.assert_array_equal(columns.iterations, list(history))
+    step_shape = () if n_planes is None else (n_planes,)
+    for field in FIELDS:
+        assert getattr(columns, field).shape == (sum(lengths), *step_shape)
+    assert columns.n_targets.dtype == np.int32
+
+    # steps alternate between running and terminated, the last one is
+    # truncated
+    flags = columns.episode(3)["flags"].reshape(3, -1)
+    np.testing.assert_array_equal(flags[:, 0], [0, TERMINATED, TRUNCATED])
+    assert np.all(flags == flags[:, :1])
+    assert len(columns) == len(history)
+    for (iteration, observations), (expected_iteration, expected) in zip(
+        columns.items(), history.items(), strict=True,
+    ):
+        assert iteration == expected_iteration
+        assert_same(observations, expected)
+
+
+def test_spill_truncate(tmp_path: Path, episode: Callable[..., list])-> None:
+    """Truncated episodes are gone and writing continues after them."""
+    spill = ColumnarSpill(tmp_path)
+    spill.write([(iteration, episode(iteration, 3)) for iteration in range(5)])
+    spill.truncate(2)
+    spill.write([(9, episode(9, 2))])
+
+    assert spill.n_episodes() == 3
+    items = list(spill.items())
+    assert [iteration for iteration, _ in items] == [0, 1, 9]
+    assert_same(items[2][1], episode(9, 2))
+
+    spill.finalize(tmp_path)
+    columns = ColumnarHistory(tmp_path / "_observation_history")
+    np.testing.assert_array_equal(columns.offsets, [0, 3, 6, 8])
+    assert columns.x.shape == (8,)
+
+
+def test_empty_history(tmp_path: Path)-> None:
+    """A spill without episodes gives empty columns."""
+    ColumnarSpill(tmp_path).finalize(tmp_path)
+
+    columns = ColumnarHistory(tmp_path / "_observation_history")
+    assert len(columns) == 0
+    np.testing.assert_array_equal(columns.offsets, [0])
+    assert list(columns.items()) == []
+
+
+def test_convert_json(tmp_path: Path, episode: Callable[..., list])-> None:
+    """A json history converts to the same columns as a spill."""
+    history = {iteration: episode(iteration, iteration % 3 + 1) for iteration in range(5)}
+    json_path = tmp_path / "_observation_history.json"
+    json_path.write_text(json.dumps(history, cls=NumpyEncoder))
+    convert_json(str(json_path))
+
+    columns = ColumnarHistory(tmp_path / "_observation_history")
+    np.testing.assert_array_equal(columns.iterations, list(history))
+    for (_, observations), expected in zip(columns.items(), history.values(), strict=True):
+        assert_same(observations, expected)
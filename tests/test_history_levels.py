@@ -0,0 +1,174 @@
+"""
+Tests for the history levels, the retention policy and the summaries.
+
+The kept episodes and the written files are compared with what the
+level and retention policy should keep of the added episodes.
+"""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.episode_summaries import OUTCOMES, summarize
+from utils.history_columns import TERMINATED, TRUNCATED, ColumnarHistory
+from utils.history_writer import HistoryWriter
+from utils.numpy_encoder import NumpyEncoder
+
+
+def add_episodes(
+    writer: HistoryWriter, iterations: range, episode: Callable[..., list],
+)-> dict:
+    """
+    Add episodes with a summary to a writer.
+
+    @params:
+        - writer (HistoryWriter): Writer to add to.
+        - iterations (range): Iterations of the episodes.
+        - episode (Callable): Factory for the observations of an
+        episode.
+
+    @returns:
+        - dict with the observations per iteration of the added
+        episodes.
+    """
+    history = {}
+    for iteration in iterations:
+        observations = episode(iteration, iteration % 3 + 1)
+        state, _, is_terminated, is_truncated, _ = observations[-1]
+        summary = summarize(
+            len(observations),
+            float(len(observations)),
+            (state, is_terminated, is_truncated),
+            5,
+        )
+        writer.add(iteration, summary, observations)
+        history[iteration] = observations
+    return history
+
+
+def kept(writer: HistoryWriter)-> list[int]:
+    """
+    List the iterations of the episodes a writer kept.
+
+    @params:
+        - writer (HistoryWriter): Writer to read.
+
+    @returns:
+        - list with the iteration of every kept episode.
+    """
+    return [iteration for iteration, _ in writer.items()]
+
+
+def test_summarize()-> None:
+    """The hits follow from the targets left, the outcome from the flags."""
+    state = np.array([0.0, 0.0, 0.0, 0.0, 2.0])
+
+    assert summarize(4, 1.5, (state, True, False), 5) == (4, 1.5, 3, TERMINATED)
+    assert summarize(4, 1.5, (state, False, True), 5) == (4, 1.5, 3, TRUNCATED)
+    assert summarize(0, 0.0, None, 5) == (0, 0.0, 0, 0)
+    # with a plane axis, all planes have to be truncated
+    planes = np.stack([state, state])
+    last_observation = (planes, np.array([False, False]), np.array([True, False]))
+    assert summarize(2, 0.0, last_observation, 5)[3] == 0
+    assert OUTCOMES[TERMINATED | TRUNCATED] == "terminated and truncated"
+
+
+@pytest.mark.parametrize("history_format", ["json", "npy"])
+@pytest.mark.parametrize("level", ["off", "episode_summary", "full"])
+def test_level_files(
+    tmp_path: Path, history_format: str, level: str, episode: Callable[..., list],
+)-> None:
+    """Every level writes its own files and only "full" the observations."""
+    writer = HistoryWriter(history_format=history_format, level=level)
+    add_episodes(writer, range(4), episode)
+    writer.finalize(tmp_path)
+
+    names = {
+        "off": set(),
+        "episode_summary": {f"_episode_summaries.{history_format}"},
+        "full": {
+            f"_episode_summaries.{history_format}",
+            "_observation_history.json" if history_format == "json" else "_observation_history",
+        },
+    }
+    assert {path.name for path in tmp_path.iterdir()} == names[level]
+    assert kept(writer) == ([0, 1, 2, 3] if level == "full" else [])
+
+
+@pytest.mark.parametrize("history_format", ["json", "npy"])
+def test_summary_files(tmp_path: Path, history_format: str, episode: Callable[..., list])-> None:
+    """The summaries of all episodes are written, whatever is kept."""
+    writer = HistoryWriter(history_format=history_format, keep_last=1, every=2)
+    add_episodes(writer, range(5), episode)
+    writer.finalize(tmp_path)
+
+    if history_format == "npy":
+        summaries = np.load(tmp_path / "_episode_summaries.npy")
+        np.testing.assert_array_equal(summaries["iteration"], range(5))
+        np.testing.assert_array_equal(summaries["length"], [1, 2, 3, 1, 2])
+        np.testing.assert_array_equal(summaries["hits"], 2)
+        # the episodes of even length end on a terminated step
+        np.testing.assert_array_equal(
+            summaries["outcome"],
+            [TRUNCATED, TERMINATED | TRUNCATED, TRUNCATED, TRUNCATED, TERMINATED | TRUNCATED],
+        )
+    else:
+        summaries = json.loads((tmp_path / "_episode_summaries.json").read_text())
+        assert list(summaries) == ["0", "1", "2", "3", "4"]
+        assert summaries["2"] == {
+            "length": 3, "return": 3.0, "hits": 2, "outcome": "truncated",
+        }
+
+
+@pytest.mark.parametrize("history_format", ["json", "npy"])
+def test_every_and_keep_last(
+    tmp_path: Path, history_format: str, episode: Callable[..., list],
+)-> None:
+    """Only the last K of every Nth episode are written."""
+    writer = HistoryWriter(history_format=history_format, keep_last=3, every=2)
+    history = add_episodes(writer, range(11), episode)
+    writer.finalize(tmp_path)
+
+    assert kept(writer) == [6, 8, 10]
+    assert writer.n_episodes == 11
+    if history_format == "json":
+        written = (tmp_path / "_observation_history.json").read_text()
+        expected = {str(iteration): history[iteration] for iteration in (6, 8, 10)}
+        assert written == json.dumps(expected, cls=NumpyEncoder)
+    else:
+        columns = ColumnarHistory(tmp_path / "_observation_history")
+        np.testing.assert_array_equal(columns.iterations, [6, 8, 10])
+        np.testing.assert_array_equal(columns.x, [6, 8, 8, 8, 10, 10])
+
+
+@pytest.mark.parametrize("history_format", ["json", "npy"])
+def test_discard_with_keep_last(history_format: str, episode: Callable[..., list])-> None:
+    """Discarding pops the kept episodes, the dropped ones stay dropped."""
+    writer = HistoryWriter(history_format=history_format, keep_last=3)
+    add_episodes(writer, range(6), episode)
+    # reading in between writes the kept episodes to the spill file
+    assert kept(writer) == [3, 4, 5]
+    writer.discard(4)
+
+    assert writer.n_episodes == 4
+    assert kept(writer) == [3]
+    np.testing.assert_array_equal(writer.summaries()["iteration"], range(4))
+
+    add_episodes(writer, range(10, 13), episode)
+    assert kept(writer) == [10, 11, 12]
+
+
+def test_copy_with_keep_last(episode: Callable[..., list])-> None:
+    """A copy keeps the same recent episodes and continues on its own."""
+    writer = HistoryWriter(keep_last=2)
+    add_episodes(writer, range(4), episode)
+    clone = writer.copy()
+    writer.discard(3)
+    add_episodes(clone, range(4, 5), episode)
+
+    assert kept(writer) == [2]
+    assert kept(clone) == [3, 4]
+    assert clone.n_episodes == 5
@@ -0,0 +1,136 @@
+"""
+Tests for the history writer and its json spill file.
+
+Every test writes episodes, optionally discards some, and compares what
+is read back or finalized with the history dict the episodes would
+have formed in memory.
+"""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from utils.history_writer import HistoryWriter, JsonSpill
+from utils.numpy_encoder import NumpyEncoder
+
+SUMMARY = (0, 0.0, 0, 0)
+
+
+
+def as_json(history: dict)-> str:
+    """
+    Dump a history dict like json.dump does.
+
+    @params:
+        - history (dict): Observations per iteration.
+
+    @returns:
+        - str with the json of the history.
+    """
+    return json.dumps({str(key): value for key, value in history.items()}, cls=NumpyEncoder)
+
+
+def read_back(writer: HistoryWriter)-> dict:
+    """
+    Read the kept episodes of a writer as a dict, the way json does.
+
+    @params:
+        - writer (HistoryWriter): Writer to read.
+
+    @returns:
+        - dict with the observations per iteration.
+    """
+    return json.loads(as_json(dict(writer.items())))
+
+
+@pytest.mark.parametrize("n_episodes", [0, 1, 5])
+def test_json_spill_matches_json_dump(
+    tmp_path: Path, n_episodes: int, episode: Callable[..., list],
+)-> None:
+    """The finalized json spill file is byte for byte json.dump."""
+    history = {iteration: episode(iteration, iteration % 3) for iteration in range(n_episodes)}
+    spill = JsonSpill(tmp_path)
+    spill.write(list(history.items()))
+    output = tmp_path / "output"
+    output.mkdir()
+    spill.finalize(output)
+
+    written = (output / "_observation_history.json").read_text()
+    assert written == as_json(history)
+    assert as_json(dict(spill.items())) == written
+
+
+def test_json_spill_truncate(tmp_path: Path, episode: Callable[..., list])-> None:
+    """Truncated episodes are gone and writing continues after them."""
+    spill = JsonSpill(tmp_path)
+    spill.write([(iteration, episode(iteration, 2)) for iteration in range(4)])
+    spill.truncate(2)
+    spill.write([(7, episode(7, 1))])
+    spill.truncate(5)
+
+    assert spill.n_episodes() == 3
+    assert [iteration for iteration, _ in spill.items()] == [0, 1, 7]
+    output = tmp_path / "output"
+    output.mkdir()
+    spill.finalize(output)
+    expected = {iteration: episode(iteration, 2) for iteration in range(2)}
+    expected[7] = episode(7, 1)
+    assert (output / "_observation_history.json").read_text() == as_json(expected)
+
+
+@pytest.mark.parametrize("thread", [False, True])
+@pytest.mark.parametrize("history_format", ["json", "npy"])
+@pytest.mark.parametrize("discarded", [0, 3, 9, 20])
+def test_discard_round_trip(
+    history_format: str, thread: bool, discarded: int, episode: Callable[..., list],
+)-> None:
+    """Discarding from buffered or written episodes keeps the rest."""
+    writer = HistoryWriter(chunk_size=10, thread=thread, history_format=history_format)
+    history = {}
+    for iteration in range(20):
+        history[iteration] = episode(iteration, 3)
+        writer.add(iteration, SUMMARY, history[iteration])
+
+    writer.discard(20 - discarded)
+    for iteration in range(20 - discarded, 20):
+        del history[iteration]
+    for iteration in range(100, 104):
+        history[iteration] = episode(iteration, 2)
+        writer.add(iteration, SUMMARY, history[iteration])
+
+    assert writer.n_episodes == len(history)
+    assert read_back(writer) == json.loads(as_json(history))
+    writer.close()
+
+
+def test_discard_keeps_every_nth(episode: Callable[..., list])-> None:
+    """With every, only the kept episodes before the cut remain."""
+    writer = HistoryWriter(chunk_size=4, every=3)
+    for iteration in range(12):
+        writer.add(iteration, SUMMARY, episode(iteration, 2))
+    writer.discard(7)
+
+    assert writer.n_episodes == 7
+    assert [iteration for iteration, _ in writer.items()] == [0, 3, 6]
+
+
+def test_copy_continues_independently(episode: Callable[..., list])-> None:
+    """A copy and its original diverge after the copy is made."""
+    writer = HistoryWriter(chunk_size=5)
+    for iteration in range(6):
+        writer.add(iteration, SUMMARY, episode(iteration, 2))
+    clone = writer.copy()
+    writer.discard(2)
+    clone.add(6, SUMMARY, episode(6, 2))
+
+    assert [iteration for iteration, _ in writer.items()] == [0, 1]
+    assert [iteration for iteration, _ in clone.items()] == list(range(7))
+
+
+def test_finalize_empty(tmp_path: Path)-> None:
+    """A writer without episodes writes an empty json object."""
+    HistoryWriter().finalize(tmp_path)
+
+    assert (tmp_path / "_observation_history.json").read_text() == "{}"
@@ -0,0 +1,126 @@
+"""
+Tests for the snapshots and clones of the environments.
+
+A snapshot taken in the middle of an episode has to replay the same
+trajectory, and a clone must not share any mutable buffer with the
+environment it was copied from.
+"""
+
+import numpy as np
+import pytest
+
+from environment.base_env import BaseEnv
+from environment.vector_env import VectorEnv
+
+# probabilities of the actions, shooting often enough to keep bullets
+# in flight
+ACTION_P = [0.3, 0.15, 0.15, 0.1, 0.05, 0.25]
+
+
+def run(env: BaseEnv, actions: np.ndarray)-> list:
+    """
+    Step an environment, resetting a BaseEnv whenever its episode ends.
+
+    @params:
+        - env (BaseEnv): Environment to step.
+        - actions (np.ndarray): Action per step, per world for a
+        VectorEnv.
+
+    @returns:
+        - list with the state, reward, is_terminal and is_truncated of
+        every step.
+    """
+    steps = []
+    for action in actions:
+        state, reward, is_terminated, is_truncated, _ = env.step(action)
+        steps.append((state, reward, is_terminated, is_truncated))
+        if not isinstance(env, VectorEnv) and (is_terminated or is_truncated):
+            env.reset()
+    return steps
+
+
+def buffers(env: BaseEnv)-> dict:
+    """
+    Collect the mutable buffers of the simulation of an environment.
+
+    @params:
+        - env (BaseEnv): Environment to collect from.
+
+    @returns:
+        - dict with every array and list of the entities and their
+        parts, by owner and attribute name.
+    """
+    entities = env._entities  # noqa: SLF001
+    owners = {
+        "entities": entities,
+        "store": entities.store,
+        "airplanes": entities.airplanes,
+        "targets": entities.targets,
+        "bullets": entities.bullets,
+        "impacts": entities._impacts,  # noqa: SLF001
+        "target_index": entities.target_index,
+    }
+    return {
+        f"{owner}.{name}": value
+        for owner, instance in owners.items()
+        for name, value in vars(instance).items()
+        if isinstance(value, (np.ndarray, list))
+    }
+
+
+@pytest.mark.parametrize("collision_mode", ["pairwise", "event"])
+@pytest.mark.parametrize("num_envs", [None, 3])
+def test_snapshot_replays_trajectory(collision_mode: str, num_envs: int|None)-> None:
+    """Replaying the actions after set_state() gives the same steps."""
+    options = {"seed": 2, "collision_mode": collision_mode, "history_level": "off"}
+    env = BaseEnv(**options) if num_envs is None else VectorEnv(num_envs=num_envs, **options)
+    rng = np.random.default_rng(0)
+    size = 600 if num_envs is None else (600, num_envs)
+    actions = rng.choice(6, p=ACTION_P, size=size)
+
+    run(env, actions[:200])
+    snapshot = env.get_state()
+    first = run(env, actions[200:])
+    env.set_state(snapshot)
+    second = run(env, actions[200:])
+
+    for step, replayed in zip(first, second, strict=True):
+        for value, replayed_value in zip(step, replayed, strict=True):
+            np.testing.assert_array_equal(replayed_value, value)
+
+
+@pytest.mark.parametrize("collision_mode", ["pairwise", "event"])
+def test_clone_shares_no_buffers(collision_mode: str)-> None:
+    """A clone has its own buffers, including the bullet ring and impacts."""
+    env = VectorEnv(seed=4, num_envs=3, collision_mode=collision_mode, history_level="off")
+    ring_size = env._entities.bullets.ring_size  # noqa: SLF001
+    rng = np.random.default_rng(1)
+    # shoot until the rings have grown, and fly on until some impacts
+    # are scheduled
+    impacts = env._entities._impacts  # noqa: SLF001
+    run(env, np.full((ring_size + 1, 3), 5))
+    for _ in range(500):
+        if collision_mode == "pairwise" or impacts._heap:  # noqa: SLF001
+            break
+        run(env, rng.choice(6, p=ACTION_P, size=(1, 3)))
+    assert env._entities.bullets.ring_size > ring_size  # noqa: SLF001
+    if collision_mode == "event":
+        assert impacts._heap  # noqa: SLF001
+
+    clone = env.clone()
+    clone_buffers = buffers(clone)
+    for name, value in buffers(env).items():
+        if isinstance(value, list):
+            assert clone_buffers[name] is not value, name
+        else:
+            assert not np.shares_memory(clone_buffers[name], value), name
+
+    # stepping the clone leaves the original as it was
+    snapshot = env.get_state()
+    actions = rng.choice(6, p=ACTION_P, size=(200, 3))
+    expected = run(env, actions)
+    env.set_state(snapshot)
+    run(clone, rng.choice(6, p=ACTION_P, size=(200, 3)))
+    for step, replayed in zip(expected, run(env, actions), strict=True):
+        for value, replayed_value in zip(step, replayed, strict=True):
+            np.testing.assert_array_equal(replayed_value, value)
@@ -0,0 +1,66 @@
+"""
+Tests for the vectorized environment.
+
+A VectorEnv with a single world is stepped next to a BaseEnv with the
+same seed and actions, and has to give the same observations.
+"""
+
+import numpy as np
+import pytest
+
+from environment.base_env import BaseEnv
+from environment.vector_env import VectorEnv
+
+
+@pytest.mark.parametrize("collision_mode", ["pairwise", "event"])
+@pytest.mark.parametrize("frame_skip", [2, 5])
+def test_single_world_matches_base_env(collision_mode: str, frame_skip: int)-> None:
+    """Worlds that end within a frame skip stop like a BaseEnv does."""
+    options = {
+        "seed": 3,
+        "frame_skip": frame_skip,
+        "collision_mode": collision_mode,
+        "history_level": "off",
+    }
+    base = BaseEnv(**options)
+    vector = VectorEnv(num_envs=1, **options)
+    base.reset(seed=5)
+    vector.reset(seed=5)
+
+    rng = np.random.default_rng(0)
+    n_episodes = 0
+    for _ in range(800):
+        action = int(rng.choice(6, p=[0.3, 0.15, 0.15, 0.1, 0.05, 0.25]))
+        state, reward, is_terminated, is_truncated, _ = base.step(action)
+        vector_state, vector_reward, vector_terminated, vector_truncated, info = \
+            vector.step(np.array([action]))
+        # the state of a world that ended is replaced by its reset state
+        if "final_observation" in info:
+            vector_state = info["final_observation"]
+
+        np.testing.assert_allclose(vector_state[0], state)
+        assert vector_reward[0] == pytest.approx(reward)
+        assert vector_terminated[0] == is_terminated
+        assert vector_truncated[0] == is_truncated
+        if is_terminated or is_truncated:
+            n_episodes += 1
+            base.reset()
+
+    # the comparison spans several episodes
+    assert n_episodes > 1
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_reset_state_matches_step(dtype: str)-> None:
+    """The reset state has the precision and target count of a step."""
+    base = BaseEnv(seed=3, dtype=dtype, history_level="off")
+    vector = VectorEnv(num_envs=2, seed=3, dtype=dtype, history_level="off")
+    for env, action in ((base, 0), (vector, np.zeros(2, dtype=int))):
+        # kill a target so the count differs from the number of targets
+        env._entities.targets.alive[..., 0] = False  # noqa: SLF001
+        state, _ = env.reset()
+        assert state.dtype == np.dtype(dtype)
+        step_state, *_ = env.step(action)
+        assert step_state.dtype == state.dtype
+        np.testing.assert_array_equal(state[..., 4], step_state[..., 4])
+        assert np.all(state[..., 4] == env._entities.targets.alive.shape[-1])  # noqa: SLF001
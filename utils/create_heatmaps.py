@@ -0,0 +1,315 @@
+"""
+Utility module for creating heatmaps of agent trajectories.
+
+Where create_path_plots() saves a figure per episode, this module
+aggregates all episodes into a fixed number of figures: one for the
+whole history and one per window of consecutive episodes. Each shows
+how often every cell of the window was visited and the mean reward that
+was received in it.
+
+The history is read in a single pass, in which the positions and
+rewards of every step are added to a grid of cells, so the cost is
+linear in the number of steps and the memory does not depend on it.
+"""
+
+from pathlib import Path
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm, Normalize
+from matplotlib.figure import Figure
+
+from utils.create_path_plots import episode_arrays, load_background
+
+# number of cells along the x and y axis of the window
+HEATMAP_BINS = (64, 36)
+# number of windows of episodes
+HEATMAP_WINDOWS = 4
+# the episodes are counted in blocks, of which there are at most this
+# many per window, see TrajectoryHeatmaps
+BLOCKS_PER_WINDOW = 8
+
+
+class TrajectoryHeatmaps:
+    """
+    Trajectory heatmaps class.
+
+    Counts the visits and sums the rewards per cell of the episodes
+    that are added. Positions outside the window are not counted, the
+    planes of multi-plane episodes are counted together.
+
+    As the number of episodes is not known in advance, the episodes are
+    counted in blocks of equal size. Once there are BLOCKS_PER_WINDOW
+    blocks per window, consecutive blocks are merged and the block size
+    doubles. The blocks are divided over the windows when the figures
+    are saved, so every window holds about the same number of episodes.
+
+    This class has no public member variables.
+
+    @public methods:
+    + add(iteration: int, states: np.ndarray, rewards: np.ndarray)-> None
+        Add the steps of an episode.
+    + save(folder_path: str)-> None
+        Save the heatmaps of all episodes and of every window.
+    """
+
+    def __init__(
+        self,
+        env_data: dict,
+        n_windows: int = HEATMAP_WINDOWS,
+        bins: tuple[int, int] = HEATMAP_BINS,
+    )-> None:
+        """
+        Initialize the TrajectoryHeatmaps class.
+
+        @params:
+            - env_data (dict): Environment configuration.
+                See config/default_env.yaml for more info.
+                In theory, it only needs to contain the window
+                dimensions and preferably the background data.
+            - n_windows (int): Number of windows of episodes.
+            - bins (tuple[int, int]): Number of cells along the x and y
+            axis of the window.
+        """
+        if n_windows < 1:
+            raise ValueError("`n_windows` must be at least 1.")
+        self._env_data = env_data
+        self._n_windows = n_windows
+        self._bins = bins
+        self._size = np.array(env_data["window_dimensions"], dtype=float)
+
+        # per block: the first and last iteration, the number of
+        # episodes, the visits and the summed rewards per cell
+        self._blocks = []
+        self._block_size = 1
+
+    def add(self, iteration: int, states: np.ndarray, rewards: np.ndarray)-> None:
+        """
+        Add the steps of an episode.
+
+        @params:
+            - iteration (int): Iteration of the episode.
+            - states (np.ndarray): States per step and plane.
+            - rewards (np.ndarray): Rewards per step and plane.
+        """
+        if not self._blocks or self._blocks[-1][2] == self._block_size:
+            if len(self._blocks) == BLOCKS_PER_WINDOW * self._n_windows:
+                self._merge_blocks()
+            self._blocks.append([
+                iteration,
+                iteration,
+                0,
+                np.zeros(self._bins[::-1], dtype=np.int64),
+                np.zeros(self._bins[::-1]),
+            ])
+        block = self._blocks[-1]
+        block[1] = iteration
+        block[2] += 1
+
+        positions = states[..., :2].reshape(-1, 2)
+        rewards = rewards.reshape(-1)
+        inside = np.all((positions >= 0) & (positions < self._size), axis=1)
+        # index of the cell of every step, row-major in (y, x)
+        cells = np.minimum(
+            (positions[inside] / self._size * self._bins).astype(np.intp),
+            np.array(self._bins) - 1,
+        )
+        cells = cells[:, 1] * self._bins[0] + cells[:, 0]
+        n_cells = self._bins[0] * self._bins[1]
+        block[3] += np.bincount(cells, minlength=n_cells).reshape(block[3].shape)
+        block[4] += np.bincount(
+            cells,
+            weights=rewards[inside],
+            minlength=n_cells,
+        ).reshape(block[4].shape)
+
+    def _merge_blocks(self)-> None:
+        """Merge every two consecutive blocks and double the block size."""
+        merged = []
+        for first, second in zip(self._blocks[::2], self._blocks[1::2], strict=True):
+            merged.append([
+                first[0],
+                second[1],
+                first[2] + second[2],
+                first[3] + second[3],
+                first[4] + second[4],
+            ])
+        self._blocks = merged
+        self._block_size *= 2
+
+    def _windows(self)-> list[list]:
+        """
+        Divide the blocks over the windows.
+
+        @returns:
+            - list with, per window that holds any episodes, the first
+            and last iteration, the number of episodes, the visits and
+            the summed rewards per cell.
+        """
+        n_episodes = np.array([block[2] for block in self._blocks])
+        # every block goes to the window in which its middle episode
+        # falls
+        middles = np.cumsum(n_episodes) - n_episodes / 2
+        indices = (middles * self._n_windows // np.sum(n_episodes)).astype(int)
+        windows = []
+        for index in np.unique(indices):
+            blocks = [
+                block for block, block_index in zip(self._blocks, indices, strict=True)
+                if block_index == index
+            ]
+            windows.append([
+                blocks[0][0],
+                blocks[-1][1],
+                sum(block[2] for block in blocks),
+                sum(block[3] for block in blocks),
+                sum(block[4] for block in blocks),
+            ])
+        return windows
+
+    def save(self, folder_path: str)-> None:
+        """
+        Save the heatmaps of all episodes and of every window.
+
+        Saves heatmaps_all.png and heatmaps_window-{index}.png, each
+        with the visits per cell on a logarithmic scale and the mean
+        reward per cell. The mean rewards of all figures share one
+        colour scale. Nothing is saved if no episodes were added.
+
+        @params:
+            - folder_path (str): Path to output folder.
+        """
+        if not self._blocks:
+            return
+        windows = self._windows()
+        # the mean reward of the whole history lies within the range of
+        # the windows
+        mean_rewards = [
+            np.divide(
+                reward,
+                visits,
+                out=np.full(visits.shape, np.nan),
+                where=visits > 0,
+            )
+            for *_, visits, reward in windows
+        ]
+        visited = np.concatenate([
+            mean_reward[np.isfinite(mean_reward)] for mean_reward in mean_rewards
+        ])
+        norm = Normalize(visited.min(), visited.max()) if visited.size \
+            else Normalize()
+
+        background = load_background(self._env_data)
+        first, last, n_episodes = windows[0][0], windows[-1][1], \
+            sum(window[2] for window in windows)
+        visits = sum(window[3] for window in windows)
+        reward = sum(window[4] for window in windows)
+        self._plot(
+            Path(folder_path) / "heatmaps_all.png",
+            f"Iterations {first} to {last}, {n_episodes} episodes.",
+            visits,
+            np.divide(reward, visits, out=np.full(visits.shape, np.nan), where=visits > 0),
+            norm=norm,
+            background=background,
+        )
+        for index, ((first, last, n_episodes, visits, _), mean_reward) in enumerate(
+            zip(windows, mean_rewards, strict=True),
+        ):
+            self._plot(
+                Path(folder_path) / f"heatmaps_window-{index}.png",
+                f"Iterations {first} to {last}, {n_episodes} episodes.",
+                visits,
+                mean_reward,
+                norm=norm,
+                background=background,
+            )
+
+    def _plot(
+        self,
+        path: Path,
+        title: str,
+        visits: np.ndarray,
+        mean_reward: np.ndarray,
+        *,
+        norm: Normalize,
+        background: np.ndarray|None,
+    )-> None:
+        """
+        Plot the visits and the mean reward per cell and save the figure.
+
+        @params:
+            - path (Path): Path to save the figure to.
+            - title (str): Title of the figure.
+            - visits (np.ndarray): Visits per cell.
+            - mean_reward (np.ndarray): Mean reward per cell, nan for
+            cells that were not visited.
+            - norm (Normalize): Normalization of the mean rewards.
+            - background (np.ndarray): Background image, if any.
+        """
+        figure = Figure(figsize=(12.8, 4.2))
+        FigureCanvasAgg(figure)
+        visits_ax, reward_ax = figure.subplots(1, 2)
+        extent = (0, self._size[0], self._size[1], 0)
+        for ax in (visits_ax, reward_ax):
+            if background is not None:
+                ax.imshow(background, extent=extent)
+            ax.set_xlim(0, self._size[0])
+            ax.set_ylim(self._size[1], 0)
+
+        image = visits_ax.imshow(
+            np.ma.masked_equal(visits, 0),
+            extent=extent,
+            cmap=mpl.colormaps["magma"],
+            norm=LogNorm(1, max(np.max(visits), 1)),
+            interpolation="nearest",
+            alpha=0.8,
+        )
+        figure.colorbar(image, ax=visits_ax).set_label("Visits")
+        visits_ax.set_title("Visits per cell")
+
+        image = reward_ax.imshow(
+            np.ma.masked_invalid(mean_reward),
+            extent=extent,
+            cmap=mpl.colormaps["RdYlGn"],
+            norm=norm,
+            interpolation="nearest",
+            alpha=0.8,
+        )
+        figure.colorbar(image, ax=reward_ax).set_label("Mean reward")
+        reward_ax.set_title("Mean reward per cell")
+
+        figure.suptitle(title)
+        figure.savefig(path)
+
+
+def create_heatmaps(
+    folder_path: str,
+    observation_history: dict,
+    env_data: dict,
+    n_windows: int = HEATMAP_WINDOWS,
+    bins: tuple[int, int] = HEATMAP_BINS,
+)-> None:
+    """
+    Create heatmaps of the paths of the agent.
+
+    Reads the observation history once and saves n_windows + 1
+    figures, however many episodes it holds, see TrajectoryHeatmaps.
+
+    @params:
+        - folder_path (str): Path to output folder.
+        If this folder does not exist, no new one will be made.
+        - observation_history (dict): Dictionary containing list of
+        observations per iteration/run, or a HistoryWriter or
+        ColumnarHistory, which give the same items().
+        - env_data (dict): Environment configuration.
+            See config/default_env.yaml for more info.
+            In theory, it only needs to contain the window dimensions
+            and preferably the background data.
+        - n_windows (int): Number of windows of episodes.
+        - bins (tuple[int, int]): Number of cells along the x and y axis
+        of the window.
+    """
+    heatmaps = TrajectoryHeatmaps(env_data, n_windows, bins)
+    for iteration, states, rewards in episode_arrays(observation_history):
+        heatmaps.add(iteration, states, rewards)
+    heatmaps.save(folder_path)
@@ -3,13 +3,296 @@ Utility module for creating path plots of agent trajectories.
 
 This module provides functionality to visualize the path taken by an agent,
 with color coding based on rewards received during the trajectory.
+
+The figures are drawn by a PathPlotter, which decodes the background,
+see load_background(), and builds its figure once and only swaps the
+paths per episode. If asked for, the episodes are spread over a pool of
+processes, each with its own PathPlotter.
 """
 
+import concurrent.futures
 import itertools
+import multiprocessing
+import sys
+from collections.abc import Iterator
 
-import matplotlib.pyplot as plt
+import matplotlib as mpl
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.cm import ScalarMappable
 from matplotlib.collections import LineCollection
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+from matplotlib.image import imread
+
+# number of episodes that are sent to the pool per worker before the
+# first of them has to be finished, so the history is never in memory
+# as a whole
+EPISODES_PER_WORKER = 2
+
+# plotter of a worker process, made once by _init_worker()
+_worker_plotter = None
+
+
+def load_background(env_data: dict)-> np.ndarray|None:
+    """
+    Load the background of the environment.
+
+    @params:
+        - env_data (dict): Environment configuration.
+            See config/default_env.yaml for more info.
+
+    @returns:
+        - np.ndarray with the rgba background image, or None if the
+        environment data has no background.
+    """
+    # try to load the background, if available
+    # if any of these settings are missing,
+    # nothing will be plotted
+    try:
+        background = imread(env_data["background"]["sprite"])
+    except KeyError:
+        print(  # noqa: T201
+            "\033[31mERROR OCCURRED DURING PLOTTING FIGURES: Unable to",
+            " locate background image from environment data. Ignoring ",
+            "issue and attempting to make plots without background ima",
+            "ge.\033[37m",
+        )
+        return None
+    # matplotlib adds the alpha channel to rgb images every time the
+    # figure is drawn
+    if background.shape[-1] == 3:  # noqa: PLR2004
+        background = np.dstack((background, np.ones(background.shape[:2])))
+    return background
+
+
+class PathPlotter:
+    """
+    Path plotter class.
+
+    Holds a single figure, drawn on by Agg without pyplot, with the
+    background of the environment, the axes and the colour bar. Every
+    plot only replaces the paths, the normalization of the rewards and
+    the title.
+
+    This class has no public member variables.
+
+    @public methods:
+    + plot(
+        path: str,
+        iteration: int,
+        states: np.ndarray,
+        rewards: np.ndarray
+      )-> None
+        Plot the paths of an episode and save the figure.
+    """
+
+    def __init__(self, env_data: dict)-> None:
+        """
+        Initialize the PathPlotter class.
+
+        @params:
+            - env_data (dict): Environment configuration.
+                See config/default_env.yaml for more info.
+                In theory, it only needs to contain the window
+                dimensions and preferably the background data.
+        """
+        self._figure = Figure()
+        FigureCanvasAgg(self._figure)
+        self._ax = self._figure.subplots()
+        self._ax.set_xlim(0, env_data["window_dimensions"][0])
+        self._ax.set_ylim(0, env_data["window_dimensions"][1])
+        self._ax.invert_yaxis()
+
+        # the paths share the colour map and normalization of the colour
+        # bar
+        self._norm = Normalize()
+        self._mappable = ScalarMappable(
+            norm=self._norm,
+            cmap=mpl.colormaps["RdYlGn"],
+        )
+        self._colorbar = self._figure.colorbar(self._mappable, ax=self._ax)
+        self._colorbar.set_label("Reward")
+        self._lines = []
+
+        background = load_background(env_data)
+        if background is not None:
+            self._ax.imshow(background)
+
+    def plot(
+        self,
+        path: str,
+        iteration: int,
+        states: np.ndarray,
+        rewards: np.ndarray,
+    )-> None:
+        """
+        Plot the paths of an episode and save the figure.
+
+        @params:
+            - path (str): Path to save the figure to.
+            - iteration (int): Iteration of the episode, for the title.
+            - states (np.ndarray): States per step and plane.
+            - rewards (np.ndarray): Rewards per step and plane.
+        """
+        for line in self._lines:
+            line.remove()
+        self._lines = []
+
+        # both limits are set at once, which updates the colour bar
+        self._mappable.set_clim(rewards.min(), rewards.max())
+        for plane in range(states.shape[1]):
+            points = states[:, plane, :2].reshape(-1, 1, 2)
+            segments = np.concatenate([points[:-1], points[1:]], axis=1)
+
+            # Create a LineCollection from the segments
+            lc = LineCollection(
+                segments,
+                cmap=self._mappable.get_cmap(),
+                norm=self._norm,
+            )
+            lc.set_array(rewards[:, plane])
+            self._lines.append(self._ax.add_collection(lc, autolim=False))
+        self._ax.set_title(f"Flight path for iteration {iteration}.")
+
+        self._figure.savefig(path)
+
+
+def _init_worker(env_data: dict)-> None:
+    """
+    Create the plotter of a worker process.
+
+    @params:
+        - env_data (dict): Environment configuration.
+    """
+    global _worker_plotter  # noqa: PLW0603
+    _worker_plotter = PathPlotter(env_data)
+
+
+def _plot_in_worker(
+    path: str,
+    iteration: int,
+    states: np.ndarray,
+    rewards: np.ndarray,
+)-> None:
+    """
+    Plot an episode with the plotter of a worker process.
+
+    @params:
+        - path (str): Path to save the figure to.
+        - iteration (int): Iteration of the episode.
+        - states (np.ndarray): States per step and plane.
+        - rewards (np.ndarray): Rewards per step and plane.
+    """
+    _worker_plotter.plot(path, iteration, states, rewards)
+
+
+def episode_arrays(
+    observation_history: dict,
+    figs_stride: int=1,
+)-> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Generate the states and rewards of the episodes to plot.
+
+    @params:
+        - observation_history (dict): History, see create_path_plots().
+        - figs_stride (int): Stride of the episodes.
+
+    @returns:
+        - Iterator with the iteration, the states per step and plane
+        and the rewards per step and plane of every non-empty episode.
+    """
+    for iteration, observations in itertools.islice(
+        observation_history.items(), 0, None, figs_stride,
+    ):
+        # if any of the runs are empty, dont plot them
+        if len(observations) == 0:
+            continue
+        # the states and rewards may have a plane axis, every plane
+        # gets its own path
+        states = np.array([state for state, *_ in observations])
+        states = states.reshape(states.shape[0], -1, states.shape[-1])
+        rewards = np.array([reward for _, reward, *_ in observations])
+        yield iteration, states, rewards.reshape(states.shape[:2])
+
+
+def _plot_in_process(
+    folder_path: str,
+    episodes: Iterator[tuple[int, np.ndarray, np.ndarray]],
+    env_data: dict,
+)-> Iterator[int]:
+    """
+    Draw the figures in this process.
+
+    @params:
+        - folder_path (str): Path to output folder.
+        - episodes (Iterator): Episodes to plot, see episode_arrays().
+        - env_data (dict): Environment configuration.
+
+    @returns:
+        - Iterator with the number of figures saved since the last one.
+    """
+    plotter = PathPlotter(env_data)
+    for iteration, states, rewards in episodes:
+        plotter.plot(
+            f"{folder_path}/flight_path_it-{iteration}.png",
+            iteration,
+            states,
+            rewards,
+        )
+        yield 1
+
+
+def _plot_in_pool(
+    folder_path: str,
+    episodes: Iterator[tuple[int, np.ndarray, np.ndarray]],
+    env_data: dict,
+    n_workers: int,
+)-> Iterator[int]:
+    """
+    Draw the figures with a pool of processes.
+
+    At most EPISODES_PER_WORKER episodes per worker are sent to the
+    pool before the first of them has to be finished.
+
+    @params:
+        - folder_path (str): Path to output folder.
+        - episodes (Iterator): Episodes to plot, see episode_arrays().
+        - env_data (dict): Environment configuration.
+        - n_workers (int): Number of processes.
+
+    @returns:
+        - Iterator with the number of figures saved since the last one.
+    """
+    # the workers are spawned, forking copies the whole environment and
+    # is not safe once threads, e.g. of the history writer, are running
+    with concurrent.futures.ProcessPoolExecutor(
+        n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(env_data,),
+    ) as pool:
+        pending = set()
+        for iteration, states, rewards in episodes:
+            pending.add(pool.submit(
+                _plot_in_worker,
+                f"{folder_path}/flight_path_it-{iteration}.png",
+                iteration,
+                states,
+                rewards,
+            ))
+            if len(pending) < n_workers * EPISODES_PER_WORKER:
+                continue
+            done, pending = concurrent.futures.wait(
+                pending,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                future.result()
+            yield len(done)
+        for future in concurrent.futures.as_completed(pending):
+            future.result()
+            yield 1
 
 
 def create_path_plots(
@@ -17,79 +300,62 @@ def create_path_plots(
     observation_history: dict,
     env_data: dict,
     figs_stride: int=1,
+    *,
+    n_workers: int|None = None,
+    progress: bool=True,
 )-> None:
     """
     Create plots that display the path of the agent.
 
     It tries to draw background of the environment on the
-    figure. Above which it plots the x,y flight history of the agent.
+    figure. Above which it plots the x,y flight history of the agent,
+    or of every plane if the states have a plane axis.
     It colours this graph in accordance with the normalized reward
     provided. It saves the figure in the provided folder. It does this
     for each of the runs in the observation history.
 
+    Every figure is saved as soon as it is drawn. With more than one
+    worker, the episodes are drawn by a pool of processes, a few at a
+    time, see benchmarks/path_plots.py. Starting the pool costs more
+    than drawing a few figures, so a few episodes are always drawn in
+    this process.
+
     @params:
         - folder_path (str): Path to output folder.
         If this folder does not exist, no new one will be made.
         - observation_history (dict): Dictionary containing list of
-        observations per iteration/run.
+        observations per iteration/run, or a HistoryWriter or
+        ColumnarHistory, which give the same items().
         - env_data (dict): Environment configuration.
             See config/default_env.yaml for more info.
             In theory, it only needs to contain the window dimensions
             and preferably the background data.
         - figs_stride (int): Stride for saving the figures.
+        - n_workers (int): Number of processes to draw the figures
+        with. If None or 1, the figures are drawn in this process. The
+        processes are spawned, so a script that uses them has to guard
+        its entry point with `if __name__ == "__main__":`.
+        - progress (bool): Print the number of saved figures.
     """
-    obs_hist_iter = iter(observation_history.items())
-    for iteration, observations in itertools.islice(
-        obs_hist_iter, 0, None, figs_stride,
-    ):
-        try:
-            vertices = [
-                (x, y, r) for (x, y, _, _, _), r, _, _, _ in observations
-            ]
-            
-            xs, ys, rewards = zip(*vertices)
-            normalize_rewards = plt.Normalize(min(rewards), max(rewards))
+    episodes = episode_arrays(observation_history, figs_stride)
+    # only the first episodes are read, to count whether a pool is
+    # worth starting
+    first = list(itertools.islice(episodes, EPISODES_PER_WORKER + 1))
+    episodes = itertools.chain(first, episodes)
+    if n_workers is None or n_workers == 1 or len(first) <= EPISODES_PER_WORKER:
+        saved = _plot_in_process(folder_path, episodes, env_data)
+    else:
+        saved = _plot_in_pool(folder_path, episodes, env_data, n_workers)
 
-            colour_map = plt.get_cmap("RdYlGn")
-
-            points = np.array([xs, ys]).T.reshape(-1, 1, 2)
-            segments = np.concatenate([points[:-1], points[1:]], axis=1)
-            
-            # Create a LineCollection from the segments
-            lc = LineCollection(
-                segments,
-                cmap=colour_map,
-                norm=normalize_rewards,
-            )
-            lc.set_array(np.array(rewards))
-            
-            fig, ax = plt.subplots()
-            ax.add_collection(lc)
-            ax.set_xlim(0, env_data["window_dimensions"][0])
-            ax.set_ylim(0, env_data["window_dimensions"][1])
-            ax.invert_yaxis()
-            cbar = plt.colorbar(lc, ax=ax)
-            cbar.set_label("Reward")
-            ax.set_title(f"Flight path for iteration {iteration}.")
-
-            # try to plot the backgrounds, if available
-            # if any of these settings are missing,
-            # nothing will be plotted
-            try:
-                background_image = plt.imread(env_data["background"]["sprite"])
-                ax.imshow(background_image)
-
-            except KeyError:
-                print(  # noqa: T201
-                    "\033[31mERROR OCCURRED DURING PLOTTING FIGURES: Unable to",
-                    " locate background image from environment data. Ignoring ",
-                    "issue and attempting to make plots without background ima",
-                    "ge.\033[37m",
-                )
-
-            plt.savefig(f"{folder_path}/flight_path_it-{iteration}")
-            plt.close(fig)
-        
-        # if any of the runs are empty, dont plot them
-        except ValueError:
-            continue
+    # the count is only rewritten in place on a terminal, otherwise
+    # just the final count is printed
+    rewrite = progress and sys.stdout.isatty()
+    n_saved = 0
+    for n_done in saved:
+        n_saved += n_done
+        if rewrite:
+            print(f"\rSaved {n_saved} path plots", end="", flush=True)  # noqa: T201
+    if rewrite and n_saved:
+        print()  # noqa: T201
+    elif progress and n_saved:
+        print(f"Saved {n_saved} path plots")  # noqa: T201
@@ -0,0 +1,234 @@
+"""
+Episode summaries module.
+
+This module contains the summary of an episode: its length, return,
+number of targets hit and outcome, which is all that is recorded at the
+"episode_summary" history level. The summaries are appended to a spill
+file by the SummarySpill class, and written as _episode_summaries.json
+or as _episode_summaries.npy, a structured array with a field per
+column of SUMMARY_FIELDS.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from utils.history_columns import TERMINATED, TRUNCATED
+from utils.numpy_encoder import NumpyEncoder
+
+# columns of a summary, the return has a plane axis for multiple planes
+SUMMARY_FIELDS = ("iteration", "length", "return", "hits", "outcome")
+# name of every combination of the bits of the outcome
+OUTCOMES = {
+    0: "unfinished",
+    TERMINATED: "terminated",
+    TRUNCATED: "truncated",
+    TERMINATED | TRUNCATED: "terminated and truncated",
+}
+
+# number of summaries that are converted to json at once
+JSON_CHUNK_SIZE = 4096
+
+
+def summarize(
+    length: int,
+    episode_return: float|np.ndarray,
+    last_observation: tuple|None,
+    n_targets: int,
+)-> tuple[int, float|np.ndarray, int, int]:
+    """
+    Summarize an episode.
+
+    @params:
+        - length (int): Number of steps of the episode.
+        - episode_return (float|np.ndarray): Sum of the rewards of the
+        episode, per plane for multiple planes.
+        - last_observation (tuple): State, is_terminal and is_truncated
+        of the last step of the episode, None if it has no steps.
+        - n_targets (int): Number of targets at the start of the
+        episode.
+
+    @returns:
+        - tuple with the length, the return, the number of targets
+        that were hit and the outcome, with the bits TERMINATED if the
+        targets were all hit and TRUNCATED if the plane(s) all died.
+    """
+    if last_observation is None:
+        return length, episode_return, 0, 0
+    state, is_terminated, is_truncated = last_observation
+    hits = n_targets - int(np.ravel(state[..., 4])[0])
+    outcome = TERMINATED * bool(np.any(is_terminated)) | \
+        TRUNCATED * bool(np.all(is_truncated))
+    return length, episode_return, hits, outcome
+
+
+class SummarySpill:
+    """
+    Summary spill file class.
+
+    The summaries are appended to a file of raw structured records,
+    see SUMMARY_FIELDS, of which the dtype is known once the first
+    summary is written.
+
+    This class has no public member variables.
+
+    @public methods:
+    + n_summaries()-> int
+        Count the summaries written.
+    + write(iteration: int, summary: tuple)-> None
+        Write the summary of an episode.
+    + flush()-> None
+        Flush the written summaries to disk.
+    + truncate(n_summaries: int)-> None
+        Remove the summaries written after the first n_summaries.
+    + copy_from(other: SummarySpill)-> None
+        Replace the summaries by a copy of those of another spill file.
+    + read()-> np.ndarray
+        Read the written summaries.
+    + finalize(folder_path: str, history_format: str)-> None
+        Write the summaries to _episode_summaries.json or .npy.
+    """
+
+    def __init__(self, directory: str)-> None:
+        """
+        Initialize the SummarySpill class.
+
+        @params:
+            - directory (str): Directory to put the spill file in.
+        """
+        self._path = Path(directory) / "_episode_summaries.bin"
+        self._file = self._path.open("w+b")
+        self._dtype = None
+        self._n_summaries = 0
+
+    def n_summaries(self)-> int:
+        """
+        Count the summaries written.
+
+        @returns:
+            - int with the number of summaries.
+        """
+        return self._n_summaries
+
+    def write(self, iteration: int, summary: tuple)-> None:
+        """
+        Write the summary of an episode.
+
+        @params:
+            - iteration (int): Iteration of the episode.
+            - summary (tuple): Summary of the episode, see summarize().
+        """
+        if self._dtype is None:
+            self._dtype = np.dtype([
+                ("iteration", np.int64),
+                ("length", np.int64),
+                ("return", np.float64, np.shape(summary[1])),
+                ("hits", np.int64),
+                ("outcome", np.uint8),
+            ])
+        # the file object buffers the records, so this is no write call
+        # per episode
+        self._file.write(np.array((iteration, *summary), dtype=self._dtype).tobytes())
+        self._n_summaries += 1
+
+    def flush(self)-> None:
+        """Flush the written summaries to disk."""
+        self._file.flush()
+
+    def truncate(self, n_summaries: int)-> None:
+        """
+        Remove the summaries written after the first n_summaries.
+
+        @params:
+            - n_summaries (int): Number of summaries to keep.
+        """
+        if n_summaries < self._n_summaries:
+            self._file.truncate(n_summaries * self._dtype.itemsize)
+            self._file.seek(n_summaries * self._dtype.itemsize)
+            self._n_summaries = n_summaries
+
+    def copy_from(self, other: "SummarySpill")-> None:
+        """
+        Replace the summaries by a copy of those of another spill file.
+
+        @params:
+            - other (SummarySpill): Flushed spill file to copy.
+        """
+        self._file.seek(0)
+        self._file.truncate()
+        with other._path.open("rb") as stream:  # noqa: SLF001
+            shutil.copyfileobj(stream, self._file)
+        self._dtype = other._dtype  # noqa: SLF001
+        self._n_summaries = other._n_summaries  # noqa: SLF001
+
+    def read(self)-> np.ndarray:
+        """
+        Read the written summaries.
+
+        @returns:
+            - np.ndarray with a structured record per summary, see
+            SUMMARY_FIELDS.
+        """
+        self.flush()
+        if self._dtype is None:
+            return np.zeros(0, dtype=[(field, np.int64) for field in SUMMARY_FIELDS])
+        return np.fromfile(self._path, dtype=self._dtype)
+
+    def finalize(self, folder_path: str, history_format: str)-> None:
+        """
+        Write the summaries to _episode_summaries.json or .npy.
+
+        The json file maps the iteration of every episode to its
+        length, return, hits and the name of its outcome, see
+        OUTCOMES. The .npy file is the structured array of read(), its
+        outcomes are the bits TERMINATED and TRUNCATED. The spill file
+        is copied or converted in chunks, so the summaries are written
+        without loading them into memory.
+
+        @params:
+            - folder_path (str): Path to output folder.
+            - history_format (str): "json" or "npy".
+        """
+        self.flush()
+        folder = Path(folder_path)
+        if history_format == "npy":
+            if self._dtype is None:
+                np.save(folder / "_episode_summaries.npy", self.read())
+                return
+            header = {
+                "descr": np.lib.format.dtype_to_descr(self._dtype),
+                "fortran_order": False,
+                "shape": (self._n_summaries,),
+            }
+            with (folder / "_episode_summaries.npy").open("wb") as stream, \
+                    self._path.open("rb") as source:
+                np.lib.format.write_array_header_1_0(stream, header)
+                shutil.copyfileobj(source, stream)
+            return
+
+        with (folder / "_episode_summaries.json").open("w") as stream:
+            stream.write("{")
+            for start in range(0, self._n_summaries, JSON_CHUNK_SIZE):
+                records = np.fromfile(
+                    self._path,
+                    dtype=self._dtype,
+                    count=min(JSON_CHUNK_SIZE, self._n_summaries - start),
+                    offset=start * self._dtype.itemsize,
+                )
+                for index, record in enumerate(records.tolist(), start):
+                    iteration, length, episode_return, hits, outcome = record
+                    stream.write("\n" if index == 0 else "\n,")
+                    stream.write(f'"{iteration}": ')
+                    json.dump(
+                        {
+                            "length": length,
+                            "return": episode_return,
+                            "hits": hits,
+                            "outcome": OUTCOMES[outcome],
+                        },
+                        stream,
+                        cls=NumpyEncoder,
+                    )
+            stream.write("\n}" if self._n_summaries else "}")
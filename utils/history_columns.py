@@ -0,0 +1,407 @@
+"""
+Columnar history module.
+
+This module contains the columnar binary format of the observation
+history: one contiguous .npy array per field, with the steps of all
+episodes after each other, and an index with the first step of every
+episode. Any episode is a slice of these arrays, which can be read
+with np.load(mmap_mode="r") without loading the rest of the history.
+
+The module contains the ColumnarSpill class, which writes the format,
+the ColumnarHistory class, which reads it, and convert_json(), which
+converts an _observation_history.json file to it. Run this module to
+convert a json file:
+```
+python -m utils.history_columns output/<run>/_observation_history.json
+```
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+from array import array
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+# fields of the steps, each stored in its own array
+FIELDS = ("x", "y", "vx", "vy", "n_targets", "reward", "flags")
+# bits of the flags field
+TERMINATED = 1
+TRUNCATED = 2
+
+# number of episodes of a json file that are converted at once
+CONVERT_CHUNK_SIZE = 256
+
+
+def _columns(observations: list)-> dict[str, np.ndarray]:
+    """
+    Split observations into one column per field.
+
+    @params:
+        - observations (list): Observations, each a tuple of the
+        state, reward, is_terminal, is_truncated and info.
+
+    @returns:
+        - dict with the array of each field, with the steps along the
+        first axis.
+    """
+    states = np.array([observation[0] for observation in observations])
+    terminated = np.array([observation[2] for observation in observations])
+    truncated = np.array([observation[3] for observation in observations])
+    return {
+        "x": states[..., 0],
+        "y": states[..., 1],
+        "vx": states[..., 2],
+        "vy": states[..., 3],
+        "n_targets": states[..., 4],
+        "reward": np.array([observation[1] for observation in observations]),
+        "flags": terminated.astype(np.uint8) * TERMINATED |
+            truncated.astype(np.uint8) * TRUNCATED,
+    }
+
+
+def _observations(columns: dict[str, np.ndarray])-> list:
+    """
+    Join the columns of an episode into observations.
+
+    @params:
+        - columns (dict): Array of each field of the episode.
+
+    @returns:
+        - list with the observation tuple of each step, see _columns().
+    """
+    states = np.stack(
+        [columns[field].astype(columns["x"].dtype) for field in FIELDS[:5]],
+        axis=-1,
+    )
+    terminated = (columns["flags"] & TERMINATED) != 0
+    truncated = (columns["flags"] & TRUNCATED) != 0
+    return [
+        (states[step], columns["reward"][step], terminated[step],
+         truncated[step], {})
+        for step in range(states.shape[0])
+    ]
+
+
+class ColumnarSpill:
+    """
+    Columnar spill files class.
+
+    Every field is appended to its own file of raw binary data, while
+    the first step and iteration of every episode are kept in memory.
+    finalize() turns these files into the columnar history, see
+    ColumnarHistory.
+
+    The positions and velocities are stored in the precision of the
+    states, the number of targets as int32 and the terminal and
+    truncated flags as bits of a uint8. States with a plane axis give
+    columns with a plane axis after the step axis.
+
+    This class has no public member variables.
+
+    @public methods:
+    + n_episodes()-> int
+        Count the episodes written.
+    + write(chunk: list)-> None
+        Write a chunk of episodes.
+    + flush()-> None
+        Flush the written episodes to disk.
+    + truncate(n_episodes: int)-> None
+        Remove the episodes that were written after the first n_episodes.
+    + copy_from(other: ColumnarSpill)-> None
+        Replace the episodes by a copy of those of another spill.
+    + items()-> Iterator[tuple[int, list]]
+        Iterate over the written episodes.
+    + finalize(folder_path: str)-> None
+        Write the observation history to _observation_history/.
+    """
+
+    def __init__(self, directory: str)-> None:
+        """
+        Initialize the ColumnarSpill class.
+
+        @params:
+            - directory (str): Directory to put the spill files in.
+        """
+        self._paths = {
+            field: Path(directory) / f"{field}.bin" for field in FIELDS
+        }
+        self._files = {
+            field: path.open("w+b")
+            for field, path in self._paths.items()
+        }
+        # known once the first step is written
+        self._dtypes = None
+        self._step_shape = ()
+        # first step of every episode, followed by the number of steps
+        self._offsets = array("q", [0])
+        self._iterations = array("q")
+
+    def n_episodes(self)-> int:
+        """
+        Count the episodes written.
+
+        @returns:
+            - int with the number of episodes.
+        """
+        return len(self._iterations)
+
+    def write(self, chunk: list)-> None:
+        """
+        Write a chunk of episodes.
+
+        @params:
+            - chunk (list): Tuples of the iteration and observations of
+            each episode.
+        """
+        for iteration, observations in chunk:
+            self._iterations.append(iteration)
+            self._offsets.append(self._offsets[-1] + len(observations))
+        observations = [
+            observation for _, episode in chunk for observation in episode
+        ]
+        if not observations:
+            return
+
+        columns = _columns(observations)
+        if self._dtypes is None:
+            self._dtypes = dict.fromkeys(("x", "y", "vx", "vy"), columns["x"].dtype)
+            self._dtypes["reward"] = columns["x"].dtype
+            self._dtypes["n_targets"] = np.dtype(np.int32)
+            self._dtypes["flags"] = np.dtype(np.uint8)
+            self._step_shape = columns["x"].shape[1:]
+        for field, column in columns.items():
+            np.ascontiguousarray(column, dtype=self._dtypes[field]).tofile(
+                self._files[field],
+            )
+
+    def flush(self)-> None:
+        """Flush the written episodes to disk."""
+        for stream in self._files.values():
+            stream.flush()
+
+    def truncate(self, n_episodes: int)-> None:
+        """
+        Remove the episodes that were written after the first n_episodes.
+
+        @params:
+            - n_episodes (int): Number of episodes to keep.
+        """
+        if n_episodes >= len(self._iterations):
+            return
+        if self._dtypes is not None:
+            step_size = int(np.prod(self._step_shape))
+            for field, stream in self._files.items():
+                size = self._offsets[n_episodes] * step_size * \
+                    self._dtypes[field].itemsize
+                stream.truncate(size)
+                stream.seek(size)
+        del self._iterations[n_episodes:]
+        del self._offsets[n_episodes + 1:]
+
+    def copy_from(self, other: "ColumnarSpill")-> None:
+        """
+        Replace the episodes by a copy of those of another spill.
+
+        @params:
+            - other (ColumnarSpill): Flushed spill to copy.
+        """
+        for field, stream in self._files.items():
+            stream.seek(0)
+            stream.truncate()
+            with other._paths[field].open("rb") as source:  # noqa: SLF001
+                shutil.copyfileobj(source, stream)
+        self._dtypes = other._dtypes  # noqa: SLF001
+        self._step_shape = other._step_shape  # noqa: SLF001
+        self._offsets = array("q", other._offsets)  # noqa: SLF001
+        self._iterations = array("q", other._iterations)  # noqa: SLF001
+
+    def items(self)-> Iterator[tuple[int, list]]:
+        """
+        Iterate over the written episodes.
+
+        The episodes are read back one at a time, so the history is
+        never in memory as a whole.
+
+        @returns:
+            - Iterator with the iteration and observations of each
+            episode, in the order they were written.
+        """
+        self.flush()
+        step_size = int(np.prod(self._step_shape))
+        for episode, iteration in enumerate(self._iterations):
+            start, stop = self._offsets[episode], self._offsets[episode + 1]
+            if start == stop:
+                yield iteration, []
+                continue
+            columns = {
+                field: np.fromfile(
+                    path,
+                    dtype=self._dtypes[field],
+                    count=(stop - start) * step_size,
+                    offset=start * step_size * self._dtypes[field].itemsize,
+                ).reshape(-1, *self._step_shape)
+                for field, path in self._paths.items()
+            }
+            yield iteration, _observations(columns)
+
+    def finalize(self, folder_path: str)-> None:
+        """
+        Write the observation history to _observation_history/.
+
+        Writes a .npy file per field, offsets.npy with the first step
+        of every episode followed by the number of steps, and
+        iterations.npy with the iteration of every episode. The spill
+        files are copied, so the history is written without loading it
+        into memory.
+
+        @params:
+            - folder_path (str): Path to output folder.
+        """
+        self.flush()
+        path = Path(folder_path) / "_observation_history"
+        path.mkdir(parents=True, exist_ok=True)
+        dtypes = self._dtypes
+        if dtypes is None:
+            dtypes = dict.fromkeys(FIELDS, np.dtype(np.float64))
+        for field in FIELDS:
+            header = {
+                "descr": np.lib.format.dtype_to_descr(dtypes[field]),
+                "fortran_order": False,
+                "shape": (self._offsets[-1], *self._step_shape),
+            }
+            with (path / f"{field}.npy").open("wb") as stream, \
+                    self._paths[field].open("rb") as source:
+                np.lib.format.write_array_header_1_0(stream, header)
+                shutil.copyfileobj(source, stream)
+        np.save(path / "offsets.npy", np.array(self._offsets))
+        np.save(path / "iterations.npy", np.array(self._iterations))
+
+
+class ColumnarHistory:
+    """
+    Columnar history class.
+
+    Reads the observation history written by ColumnarSpill, every
+    array is memory-mapped, so only the slices that are used are read
+    from disk.
+
+    @public member variables:
+    + x (np.ndarray): x position of the plane(s) per step.
+    + y (np.ndarray): y position of the plane(s) per step.
+    + vx (np.ndarray): Velocity in x direction of the plane(s) per step.
+    + vy (np.ndarray): Velocity in y direction of the plane(s) per step.
+    + n_targets (np.ndarray): Number of targets remaining per step.
+    + reward (np.ndarray): Reward of the plane(s) per step.
+    + flags (np.ndarray): Bits TERMINATED and TRUNCATED per step.
+    + offsets (np.ndarray): First step of every episode, followed by
+    the number of steps.
+    + iterations (np.ndarray): Iteration of every episode.
+
+    @public methods:
+    + episode(index: int)-> dict[str, np.ndarray]
+        Slices of every field with the steps of an episode.
+    + items()-> Iterator[tuple[int, list]]
+        Iterate over the episodes as observations.
+    """
+
+    def __init__(self, path: str)-> None:
+        """
+        Initialize the ColumnarHistory class.
+
+        @params:
+            - path (str): Path to the _observation_history/ folder.
+        """
+        folder = Path(path)
+        self.x = np.load(folder / "x.npy", mmap_mode="r")
+        self.y = np.load(folder / "y.npy", mmap_mode="r")
+        self.vx = np.load(folder / "vx.npy", mmap_mode="r")
+        self.vy = np.load(folder / "vy.npy", mmap_mode="r")
+        self.n_targets = np.load(folder / "n_targets.npy", mmap_mode="r")
+        self.reward = np.load(folder / "reward.npy", mmap_mode="r")
+        self.flags = np.load(folder / "flags.npy", mmap_mode="r")
+        self.offsets = np.load(folder / "offsets.npy")
+        self.iterations = np.load(folder / "iterations.npy")
+
+    def __len__(self)-> int:
+        """
+        Count the episodes.
+
+        @returns:
+            - int with the number of episodes.
+        """
+        return self.iterations.shape[0]
+
+    def episode(self, index: int)-> dict[str, np.ndarray]:
+        """
+        Slices of every field with the steps of an episode.
+
+        @params:
+            - index (int): Index of the episode, not its iteration.
+
+        @returns:
+            - dict with a memory-mapped slice per field.
+        """
+        steps = np.s_[self.offsets[index]:self.offsets[index + 1]]
+        return {field: getattr(self, field)[steps] for field in FIELDS}
+
+    def items(self)-> Iterator[tuple[int, list]]:
+        """
+        Iterate over the episodes as observations.
+
+        Gives the same observations as the json history, so this class
+        can be used in place of it, e.g. by create_path_plots().
+
+        @returns:
+            - Iterator with the iteration and observations of each
+            episode.
+        """
+        for index, iteration in enumerate(self.iterations):
+            yield int(iteration), _observations(self.episode(index))
+
+
+def convert_json(json_path: str, folder_path: str|None = None)-> None:
+    """
+    Convert an _observation_history.json file to the columnar history.
+
+    The json file does not keep the precision of the states, so the
+    positions, velocities and rewards are converted to float64.
+
+    @params:
+        - json_path (str): Path to the json file.
+        - folder_path (str): Path to the folder to write the
+        _observation_history/ folder to. If None, the folder of the json
+        file is used.
+    """
+    if folder_path is None:
+        folder_path = Path(json_path).parent
+    with Path(json_path).open() as stream:
+        history = json.load(stream)
+
+    episodes = [
+        (int(iteration), observations)
+        for iteration, observations in history.items()
+    ]
+    with tempfile.TemporaryDirectory(prefix="target_terminator_") as directory:
+        spill = ColumnarSpill(directory)
+        for start in range(0, len(episodes), CONVERT_CHUNK_SIZE):
+            spill.write(episodes[start:start + CONVERT_CHUNK_SIZE])
+        spill.finalize(folder_path)
+
+
+def main()-> None:
+    """Convert the json file given on the command line."""
+    parser = argparse.ArgumentParser(
+        description="Convert _observation_history.json to .npy columns.",
+    )
+    parser.add_argument("json_path")
+    parser.add_argument("folder_path", nargs="?", default=None)
+    arguments = parser.parse_args()
+    convert_json(arguments.json_path, arguments.folder_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+History writer module.
+
+This module contains the HistoryWriter class, which streams the
+finished episodes of an environment to disk in chunks, so the memory
+used by the observation history stays bounded however long the run is,
+and the JsonSpill class, which writes them as json.
+
+How much of every episode is recorded is set by the history level:
+"off" records nothing, "episode_summary" only the summary of every
+episode, see utils/episode_summaries.py, and "full" the summary as well
+as the observations.
+"""
+
+import itertools
+import json
+import queue
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+from utils.episode_summaries import SummarySpill
+from utils.history_columns import ColumnarSpill
+from utils.numpy_encoder import NumpyEncoder
+
+HISTORY_FORMATS = ("json", "npy")
+HISTORY_LEVELS = ("off", "episode_summary", "full")
+
+
+class JsonSpill:
+    """
+    Json spill file class.
+
+    The spill file is the observation history as a json object, with
+    the episodes keyed by their iteration. finalize() completes it, so
+    the result is byte for byte a json dump of the history dict.
+
+    This class has no public member variables.
+
+    @public methods:
+    + n_episodes()-> int
+        Count the episodes written.
+    + write(chunk: list)-> None
+        Write a chunk of episodes.
+    + flush()-> None
+        Flush the written episodes to disk.
+    + truncate(n_episodes: int)-> None
+        Remove the episodes that were written after the first n_episodes.
+    + copy_from(other: JsonSpill)-> None
+        Replace the episodes by a copy of those of another spill file.
+    + items()-> Iterator[tuple[int, list]]
+        Iterate over the written episodes.
+    + finalize(folder_path: str)-> None
+        Write the observation history to _observation_history.json.
+    """
+
+    def __init__(self, directory: str)-> None:
+        """
+        Initialize the JsonSpill class.
+
+        @params:
+            - directory (str): Directory to put the spill file in.
+        """
+        self._path = Path(directory) / "_observation_history.json"
+        self._file = self._path.open("w+")
+        self._file.write("{")
+        # offset in the spill file of every written episode, before its
+        # separator, so they can be read and truncated again. json
+        # escapes all non-ascii characters, so the offsets are in bytes
+        self._offsets = array("q")
+
+    def n_episodes(self)-> int:
+        """
+        Count the episodes written.
+
+        @returns:
+            - int with the number of episodes.
+        """
+        return len(self._offsets)
+
+    def write(self, chunk: list)-> None:
+        """
+        Write a chunk of episodes.
+
+        @params:
+            - chunk (list): Tuples of the iteration and observations of
+            each episode.
+        """
+        for iteration, observations in chunk:
+            self._offsets.append(self._file.tell())
+            # the first episode has no separator
+            if len(self._offsets) > 1:
+                self._file.write(", ")
+            self._file.write(f'"{iteration}": ')
+            json.dump(observations, self._file, cls=NumpyEncoder)
+
+    def flush(self)-> None:
+        """Flush the written episodes to disk."""
+        self._file.flush()
+
+    def truncate(self, n_episodes: int)-> None:
+        """
+        Remove the episodes that were written after the first n_episodes.
+
+        @params:
+            - n_episodes (int): Number of episodes to keep.
+        """
+        if n_episodes < len(self._offsets):
+            self._file.truncate(self._offsets[n_episodes])
+            self._file.seek(self._offsets[n_episodes])
+            del self._offsets[n_episodes:]
+
+    def copy_from(self, other: "JsonSpill")-> None:
+        """
+        Replace the episodes by a copy of those of another spill file.
+
+        @params:
+            - other (JsonSpill): Flushed spill file to copy.
+        """
+        self._file.seek(0)
+        self._file.truncate()
+        with other._path.open() as stream:  # noqa: SLF001
+            shutil.copyfileobj(stream, self._file)
+        self._offsets = array("q", other._offsets)  # noqa: SLF001
+
+    def items(self)-> Iterator[tuple[int, list]]:
+        """
+        Iterate over the written episodes.
+
+        The episodes are read back one at a time, so the history is
+        never in memory as a whole.
+
+        @returns:
+            - Iterator with the iteration and observations of each
+            episode, in the order they were written.
+        """
+        self.flush()
+        offsets = [*self._offsets, self._path.stat().st_size]
+        with self._path.open("rb") as stream:
+            for start, stop in itertools.pairwise(offsets):
+                stream.seek(start)
+                episode = stream.read(stop - start).decode().removeprefix(", ")
+                ((iteration, observations),) = json.loads(
+                    "{" + episode + "}",
+                ).items()
+                yield int(iteration), observations
+
+    def finalize(self, folder_path: str)-> None:
+        """
+        Write the observation history to _observation_history.json.
+
+        The spill file is copied and completed, so the history is
+        written without loading it into memory.
+
+        @params:
+            - folder_path (str): Path to output folder.
+        """
+        self.flush()
+        path = Path(folder_path) / "_observation_history.json"
+        shutil.copyfile(self._path, path)
+        with path.open("a") as stream:
+            stream.write("}")
+
+
+class HistoryWriter:
+    """
+    History writer class.
+
+    Finished episodes are buffered in memory until they hold chunk_size
+    steps, after which the whole chunk is written to a spill file in a
+    temporary directory. With a background thread, the chunks are
+    encoded and written by that thread, of which at most two are queued
+    at a time.
+
+    The spill file is either json, see JsonSpill, or one column of
+    binary data per field, see ColumnarSpill. The summaries of the
+    episodes are written to a spill file of their own, see
+    SummarySpill.
+
+    The observations of the episodes are kept according to a retention
+    policy: only every Nth episode is kept and, optionally, only the
+    last K of those. The last K episodes are kept in memory instead of
+    in the spill file, they are only written to it when the history is
+    read or finalized. The summaries of all episodes are kept.
+
+    @public member variables:
+    + n_episodes (int): Number of episodes added.
+
+    @public methods:
+    + add(iteration: int, summary: tuple, observations: list|None)-> None
+        Add a finished episode.
+    + items()-> Iterator[tuple[int, list]]
+        Iterate over the kept episodes.
+    + summaries()-> np.ndarray
+        Summaries of the added episodes.
+    + discard(n_episodes: int)-> None
+        Remove the episodes that were added after the first n_episodes.
+    + copy()-> HistoryWriter
+        Copy the writer, the copy continues independently.
+    + finalize(folder_path: str)-> None
+        Write the observation history to an output folder.
+    + close()-> None
+        Stop the background thread.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        *,
+        thread: bool = False,
+        history_format: str = "json",
+        level: str = "full",
+        keep_last: int|None = None,
+        every: int = 1,
+    )-> None:
+        """
+        Initialize the HistoryWriter class.
+
+        @params:
+            - chunk_size (int): Number of steps of finished episodes
+            that are kept in memory before they are written to disk.
+            - thread (bool): Write the chunks on a background thread.
+            - history_format (str): "json" or "npy", the format of the
+            spill file and the written history.
+            - level (str): "off", "episode_summary" or "full", see
+            HISTORY_LEVELS. Only at the "full" level the observations
+            of the episodes are kept.
+            - keep_last (int): Number of most recent episodes of which
+            the observations are kept. If None, all are kept.
+            - every (int): Keep the observations of every Nth episode,
+            starting at the first.
+        """
+        if chunk_size < 1:
+            raise ValueError("`chunk_size` must be at least 1.")
+        if history_format not in HISTORY_FORMATS:
+            raise ValueError(f"`history_format` must be one of {HISTORY_FORMATS}.")
+        if level not in HISTORY_LEVELS:
+            raise ValueError(f"`level` must be one of {HISTORY_LEVELS}.")
+        if keep_last is not None and keep_last < 1:
+            raise ValueError("`keep_last` must be at least 1.")
+        if every < 1:
+            raise ValueError("`every` must be at least 1.")
+        self._chunk_size = chunk_size
+        self._history_format = history_format
+        self._level = level
+        self._keep_last = keep_last
+        self._every = every
+        self.n_episodes = 0
+
+        self._dir = tempfile.TemporaryDirectory(prefix="target_terminator_")
+        self._spill = JsonSpill(self._dir.name) if history_format == "json" \
+            else ColumnarSpill(self._dir.name)
+        self._summaries = SummarySpill(self._dir.name)
+
+        # episodes that are not written yet and their number of steps,
+        # and the number of episodes that were handed to the spill file
+        self._buffer = []
+        self._n_buffered = 0
+        self._n_written = 0
+        # the last keep_last episodes, with the index they were added at
+        self._recent = None if keep_last is None else deque(maxlen=keep_last)
+
+        self._queue = None
+        self._thread = None
+        if thread:
+            self._queue = queue.Queue(maxsize=2)
+            self._thread = threading.Thread(target=self._work, daemon=True)
+            self._thread.start()
+
+    def _work(self)-> None:
+        """Write the queued chunks until None is queued."""
+        while True:
+            chunk = self._queue.get()
+            try:
+                if chunk is None:
+                    return
+                self._spill.write(chunk)
+            finally:
+                self._queue.task_done()
+
+    def _write_buffer(self)-> None:
+        """Write the buffered episodes, on the background thread if any."""
+        if self._queue is None:
+            self._spill.write(self._buffer)
+        else:
+            self._queue.put(self._buffer)
+        self._n_written += len(self._buffer)
+        self._buffer = []
+        self._n_buffered = 0
+
+    def _flush(self)-> None:
+        """Write the buffered episodes and wait until they are written."""
+        if self._buffer:
+            self._write_buffer()
+        if self._queue is not None:
+            self._queue.join()
+        self._spill.flush()
+        self._summaries.flush()
+
+    def _write_recent(self)-> None:
+        """Replace the episodes of the spill file by those kept by keep_last."""
+        if self._recent is None:
+            return
+        self._spill.truncate(0)
+        self._spill.write(
+            [(iteration, observations) for _, iteration, observations in self._recent],
+        )
+
+    def add(
+        self,
+        iteration: int,
+        summary: tuple,
+        observations: list|None = None,
+    )-> None:
+        """
+        Add a finished episode.
+
+        @params:
+            - iteration (int): Iteration of the episode.
+            - summary (tuple): Summary of the episode, see
+            utils.episode_summaries.summarize().
+            - observations (list): Observations of the episode, which
+            are not changed afterwards. Ignored below the "full" level
+            and if the retention policy does not keep the episode.
+        """
+        index = self.n_episodes
+        self.n_episodes += 1
+        self._summaries.write(iteration, summary)
+        if self._level != "full" or observations is None or index % self._every:
+            return
+        if self._recent is not None:
+            self._recent.append((index, iteration, observations))
+            return
+        self._buffer.append((iteration, observations))
+        self._n_buffered += len(observations)
+        if self._n_buffered >= self._chunk_size:
+            self._write_buffer()
+
+    def items(self)-> Iterator[tuple[int, list]]:
+        """
+        Iterate over the kept episodes.
+
+        The written episodes are read back from the spill file one at a
+        time, so the history is never in memory as a whole.
+
+        @returns:
+            - Iterator with the iteration and observations of each
+            episode, in the order they were added.
+        """
+        self._flush()
+        self._write_recent()
+        return self._spill.items()
+
+    def summaries(self)-> np.ndarray:
+        """
+        Summaries of the added episodes.
+
+        @returns:
+            - np.ndarray with a structured record per episode, see
+            utils.episode_summaries.SUMMARY_FIELDS.
+        """
+        self._flush()
+        return self._summaries.read()
+
+    def discard(self, n_episodes: int)-> None:
+        """
+        Remove the episodes that were added after the first n_episodes.
+
+        Episodes that were already dropped by keep_last are not
+        restored. The buffered episodes are trimmed in memory, the spill
+        file is only truncated if written episodes are removed.
+
+        @params:
+            - n_episodes (int): Number of episodes to keep.
+        """
+        self._summaries.truncate(n_episodes)
+        if self._recent is not None:
+            while self._recent and self._recent[-1][0] >= n_episodes:
+                self._recent.pop()
+        else:
+            # every Nth of the first n_episodes episodes was kept
+            n_kept = -(-n_episodes // self._every)
+            if n_kept >= self._n_written:
+                del self._buffer[n_kept - self._n_written:]
+                self._n_buffered = sum(len(episode) for _, episode in self._buffer)
+            else:
+                if self._queue is not None:
+                    self._queue.join()
+                self._spill.truncate(n_kept)
+                self._buffer = []
+                self._n_buffered = 0
+                self._n_written = n_kept
+        self.n_episodes = self._summaries.n_summaries()
+
+    def copy(self)-> "HistoryWriter":
+        """
+        Copy the writer, the copy continues independently.
+
+        The spill files are copied on disk.
+
+        @returns:
+            - HistoryWriter with the copy.
+        """
+        self._flush()
+        clone = HistoryWriter(
+            self._chunk_size,
+            thread=self._thread is not None,
+            history_format=self._history_format,
+            level=self._level,
+            keep_last=self._keep_last,
+            every=self._every,
+        )
+        clone._summaries.copy_from(self._summaries)
+        if self._recent is None:
+            clone._spill.copy_from(self._spill)
+            clone._n_written = self._n_written
+        else:
+            clone._recent.extend(self._recent)
+        clone.n_episodes = self.n_episodes
+        return clone
+
+    def finalize(self, folder_path: str)-> None:
+        """
+        Write the observation history to an output folder.
+
+        The spill files are copied, so the history is written without
+        loading it into memory. The summaries are written below the
+        "full" level as well, see SummarySpill. The observations are
+        only written at the "full" level, see JsonSpill and
+        ColumnarSpill for the files that are written. Nothing is
+        written at the "off" level.
+
+        @params:
+            - folder_path (str): Path to output folder.
+        """
+        if self._level == "off":
+            return
+        self._flush()
+        self._summaries.finalize(folder_path, self._history_format)
+        if self._level == "full":
+            self._write_recent()
+            self._spill.finalize(folder_path)
+
+    def close(self)-> None:
+        """
+        Stop the background thread.
+
+        Episodes that are added afterwards are written without it. The
+        spill file is removed when the writer is garbage collected, so
+        the history can still be read and finalized.
+        """
+        if self._thread is not None:
+            self._flush()
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
@@ -21,26 +21,31 @@ class NumpyEncoder(json.JSONEncoder):
     @public methods:
     + default(obj: Any)-> Any
         For each object in the to-parse json file, this function will
-        convert it to a list if it is a numpy array or bool.
+        convert it to a list if it is a numpy array, or to a bool or
+        float if it is a numpy bool or float.
     """
     def default(self, obj: object)-> object:
         """
         Convert objects for JSON serialization.
 
-        Converts numpy arrays to lists and numpy bools to bools,
-        ignores any others.
+        Converts numpy arrays to lists, numpy bools to bools and numpy
+        floats, e.g. float32 rewards, to floats, ignores any others.
 
         @params:
             - obj (Any): Object to encode.
         
         @returns:
             - Any, with exclusion of numpy arrays, as these are
-            converted to lists and numpy bools, which are cast to bools.
+            converted to lists, numpy bools, which are cast to bools,
+            and numpy floats, which are cast to floats.
         """
         if isinstance(obj, np.ndarray):
             return obj.tolist()
         
         if isinstance(obj, np.bool_):
             return bool(obj)
+
+        if isinstance(obj, np.floating):
+            return float(obj)
         
         return super().default(obj)